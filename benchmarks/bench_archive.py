@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Compressed archives (core/archive.py) against JSON and the binary format:
+file size / compression ratio, encode time, full decode throughput, the cost
+of decoding the one chunk under the play head, and the largest quantization
+error per float field. Runs on data/recording.json by default.
+
+    python benchmarks/bench_archive.py
+    python benchmarks/bench_archive.py --path flight.gsrec --chunk 4096
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.append(root_dir)
+
+from core import archive, recording_file
+from core.drone_state import STATE_FIELDS
+
+
+def best_of(runs, fn):
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def decode_all(path):
+    store = archive.load_archive(path)
+    return [[track.column(f) for f in STATE_FIELDS] for track in store]
+
+
+def chunk_decode(reader, rng, count):
+    # One column chunk per call, as draw_frame triggers when the play head enters a new chunk
+    entries = [(e, c) for e in reader.header['drones'] for c in e['chunks']]
+    picks = [entries[i] for i in rng.integers(0, len(entries), count)]
+    fields = rng.choice(STATE_FIELDS, count)
+    start = time.perf_counter()
+    for (entry, chunk), field in zip(picks, fields):
+        dtype, scale = reader.fields[field]
+        offset, length, stored = chunk['columns'][field]
+        reader.decode(offset, length, stored, scale, dtype)
+    return (time.perf_counter() - start) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark compressed recording archives")
+    parser.add_argument("--path", type=str, default=os.path.join(root_dir, "data", "recording.json"),
+                        help="Recording to archive (any format load_recording reads)")
+    parser.add_argument("--chunk", type=int, default=archive.CHUNK_SAMPLES, help="Samples per chunk")
+    parser.add_argument("--runs", type=int, default=5, help="Repetitions (best is reported)")
+    parser.add_argument("--json", type=str, default=None, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    store = recording_file.load_recording(args.path)
+    samples = sum(len(t) for t in store)
+    column_bytes = sum(t.column(f).nbytes for t in store for f in STATE_FIELDS) + sum(t.time.nbytes for t in store)
+    rng = np.random.default_rng(0)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, save in (("json", lambda p: recording_file.save_json(store, p)),
+                           ("binary", lambda p: recording_file.save_binary(store, p))):
+            path = os.path.join(tmp, name)
+            save(path)
+            results[name] = {'file_bytes': os.path.getsize(path)}
+        json_bytes = results['json']['file_bytes']
+
+        for codec in sorted(archive.CODECS):
+            for lossless in (False, True):
+                name = f"{codec}{'-lossless' if lossless else ''}"
+                path = os.path.join(tmp, name + archive.ARCHIVE_EXTENSION)
+                t_encode = best_of(args.runs, lambda: archive.save_archive(
+                    store, path, codec=codec, chunk_samples=args.chunk, lossless=lossless))
+                t_decode = best_of(args.runs, lambda: decode_all(path))
+                loaded = archive.load_archive(path)
+                errors = {f: float(max(np.abs(a.column(f) - b.column(f)).max() if len(a) else 0.0
+                                       for a, b in zip(store, loaded)))
+                          for f in STATE_FIELDS if f in archive.SCALES}
+                size = os.path.getsize(path)
+                results[name] = {
+                    'file_bytes': size, 'ratio_vs_json': json_bytes / size,
+                    'ratio_vs_columns': column_bytes / size,
+                    'encode_s': t_encode, 'decode_s': t_decode,
+                    'decode_samples_per_s': samples / t_decode, 'decode_mb_per_s': column_bytes / t_decode / 1e6,
+                    'chunk_decode_us': chunk_decode(archive.ArchiveReader(path), rng, 2000) * 1e6,
+                    'max_error': errors,
+                }
+
+    print(f"{args.path}: {samples} samples, {column_bytes / 1e3:.0f} kB of columns, chunk {args.chunk}")
+    print(f"{'format':<15} {'kB':>8} {'vs JSON':>8} {'vs cols':>8} {'enc ms':>8} {'dec ms':>8} "
+          f"{'dec MB/s':>9} {'chunk us':>9}")
+    for name, r in results.items():
+        if 'encode_s' not in r:
+            print(f"{name:<15} {r['file_bytes'] / 1e3:>8.1f}")
+            continue
+        print(f"{name:<15} {r['file_bytes'] / 1e3:>8.1f} {r['ratio_vs_json']:>7.1f}x {r['ratio_vs_columns']:>7.1f}x "
+              f"{r['encode_s'] * 1e3:>8.1f} {r['decode_s'] * 1e3:>8.1f} {r['decode_mb_per_s']:>9.0f} "
+              f"{r['chunk_decode_us']:>9.1f}")
+    print("max quantization error: " + ", ".join(f"{f} {e:.2g}" for f, e in results['zlib']['max_error'].items()))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'path': args.path, 'samples': samples, 'chunk': args.chunk, 'results': results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
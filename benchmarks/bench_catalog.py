@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Recording catalog (core/catalog.py) on a generated library: the first full
+index, a rescan with nothing changed, a rescan after touching a few files,
+and a query for "drone N lost GPS near a point", against answering the same
+question by loading every recording the way the Load dialog used to.
+
+    python benchmarks/bench_catalog.py --files 200 --samples 2000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.append(root_dir)
+
+from bench_recording_format import make_store
+from core import recording_file
+from core.catalog import Catalog, index_file
+from core.flight_summary import GPS_LOSS
+from core.geo_math import haversine_m
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def scan_files(paths, drone_id, near, radius_m):
+    # Without a catalog: parse every recording and look for the event
+    hits = 0
+    for path in paths:
+        for event in index_file(path)["events"]:
+            if (event["drone_id"] == drone_id and event["kind"] == GPS_LOSS and event["lat"] is not None
+                    and haversine_m(near[0], near[1], event["lat"], event["lon"]) <= radius_m):
+                hits += 1
+                break
+    return hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the recording catalog")
+    parser.add_argument("--files", type=int, default=100, help="Recordings in the library")
+    parser.add_argument("--drones", type=int, default=4)
+    parser.add_argument("--samples", type=int, default=2000, help="Samples per drone")
+    parser.add_argument("--touched", type=int, default=5, help="Files modified before the incremental rescan")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Worker processes for the first index")
+    parser.add_argument("--json", type=str, default=None, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        library = os.path.join(tmp, "library")
+        os.makedirs(library)
+        store = make_store(args.drones, args.samples)
+        rng = np.random.default_rng(1)
+        paths = []
+        for i in range(args.files):
+            # A few GPS losses per drone, in different places in every file
+            for track in store:
+                fix = track.column('gps_3d_fix')
+                fix[:] = 1
+                for start in rng.integers(1, len(fix) - 20, 3):
+                    fix[start:start + 10] = 0
+            path = os.path.join(library, f"flight{i:04d}" + (".gsrec" if i % 2 else ".json"))
+            recording_file.save_recording(store, path)
+            paths.append(path)
+        total = sum(os.path.getsize(p) for p in paths)
+        print(f"{args.files} recordings, {total / 1e6:.0f} MB ({args.drones} drones x {args.samples} samples each)")
+
+        with Catalog(os.path.join(tmp, "catalog.sqlite")) as catalog:
+            t_index, counts = timed(lambda: catalog.update([library], jobs=args.jobs))
+            t_rescan, _ = timed(lambda: catalog.update([library]))
+            for path in paths[:args.touched]:
+                os.utime(path, (time.time() + 10, time.time() + 10))
+            t_touched, touched = timed(lambda: catalog.update([library]))
+
+            event = catalog.events(paths[0], drone_id=1, kind=GPS_LOSS)
+            near = (event[0]["lat"], event[0]["lon"]) if event and event[0]["lat"] is not None else (0.0, 0.0)
+            t_query, rows = timed(lambda: catalog.find(drone_id=1, event=GPS_LOSS, near=near, radius_m=50.0))
+            db_bytes = os.path.getsize(catalog.path)
+        t_scan, hits = timed(lambda: scan_files(paths, 1, near, 50.0))
+
+    results = {
+        'index_s': t_index, 'indexed': counts['indexed'], 'rescan_unchanged_s': t_rescan,
+        'rescan_touched_s': t_touched, 'reindexed': touched['indexed'],
+        'query_ms': t_query * 1e3, 'query_hits': len(rows), 'scan_files_s': t_scan, 'scan_hits': hits,
+        'catalog_bytes': db_bytes,
+    }
+    print(f"first index ({args.jobs} processes)  {t_index:8.2f} s")
+    print(f"rescan, nothing changed      {t_rescan * 1e3:8.1f} ms")
+    print(f"rescan, {touched['indexed']} files touched      {t_touched * 1e3:8.1f} ms")
+    print(f"query (drone 1, GPS loss within 50 m): {t_query * 1e3:.2f} ms, {len(rows)} recordings")
+    print(f"same question by parsing every file:   {t_scan:.2f} s, {hits} recordings "
+          f"({t_scan / t_query:.0f}x slower)")
+    print(f"catalog size {db_bytes / 1e3:.0f} kB")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'files': args.files, 'bytes': total, 'results': results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
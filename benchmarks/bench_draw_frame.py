@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Per-frame CPU of draw_frame's interpolation and screen projection, from 4 to
+500 drones: the old per-drone loop (track.locate, StateRow reads, lerp per
+field, lat_lon_to_screen and the shape geometry of every drone) against
+FrameSampler.sample + MapCanvas.draw_drones (core/frame_sampler.py). Plays
+the recording at --speed with 60 frames/s of play-head steps, so window
+rebuilds are included. Canvas item updates (Tk) are left out of both: they
+are one call per item whichever way the positions are computed.
+
+    python benchmarks/bench_draw_frame.py --drones 4,16,64,250,500 --samples 4000
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+import types
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.append(root_dir)
+
+from bench_recording_format import make_store
+from core import geo_math
+from core.frame_sampler import FrameSampler
+from ui.map_canvas import MapCanvas
+
+BOUNDS = (32.0, 33.0, 34.0, 35.0)
+DIMS = (1200, 800)
+PADDING = (60, 20, 20, 150)
+PX_PER_METER = 0.005
+COLORS = ["#e6194b", "#3cb44b", "#4363d8", "#f58231"]
+
+
+def lerp(a, b, t):
+    return a + (b - a) * t
+
+
+def lerp_angle(a, b, t):
+    diff = (b - a + 180) % 360 - 180
+    return (a + diff * t) % 360
+
+
+def old_frame(store, t):
+    # Before: draw_frame's loop and draw_drone's geometry, one drone at a time
+    shapes = []
+    for path in store:
+        if not path:
+            continue
+        i, j, alpha = path.locate(t)
+        s = path[i]
+        if i != j:
+            n = path[j]
+            lat, lon = lerp(s.lat, n.lat, alpha), lerp(s.lon, n.lon, alpha)
+            heading = lerp_angle(s.heading, n.heading, alpha)
+            vn = lerp(s.velocity_north, n.velocity_north, alpha)
+            ve = lerp(s.velocity_east, n.velocity_east, alpha)
+        else:
+            lat, lon, heading, vn, ve = s.lat, s.lon, s.heading, s.velocity_north, s.velocity_east
+        color = COLORS[(s.id - 1) % len(COLORS)]
+        cx, cy = geo_math.lat_lon_to_screen(lat, lon, BOUNDS, DIMS, PADDING)
+        line_len = max(0.26 * PX_PER_METER * 2.0, 10.0)
+        rad = math.radians(heading)
+        arrow = None
+        if abs(vn) > 0.1 or abs(ve) > 0.1:
+            arrow = (cx + ve * PX_PER_METER * 2, cy - vn * PX_PER_METER * 2)
+        shapes.append((s.id, color, cx, cy, cx + line_len * math.sin(rad), cy - line_len * math.cos(rad), arrow))
+    return shapes
+
+
+def new_canvas():
+    # MapCanvas.draw_drones on a stand-in canvas: no Tk items
+    canvas = types.SimpleNamespace(bounds=BOUNDS, dims=DIMS, padding=PADDING, px_per_meter=PX_PER_METER)
+    canvas._place_drone = lambda *args: None
+    canvas.draw_drones = MapCanvas.draw_drones.__get__(canvas)
+    return canvas
+
+
+def new_frame(sampler, canvas, store, t):
+    frame = sampler.sample(store, t)
+    ids = frame.ids.tolist()
+    colors = [COLORS[(d - 1) % len(COLORS)] for d in ids]
+    canvas.draw_drones(ids, frame.lat, frame.lon, frame.heading, colors, frame.vn, frame.ve)
+
+
+def per_frame(fn, times):
+    """(mean, max) seconds per call over the play-head times."""
+    costs = []
+    for t in times:
+        start = time.perf_counter()
+        fn(t)
+        costs.append(time.perf_counter() - start)
+    return sum(costs) / len(costs), max(costs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-frame interpolation and projection")
+    parser.add_argument("--drones", type=str, default="4,16,64,250,500", help="Drone counts to sweep")
+    parser.add_argument("--samples", type=int, default=4000, help="Samples per drone (20 Hz)")
+    parser.add_argument("--speed", type=float, default=4.0, help="Playback speed (x real time)")
+    parser.add_argument("--frames", type=int, default=600, help="Frames drawn per run")
+    parser.add_argument("--json", type=str, default=None, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for drones in (int(d) for d in args.drones.split(",")):
+        store = make_store(drones, args.samples)
+        first, last = store.time_range()
+        times = [first + (k * args.speed / 60.0) % (last - first) for k in range(args.frames)]
+        old_mean, old_max = per_frame(lambda t: old_frame(store, t), times)
+        sampler, canvas = FrameSampler(), new_canvas()
+        new_mean, new_max = per_frame(lambda t: new_frame(sampler, canvas, store, t), times)
+        sample_mean, _ = per_frame(lambda t: sampler.sample(store, t), times)
+        results.append({'drones': drones, 'old_ms': old_mean * 1e3, 'old_max_ms': old_max * 1e3,
+                        'new_ms': new_mean * 1e3, 'new_max_ms': new_max * 1e3, 'sample_ms': sample_mean * 1e3})
+        del store
+
+    print(f"{args.samples} samples per drone, {args.speed:g}x, {args.frames} frames (canvas item updates excluded)")
+    print(f"{'drones':>6} | {'loop ms':>8} {'max':>7} | {'batch ms':>8} {'max':>7} {'sample ms':>10} | {'speedup':>7}")
+    for r in results:
+        print(f"{r['drones']:>6} | {r['old_ms']:>8.3f} {r['old_max_ms']:>7.2f} | {r['new_ms']:>8.3f} "
+              f"{r['new_max_ms']:>7.2f} {r['sample_ms']:>10.3f} | {r['old_ms'] / r['new_ms']:>6.1f}x")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'samples': args.samples, 'speed': args.speed, 'results': results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
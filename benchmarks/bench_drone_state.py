@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Memory and speed of the slotted DroneSelfState against the plain @dataclass
+it replaced (rebuilt here from the same fields), plus the columnar
+TelemetryStore for reference.
+
+    python benchmarks/bench_drone_state.py --drones 8 --samples 72000   # 1 h at 20 Hz
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, fields, field, make_dataclass, MISSING
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.append(root_dir)
+
+from core.drone_state import DroneSelfState, FrozenDroneSelfState
+from core.telemetry_store import TelemetryStore
+
+# The previous definition: same fields, plain @dataclass (one __dict__ per instance)
+LegacyDroneSelfState = make_dataclass(
+    "LegacyDroneSelfState",
+    [(f.name, f.type) if f.default is MISSING else (f.name, f.type, field(default=f.default))
+     for f in fields(DroneSelfState)])
+
+
+def make_rows(drones, samples, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for d in range(1, drones + 1):
+        for i in range(samples):
+            rows.append((d, 32.0 + rng.random(), 34.0 + rng.random(), rng.uniform(10, 50),
+                         rng.uniform(-5, 5), rng.uniform(-5, 5), rng.uniform(-0.5, 0.5),
+                         rng.uniform(0, 360), rng.randint(0, 9), rng.randint(20, 100), 15, 1,
+                         1_000_000 + i * 50_000))
+    return rows
+
+
+def timed(fn, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def measure_memory(fn):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = fn()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DroneSelfState representations")
+    parser.add_argument("--drones", type=int, default=8)
+    parser.add_argument("--samples", type=int, default=20000, help="Samples per drone")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is reported)")
+    parser.add_argument("--json", type=str, default=None, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    rows = make_rows(args.drones, args.samples)
+    dicts = [LegacyDroneSelfState(*r).__dict__.copy() for r in rows]
+    n = len(rows)
+    print(f"{n:,} samples ({args.drones} drones x {args.samples})")
+
+    results = {}
+    classes = (("legacy", LegacyDroneSelfState), ("slots", DroneSelfState), ("frozen", FrozenDroneSelfState))
+    for name, cls in classes:
+        mem, objs = measure_memory(lambda: [cls(*r) for r in rows])
+        t_tuple, _ = timed(lambda: [cls(*r) for r in rows], args.repeat)
+        t_dict, _ = timed(lambda: [cls(**d) for d in dicts], args.repeat)
+        if name == "legacy":
+            t_save, _ = timed(lambda: [asdict(o) for o in objs], args.repeat)
+        else:
+            t_save, _ = timed(lambda: [o.to_dict() for o in objs], args.repeat)
+        results[name] = {
+            'bytes_per_sample': mem / n,
+            'from_tuple_us': t_tuple / n * 1e6,
+            'from_dict_us': t_dict / n * 1e6,
+            'to_dict_us': t_save / n * 1e6,
+        }
+        del objs
+
+    # JSON load/save of a whole recording, as main.py and DroneApp do it
+    per_drone = [[d for d in dicts if d['id'] == i] for i in range(1, args.drones + 1)]
+    text = json.dumps(per_drone)
+    legacy_paths = [[LegacyDroneSelfState(**d) for d in p] for p in per_drone]
+    slot_paths = [[DroneSelfState(**d) for d in p] for p in per_drone]
+    t_load_legacy, _ = timed(lambda: [[LegacyDroneSelfState(**d) for d in p] for p in json.loads(text)], args.repeat)
+    t_load_slots, _ = timed(lambda: [[DroneSelfState.from_dict(d) for d in p] for p in json.loads(text)], args.repeat)
+    t_load_store, store = timed(lambda: TelemetryStore.from_dict_lists(json.loads(text)), args.repeat)
+    t_save_legacy, _ = timed(lambda: json.dumps([[asdict(s) for s in p] for p in legacy_paths]), args.repeat)
+    t_save_slots, _ = timed(lambda: json.dumps([[s.to_dict() for s in p] for p in slot_paths]), args.repeat)
+    t_save_store, _ = timed(lambda: json.dumps(store.to_dict_lists()), args.repeat)
+    results['recording'] = {
+        'load_s': {'legacy': t_load_legacy, 'slots': t_load_slots, 'store': t_load_store},
+        'save_s': {'legacy': t_save_legacy, 'slots': t_save_slots, 'store': t_save_store},
+        'store_bytes_per_sample': store.nbytes / n,
+    }
+
+    base = results['legacy']
+    print(f"{'class':<8} {'B/sample':>9} {'tuple us':>9} {'dict us':>8} {'to_dict us':>11}")
+    for name, _ in classes:
+        r = results[name]
+        print(f"{name:<8} {r['bytes_per_sample']:>9.0f} {r['from_tuple_us']:>9.2f} "
+              f"{r['from_dict_us']:>8.2f} {r['to_dict_us']:>11.2f}"
+              + ("" if name == "legacy" else
+                 f"   mem x{base['bytes_per_sample'] / r['bytes_per_sample']:.1f}"
+                 f"  to_dict x{base['to_dict_us'] / r['to_dict_us']:.1f}"))
+    rec = results['recording']
+    print(f"store (columns, capacity included): {rec['store_bytes_per_sample']:.0f} B/sample")
+    for what in ('load_s', 'save_s'):
+        t = rec[what]
+        print(f"JSON {what[:4]:<4}: legacy {t['legacy']:.3f}s  slots {t['slots']:.3f}s "
+              f"(x{t['legacy'] / t['slots']:.1f})  store {t['store']:.3f}s (x{t['legacy'] / t['store']:.1f})")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'drones': args.drones, 'samples': args.samples, 'results': results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Ingest throughput / latency benchmark: SerialBridge -> IngestQueue -> DroneApp.
+
+A writer process streams 'gcs64' packets into a FIFO or pty; the real
+decoder runs in a reader thread and the real DroneApp renders from the
+ingest queue. Sweeps drone count, read chunk size, corruption rate and
+send rate (0 = uncapped), and writes one JSON document so results can be
+compared between versions.
+
+    python benchmarks/bench_ingest.py --drones 4 20 --rate 0 2000 --output bench.json
+    python benchmarks/bench_ingest.py --xvfb          # headless box with Xvfb installed
+    python benchmarks/bench_ingest.py --mode decode   # no Tk at all: decoder + queue only
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tty
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.append(root_dir)
+
+from core.drone_state import DroneSelfState
+from core.ingest_queue import IngestQueue
+from gs_serial import protocols
+from gs_serial.serial_bridge import SerialBridge
+
+RESULT_VERSION = 1
+
+
+# --- Writer (separate process so it doesn't compete for our GIL) ---
+
+def build_packets(num_drones, corrupt, count=4096, seed=0):
+    """Pre-encodes a pool of packets; corrupted ones get a flipped byte or leading garbage."""
+    rng = random.Random(seed)
+    pool = []
+    for i in range(count):
+        state = DroneSelfState(
+            id=(i % num_drones) + 1,
+            lat=32.0 + rng.random() * 0.01, lon=34.0 + rng.random() * 0.01, alt=rng.uniform(10, 50),
+            velocity_north=rng.uniform(-5, 5), velocity_east=rng.uniform(-5, 5),
+            velocity_down=rng.uniform(-0.5, 0.5), heading=rng.uniform(0, 360),
+            sm_current_stat=rng.randint(0, 9), battery_precentages=100,
+            drones_keep_alive=15, gps_3d_fix=1)
+        packet = bytearray(protocols.GCS64.encode(state))
+        if rng.random() < corrupt:
+            if rng.random() < 0.5:
+                packet[rng.randrange(2, len(packet))] = rng.randrange(256)
+            else:
+                packet = bytearray(rng.randrange(256) for _ in range(rng.randrange(1, 16))) + packet
+        pool.append(bytes(packet))
+    return pool
+
+
+def writer_main(path_or_fd, num_drones, corrupt, rate, duration, sent_counter):
+    pool = build_packets(num_drones, corrupt)
+    fd = path_or_fd if isinstance(path_or_fd, int) else os.open(path_or_fd, os.O_WRONLY)
+    # Send in bursts of ~1 ms worth of packets when rate-limited
+    burst = max(1, int(rate / 1000)) if rate else 64
+    start = time.perf_counter()
+    deadline = start + duration
+    sent = 0
+    try:
+        for i in itertools.count(step=burst):
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            if rate:
+                due = start + sent / rate
+                if due > now:
+                    time.sleep(due - now)
+            chunk = b"".join(pool[(i + k) % len(pool)] for k in range(burst))
+            os.write(fd, chunk)
+            sent += burst
+    except (BrokenPipeError, OSError):
+        pass
+    finally:
+        sent_counter.value = sent
+        os.close(fd)
+
+
+# --- Reader ---
+
+class ReaderThread(threading.Thread):
+    def __init__(self, fd, bridge, queue, chunk_size, push_times):
+        super().__init__(daemon=True)
+        self.fd = fd
+        self.bridge = bridge
+        self.queue = queue
+        self.chunk_size = chunk_size
+        self.push_times = push_times
+        self.decoded = 0
+        self.cpu = 0.0
+
+    def run(self):
+        cpu_start = time.thread_time()
+        with contextlib.redirect_stdout(io.StringIO()):
+            while True:
+                states = self.bridge.read_states(self.fd, self.chunk_size)
+                if states is None:
+                    break
+                if not states:
+                    continue
+                t_push = time.perf_counter()
+                for s in states:
+                    self.push_times[id(s)] = t_push
+                self.decoded += len(states)
+                self.queue.put_many(states)
+        self.cpu = time.thread_time() - cpu_start
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, int(round(pct / 100.0 * (len(values) - 1)))))
+    return values[k]
+
+
+def open_transport(kind):
+    """Returns (writer_target, reader_fd, cleanup)."""
+    if kind == "pty":
+        master, slave = os.openpty()
+        tty.setraw(slave)
+        return master, slave, lambda: os.close(slave)
+
+    tmp_dir = tempfile.mkdtemp(prefix="gs_bench_")
+    path = os.path.join(tmp_dir, "stream.fifo")
+    os.mkfifo(path)
+    return path, path, lambda: shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def run_case(args, num_drones, chunk_size, corrupt, rate, make_app):
+    writer_target, reader_target, cleanup = open_transport(args.transport)
+    sent_counter = multiprocessing.Value('q', 0)
+    writer = multiprocessing.Process(
+        target=writer_main,
+        args=(writer_target, num_drones, corrupt, rate, args.duration, sent_counter))
+    writer.start()
+    if isinstance(writer_target, int):
+        os.close(writer_target)  # The child owns the pty master now
+
+    fd = reader_target if isinstance(reader_target, int) else os.open(reader_target, os.O_RDONLY)
+
+    push_times = {}
+    latencies = []
+    render_stats = {'renders': 0, 'rendered': 0, 'cpu': 0.0}
+    app, root, queue = make_app(args)
+
+    def on_batch(states, render):
+        # Wraps the app's batch ingest: render time minus reader push time
+        cpu_start = time.thread_time()
+        render(states)
+        t_render = time.perf_counter()
+        render_stats['cpu'] += time.thread_time() - cpu_start
+        render_stats['renders'] += 1
+        render_stats['rendered'] += len(states)
+        for s in states:
+            t_push = push_times.pop(id(s), None)
+            if t_push is not None:
+                latencies.append(t_render - t_push)
+
+    if app is not None:
+        original = app.process_new_states
+        app.process_new_states = lambda states, rx_times=None: on_batch(states, lambda s: original(s, rx_times))
+
+    bridge = SerialBridge(lib_path=args.native_lib, layout=protocols.GCS64)
+    reader = ReaderThread(fd, bridge, queue, chunk_size, push_times)
+
+    start = time.perf_counter()
+    reader.start()
+    tick = args.render_delay / 1000.0
+    while reader.is_alive() or queue.depth:
+        if root is not None:
+            # DroneApp.animate_loop drains the queue on its own 'after' schedule
+            root.update()
+        else:
+            pending = queue.drain()
+            if pending:
+                on_batch(pending, lambda states: None)
+        time.sleep(tick if root is None else 0.001)
+    elapsed = time.perf_counter() - start
+
+    writer.join()
+    reader.join()
+    if not isinstance(reader_target, int):
+        os.close(fd)
+    cleanup()
+    if root is not None:
+        root.destroy()
+
+    rendered = render_stats['rendered']
+    total_cpu = reader.cpu + render_stats['cpu']
+    return {
+        'drones': num_drones,
+        'chunk_size': chunk_size,
+        'corrupt': corrupt,
+        'rate': rate,
+        'duration_s': round(elapsed, 3),
+        'packets_sent': sent_counter.value,
+        'packets_decoded': reader.decoded,
+        'packets_rendered': rendered,
+        'queue': queue.stats(),
+        'renders': render_stats['renders'],
+        'pkt_per_s': round(rendered / elapsed, 1) if elapsed else None,
+        'latency_ms': {
+            'p50': _ms(percentile(latencies, 50)),
+            'p99': _ms(percentile(latencies, 99)),
+            'max': _ms(max(latencies) if latencies else None),
+            'mean': _ms(statistics.fmean(latencies) if latencies else None),
+        },
+        'cpu_us_per_packet': {
+            'reader': _us(reader.cpu, reader.decoded),
+            'ui': _us(render_stats['cpu'], rendered),
+            'total': _us(total_cpu, rendered),
+        },
+    }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000.0, 3)
+
+
+def _us(cpu_seconds, count):
+    return round(cpu_seconds / count * 1e6, 3) if count else None
+
+
+# --- App factories ---
+
+def make_ui_app(args):
+    import tkinter as tk
+    import core.cfg as cfg
+    from ui.app_window import DroneApp
+
+    root = tk.Tk()
+    root.title("Ingest Benchmark")
+    ns = argparse.Namespace(lat=32.0, lon=34.0, width=args.width, height=args.height, res=0.00001)
+    bounds = cfg.calculate_bounds(ns)
+    app = DroneApp(root, bounds, args.width, args.height, ns.res, lambda: None, lambda: None,
+                   queue_size=args.queue_size, queue_policy=args.queue_policy)
+    app.RENDER_DELAY = args.render_delay
+    return app, root, app.ingest_queue
+
+
+def make_decode_only(args):
+    return None, None, IngestQueue(args.queue_size, args.queue_policy)
+
+
+def start_xvfb():
+    """Starts a virtual X server if there is no display. Returns the process or None."""
+    if os.environ.get("DISPLAY"):
+        return None
+    if not shutil.which("Xvfb"):
+        print("[WARNING] No DISPLAY and Xvfb is not installed.")
+        return None
+    display = ":%d" % (90 + os.getpid() % 10)
+    proc = subprocess.Popen(["Xvfb", display, "-screen", "0", "1600x1200x24"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(1.0)
+    os.environ["DISPLAY"] = display
+    return proc
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=root_dir,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the live ingest pipeline")
+    parser.add_argument("--mode", choices=["ui", "decode"], default="ui",
+                        help="'ui' drives DroneApp; 'decode' stops at the ingest queue")
+    parser.add_argument("--transport", choices=["fifo", "pty"], default="fifo")
+    parser.add_argument("--drones", type=int, nargs="+", default=[4, 20])
+    parser.add_argument("--chunk", type=int, nargs="+", default=[256, 16384], help="Bytes per read()")
+    parser.add_argument("--corrupt", type=float, nargs="+", default=[0.0, 0.05])
+    parser.add_argument("--rate", type=float, nargs="+", default=[0, 400],
+                        help="Packets/s sent by the writer (0 = uncapped)")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per case")
+    parser.add_argument("--queue_size", type=int, default=10000)
+    parser.add_argument("--queue_policy", choices=["drop_oldest", "block"], default="drop_oldest")
+    parser.add_argument("--render_delay", type=int, default=16, help="Render tick in ms")
+    parser.add_argument("--native_lib", default=None, help="Use the native reader library")
+    parser.add_argument("--width", type=int, default=800)
+    parser.add_argument("--height", type=int, default=600)
+    parser.add_argument("--xvfb", action="store_true", help="Start Xvfb if there is no DISPLAY")
+    parser.add_argument("--output", default=None, help="Write JSON results here (default: stdout)")
+    args = parser.parse_args()
+
+    xvfb = start_xvfb() if args.xvfb else None
+    make_app = make_ui_app if args.mode == "ui" else make_decode_only
+    if args.mode == "ui":
+        try:
+            import tkinter as tk
+            tk.Tk().destroy()
+        except Exception as e:
+            print(f"[WARNING] Tk unavailable ({e}); falling back to --mode decode")
+            args.mode = "decode"
+            make_app = make_decode_only
+
+    results = []
+    try:
+        for drones, chunk, corrupt, rate in itertools.product(args.drones, args.chunk, args.corrupt, args.rate):
+            print(f"Running: drones={drones} chunk={chunk} corrupt={corrupt} rate={rate or 'uncapped'}",
+                  file=sys.stderr)
+            results.append(run_case(args, drones, chunk, corrupt, rate, make_app))
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+
+    report = {
+        'version': RESULT_VERSION,
+        'git_revision': git_revision(),
+        'created': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        'host': {'platform': platform.platform(), 'python': platform.python_version(),
+                 'cpus': os.cpu_count()},
+        'config': {'mode': args.mode, 'transport': args.transport, 'duration_s': args.duration,
+                   'queue_size': args.queue_size, 'queue_policy': args.queue_policy,
+                   'render_delay_ms': args.render_delay, 'native': bool(args.native_lib)},
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
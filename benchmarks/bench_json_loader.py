@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Loading a JSON recording: json.load + TelemetryStore.from_dict_lists (what
+load_file_content did on the Tk thread) against IncrementalJsonLoader.
+Reports total time, time until the first block could be shown, and peak
+Python memory next to the size of the loaded columns.
+
+    python benchmarks/bench_json_loader.py --drones 8 --samples 50000
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.append(root_dir)
+
+from bench_recording_format import make_store
+from core import recording_file
+from core.json_loader import IncrementalJsonLoader
+from core.telemetry_store import TelemetryStore
+
+
+def load_whole(path):
+    with open(path, 'r') as f:
+        raw_data = json.load(f)
+    return TelemetryStore.from_dict_lists(raw_data), None
+
+
+def load_incremental(path):
+    # What DroneApp._poll_loader does, without the Tk timer
+    store = TelemetryStore()
+    loader = IncrementalJsonLoader(path).start()
+    start = time.perf_counter()
+    first = None
+    previous = None
+    while True:
+        done = loader.done
+        for drone_id, columns in loader.poll():
+            track = store.track(drone_id, create=True)
+            if previous is not None and previous is not track:
+                previous.compact()
+            previous = track
+            track.extend_columns(columns)
+            if first is None:
+                first = time.perf_counter() - start
+        if done:
+            break
+        time.sleep(0.005)
+    store.compact()
+    return store, first
+
+
+def measure(fn, path):
+    gc.collect()
+    start = time.perf_counter()
+    _, first = fn(path)
+    elapsed = time.perf_counter() - start
+    # Memory in a second run: tracemalloc slows parsing down
+    gc.collect()
+    tracemalloc.start()
+    store, _ = fn(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'seconds': elapsed, 'first_block_s': first if first is not None else elapsed,
+            'peak_bytes': peak, 'store_bytes': store.nbytes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON recording loading")
+    parser.add_argument("--drones", type=int, default=8)
+    parser.add_argument("--samples", type=int, default=20000, help="Samples per drone")
+    parser.add_argument("--json", type=str, default=None, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rec.json")
+        recording_file.save_json(make_store(args.drones, args.samples), path)
+        size = os.path.getsize(path)
+        print(f"{args.drones} drones x {args.samples} samples, JSON {size / 1e6:.1f} MB")
+        for name, fn in (("whole", load_whole), ("incremental", load_incremental)):
+            results[name] = measure(fn, path)
+
+    print(f"{'loader':<12} {'total s':>8} {'1st block s':>12} {'peak MB':>8} {'store MB':>9} {'peak/store':>11}")
+    for name, r in results.items():
+        print(f"{name:<12} {r['seconds']:>8.2f} {r['first_block_s']:>12.3f} {r['peak_bytes'] / 1e6:>8.1f} "
+              f"{r['store_bytes'] / 1e6:>9.1f} {r['peak_bytes'] / r['store_bytes']:>11.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'drones': args.drones, 'samples': args.samples, 'json_bytes': size, 'results': results},
+                      f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Long live session, simulated: feeds a TelemetryStore one second of samples
+per drone at a time (device clock) and, every simulated hour, reports the
+store's memory and what a graph refresh costs (series() + min/max of one
+field for every drone, what GraphPanel.refresh_active_plots does). Compares
+keeping every sample with a HistoryPolicy applied every second, like
+DroneApp._compact_history.
+
+    python benchmarks/bench_live_history.py --drones 4 --rate 20 --hours 6
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.append(root_dir)
+
+from core import history
+from core.history import HistoryPolicy
+from core.telemetry_store import TelemetryStore
+
+
+def graph_refresh(store):
+    start = time.perf_counter()
+    for track in store:
+        if len(track):
+            _, data = history.series(track, 'alt')
+            data.min()
+            data.max()
+    return time.perf_counter() - start
+
+
+def run(drones, rate, hours, policy):
+    rng = np.random.default_rng(0)
+    store = TelemetryStore()
+    n = int(rate)
+    offsets = np.arange(n) / rate
+    rows = []
+    compact_s = 0.0
+    compact_calls = 0
+    ingest_s = 0.0
+    for second in range(int(hours * 3600)):
+        start = time.perf_counter()
+        for d in range(1, drones + 1):
+            store.track(d, create=True).extend_columns({
+                'id': np.full(n, d), 'lat': 32.0 + rng.random(n) * 1e-3, 'lon': 34.0 + rng.random(n) * 1e-3,
+                'alt': rng.uniform(10, 50, n), 'heading': rng.uniform(0, 360, n),
+                'timestamp': ((second + offsets) * 1e6).astype(np.int64) + 1,
+            })
+        ingest_s += time.perf_counter() - start
+        if policy is not None:
+            start = time.perf_counter()
+            policy.apply(store)
+            compact_s += time.perf_counter() - start
+            compact_calls += 1
+        if (second + 1) % 3600 == 0:
+            rows.append({
+                'hour': (second + 1) // 3600,
+                'store_mb': store.nbytes / 1e6,
+                'full_samples': sum(len(t) for t in store),
+                'graph_refresh_ms': min(graph_refresh(store) for _ in range(3)) * 1e3,
+                'ingest_us_per_s': ingest_s / 3600 * 1e6,
+                'compact_ms': compact_s / compact_calls * 1e3 if compact_calls else 0.0,
+            })
+            ingest_s = compact_s = 0.0
+            compact_calls = 0
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bounded live history")
+    parser.add_argument("--drones", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=20.0, help="Samples per second per drone")
+    parser.add_argument("--hours", type=float, default=6.0, help="Simulated session length")
+    parser.add_argument("--minutes", type=float, default=history.FULL_RESOLUTION / 60,
+                        help="Full-resolution window of the policy")
+    parser.add_argument("--json", type=str, default=None, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    for name, policy in (("unbounded", None), ("policy", HistoryPolicy(args.minutes * 60.0))):
+        results[name] = run(args.drones, args.rate, args.hours, policy)
+
+    print(f"{args.drones} drones at {args.rate:g} Hz, {args.hours:g} h; policy: {args.minutes:g} min full "
+          f"resolution, tiers {history.DEFAULT_TIERS}")
+    print(f"{'mode':<10} {'hour':>4} {'store MB':>9} {'samples':>9} {'graph ms':>9} {'ingest us/s':>12} "
+          f"{'compact ms':>11}")
+    for name, rows in results.items():
+        for r in rows:
+            print(f"{name:<10} {r['hour']:>4} {r['store_mb']:>9.1f} {r['full_samples']:>9} "
+                  f"{r['graph_refresh_ms']:>9.2f} {r['ingest_us_per_s']:>12.1f} {r['compact_ms']:>11.3f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'drones': args.drones, 'rate': args.rate, 'hours': args.hours, 'minutes': args.minutes,
+                       'results': results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Compares the pure-Python and native (serial_reader.cpp) SerialBridge paths.
+
+Build the library first:
+    make -C gs_serial
+    python benchmarks/bench_native_reader.py --packets 200000 --corrupt 0.05
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.append(root_dir)
+
+from core.drone_state import DroneSelfState
+from gs_serial import protocols
+from gs_serial.native_reader import DEFAULT_LIB_PATH
+from gs_serial.serial_bridge import SerialBridge
+
+
+def generate_stream(num_packets, num_drones, corrupt, seed=0):
+    """Builds a 'gcs64' byte stream with optional bit flips, garbage and truncated frames."""
+    rng = random.Random(seed)
+    out = bytearray()
+    for i in range(num_packets):
+        state = DroneSelfState(
+            id=(i % num_drones) + 1,
+            lat=32.0 + rng.random(), lon=34.0 + rng.random(), alt=rng.uniform(10, 50),
+            velocity_north=rng.uniform(-5, 5), velocity_east=rng.uniform(-5, 5),
+            velocity_down=rng.uniform(-0.5, 0.5), heading=rng.uniform(0, 360),
+            sm_current_stat=rng.randint(0, 9), battery_precentages=100,
+            drones_keep_alive=15, gps_3d_fix=1)
+        packet = bytearray(protocols.GCS64.encode(state))
+        if corrupt and rng.random() < corrupt:
+            packet[rng.randrange(len(packet))] = rng.randrange(256)
+        if corrupt and rng.random() < corrupt:
+            out += bytes(rng.randrange(256) for _ in range(rng.randrange(16)))
+        out += packet
+    return bytes(out)
+
+
+def run_bridge(path, lib_path, read_size):
+    fd = os.open(path, os.O_RDONLY)
+    bridge = SerialBridge(lib_path=lib_path)
+    count = 0
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        while True:
+            states = bridge.read_states(fd, read_size)
+            if states is None:
+                break
+            count += len(states)
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+    os.close(fd)
+    return count, elapsed, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pure-Python vs native SerialBridge decoding")
+    parser.add_argument("--packets", type=int, default=200000, help="Packets in the test stream")
+    parser.add_argument("--drones", type=int, default=20, help="Distinct drone IDs")
+    parser.add_argument("--corrupt", type=float, default=0.0, help="Per-packet corruption probability")
+    parser.add_argument("--read_size", type=int, nargs="+", default=[256, 4096, 65536],
+                        help="Bytes per read() to test")
+    parser.add_argument("--lib", default=DEFAULT_LIB_PATH, help="Path to libgs_serial_reader.so")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per configuration (best is reported)")
+    args = parser.parse_args()
+
+    data = generate_stream(args.packets, args.drones, args.corrupt)
+    print(f"Stream: {args.packets} packets, {len(data) / 1e6:.1f} MB, corruption {args.corrupt:.0%}")
+
+    native_available = os.path.exists(args.lib)
+    if not native_available:
+        print(f"[WARNING] {args.lib} not found, only the Python path is measured. Run `make -C gs_serial`.")
+
+    with tempfile.NamedTemporaryFile(suffix=".bin") as f:
+        f.write(data)
+        f.flush()
+
+        print(f"{'path':<8} {'read':>7} {'packets':>9} {'pkt/s':>12} {'MB/s':>8} {'cpu us/pkt':>11}")
+        for read_size in args.read_size:
+            baseline = None
+            for name, lib in (("python", None), ("native", args.lib)):
+                if lib and not native_available:
+                    continue
+                best = None
+                for _ in range(args.repeat):
+                    result = run_bridge(f.name, lib, read_size)
+                    if best is None or result[1] < best[1]:
+                        best = result
+                count, elapsed, cpu = best
+                rate = count / elapsed if elapsed > 0 else float('inf')
+                speedup = ""
+                if baseline is None:
+                    baseline = elapsed
+                else:
+                    speedup = f"  x{baseline / elapsed:.1f}"
+                print(f"{name:<8} {read_size:>7} {count:>9} {rate:>12,.0f} "
+                      f"{len(data) / elapsed / 1e6:>8.1f} {cpu / max(count, 1) * 1e6:>11.2f}{speedup}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Playback pacing (core/playback_clock.py) against the old fixed step of 0.3
+frames per render tick: runs the render loop headless for a few seconds
+with a simulated frame cost and reports the achieved speed (recording
+seconds per wall second) next to the requested one, and the frames skipped.
+With the fixed step the replay speed falls as frames get slower; with the
+clock it stays put and frames are skipped instead.
+
+    python benchmarks/bench_playback.py --speed 4 --costs 2,10,30,60
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.append(root_dir)
+
+from core.playback_clock import PlaybackClock
+
+RENDER_DELAY = 0.016   # s, DroneApp.RENDER_DELAY
+OLD_PLAY_SPEED = 0.3   # frames per tick before the playback clock
+
+
+def run_fixed_step(duration, cost, frame_period):
+    # Before: advance a fixed step, draw, then wait RENDER_DELAY
+    play_head = 0.0
+    ticks = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        play_head += OLD_PLAY_SPEED
+        time.sleep(cost)
+        time.sleep(RENDER_DELAY)
+        ticks += 1
+    return play_head * frame_period / (time.perf_counter() - start), ticks, 0
+
+
+def run_clock(duration, cost, speed):
+    clock = PlaybackClock(speed)
+    clock.start(0.0)
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        tick_start = time.perf_counter()
+        t = clock.tick(RENDER_DELAY)
+        time.sleep(cost)
+        # Next frame RENDER_DELAY after this one started, as animate_loop schedules it
+        time.sleep(max(RENDER_DELAY - (time.perf_counter() - tick_start), 0.001))
+    return t / (time.perf_counter() - start), clock.ticks, clock.skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark playback pacing")
+    parser.add_argument("--speed", type=float, default=4.0, help="Requested speed (x real time)")
+    parser.add_argument("--costs", type=str, default="2,10,30,60", help="Simulated draw_frame cost per frame (ms)")
+    parser.add_argument("--frame_period", type=float, default=0.05,
+                        help="Seconds per timeline frame for the fixed step (20 Hz recording)")
+    parser.add_argument("--duration", type=float, default=2.0, help="Wall seconds per run")
+    parser.add_argument("--json", type=str, default=None, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for cost_ms in (float(c) for c in args.costs.split(",")):
+        fixed, fixed_ticks, _ = run_fixed_step(args.duration, cost_ms / 1000.0, args.frame_period)
+        clocked, ticks, skipped = run_clock(args.duration, cost_ms / 1000.0, args.speed)
+        results.append({'cost_ms': cost_ms, 'fixed_speed': fixed, 'fixed_fps': fixed_ticks / args.duration,
+                        'clock_speed': clocked, 'clock_fps': ticks / args.duration, 'skipped': skipped})
+
+    print(f"requested {args.speed:g}x; fixed step = {OLD_PLAY_SPEED} frames/tick at {args.frame_period} s/frame")
+    print(f"{'draw ms':>8} | {'fixed: speed':>12} {'fps':>5} | {'clock: speed':>12} {'fps':>5} {'skipped':>8}")
+    for r in results:
+        print(f"{r['cost_ms']:>8.0f} | {r['fixed_speed']:>11.2f}x {r['fixed_fps']:>5.0f} | "
+              f"{r['clock_speed']:>11.2f}x {r['clock_fps']:>5.0f} {r['skipped']:>8}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'speed': args.speed, 'results': results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+JSON vs binary (memory-mapped) recordings: file size, save time, time to
+open, time to the first drawn frame and random-seek cost. Also the UI-thread
+cost of recording with the streaming recorder against buffering the session
+and saving it on Stop.
+
+    python benchmarks/bench_recording_format.py --drones 8 --samples 72000   # 1 h at 20 Hz
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.append(root_dir)
+
+from core import recording_file
+from core.recorder import StreamingRecorder
+from core.telemetry_store import TelemetryStore
+
+
+def make_store(drones, samples, seed=0):
+    rng = np.random.default_rng(seed)
+    store = TelemetryStore()
+    for d in range(1, drones + 1):
+        track = store.track(d, create=True)
+        track.extend_columns({
+            'id': np.full(samples, d),
+            'lat': 32.0 + rng.random(samples), 'lon': 34.0 + rng.random(samples),
+            'alt': rng.uniform(10, 50, samples),
+            'velocity_north': rng.uniform(-5, 5, samples), 'velocity_east': rng.uniform(-5, 5, samples),
+            'velocity_down': rng.uniform(-0.5, 0.5, samples), 'heading': rng.uniform(0, 360, samples),
+            'sm_current_stat': rng.integers(0, 10, samples), 'battery_precentages': rng.integers(20, 101, samples),
+            'drones_keep_alive': np.full(samples, 15), 'gps_3d_fix': np.ones(samples, dtype=np.int64),
+            'timestamp': 1_000_000 + np.arange(samples) * 50_000,
+        })
+    return store
+
+
+def first_frame(store):
+    # What draw_frame reads at play_head 0
+    return [(p[0].lat, p[0].lon, p[0].heading) for p in store if len(p)]
+
+
+def timed(fn):
+    gc.collect()
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark recording file formats")
+    parser.add_argument("--drones", type=int, default=8)
+    parser.add_argument("--samples", type=int, default=20000, help="Samples per drone")
+    parser.add_argument("--seeks", type=int, default=1000, help="Random frames read after opening")
+    parser.add_argument("--json", type=str, default=None, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    store = make_store(args.drones, args.samples)
+    n = args.drones * args.samples
+    print(f"{n:,} samples ({args.drones} drones x {args.samples})")
+    frames = np.random.default_rng(1).integers(0, args.samples, args.seeks)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt, ext in (("json", ".json"), ("binary", ".gsrec")):
+            path = os.path.join(tmp, "rec" + ext)
+            t_save, _ = timed(lambda: recording_file.save_recording(store, path))
+            t_open, loaded = timed(lambda: recording_file.load_recording(path))
+            t_first, _ = timed(lambda: first_frame(loaded))
+            t_seek, _ = timed(lambda: [[p[int(i)].lat for p in loaded] for i in frames])
+            results[fmt] = {
+                'file_bytes': os.path.getsize(path),
+                'save_s': t_save,
+                'open_s': t_open,
+                'first_frame_s': t_open + t_first,
+                'seek_us': t_seek / (args.seeks * args.drones) * 1e6,
+            }
+            del loaded
+
+        # Live recording: per-sample cost on the UI thread, and the pause when Stop is pressed
+        states = [p[i].to_state() for i in range(args.samples) for p in store]
+        buffered = TelemetryStore()
+        t_buffer, _ = timed(lambda: [buffered.append(st) for st in states])
+        t_stop_json, _ = timed(lambda: recording_file.save_json(buffered, os.path.join(tmp, "stop.json"), indent=4))
+        recorder = StreamingRecorder(os.path.join(tmp, "journal.gsrec"))
+        t_stream, _ = timed(lambda: [recorder.append(st) for st in states])
+        t_stop_stream, _ = timed(recorder.close)
+        results['recording'] = {
+            'buffer_append_us': t_buffer / n * 1e6, 'buffer_stop_s': t_stop_json,
+            'stream_append_us': t_stream / n * 1e6, 'stream_stop_s': t_stop_stream,
+            'stream_stats': recorder.stats(),
+        }
+
+    print(f"{'format':<7} {'MB':>8} {'save s':>8} {'open s':>9} {'1st frame s':>12} {'seek us':>8}")
+    for fmt in ('json', 'binary'):
+        r = results[fmt]
+        print(f"{fmt:<7} {r['file_bytes'] / 1e6:>8.1f} {r['save_s']:>8.3f} {r['open_s']:>9.4f} "
+              f"{r['first_frame_s']:>12.4f} {r['seek_us']:>8.2f}")
+    rec = results['recording']
+    print(f"recording: append {rec['buffer_append_us']:.2f} us (buffer) vs {rec['stream_append_us']:.2f} us "
+          f"(streaming); Stop {rec['buffer_stop_s']:.2f} s (JSON dump) vs {rec['stream_stop_s']:.3f} s (footer)")
+    j, b = results['json'], results['binary']
+    print(f"binary: {j['file_bytes'] / b['file_bytes']:.1f}x smaller, saves {j['save_s'] / b['save_s']:.0f}x faster, "
+          f"first frame {j['first_frame_s'] / b['first_frame_s']:.0f}x sooner")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'drones': args.drones, 'samples': args.samples, 'results': results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
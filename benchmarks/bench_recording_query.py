@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Windowed queries (core/recording_query.py) against loading the recording and
+slicing it: time and peak memory to get a 30 s window of one drone's
+altitude, and to get one field of every drone (what a graph plots), from a
+binary recording, a compressed archive and JSON. Opening is timed apart.
+
+    python benchmarks/bench_recording_query.py --drones 8 --samples 72000   # 1 h at 20 Hz
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.append(root_dir)
+
+from bench_recording_format import make_store
+from core import archive, recording_file
+from core.recording_query import open_recording
+
+
+def measure(fn, runs):
+    """(best time, peak traced memory of one run)."""
+    best = float('inf')
+    for _ in range(runs):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def load_window(path, drone_id, t0, t1):
+    # Before: load, then slice the track
+    track = recording_file.load_recording(path).track(drone_id)
+    i, j = track.index_at(t0), track.index_at(t1) + 1
+    return track.time[i:j].copy(), track.column('alt')[i:j].copy()
+
+
+def load_field(path, field):
+    store = recording_file.load_recording(path)
+    return [(t.time.copy(), t.column(field).copy()) for t in store]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark windowed recording queries")
+    parser.add_argument("--drones", type=int, default=8)
+    parser.add_argument("--samples", type=int, default=72000, help="Samples per drone (20 Hz)")
+    parser.add_argument("--window", type=float, default=30.0, help="Seconds of the windowed query")
+    parser.add_argument("--runs", type=int, default=3, help="Repetitions (best is reported)")
+    parser.add_argument("--no_json", action="store_true", help="Skip the JSON recording (slow to generate)")
+    parser.add_argument("--json", type=str, default=None, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    store = make_store(args.drones, args.samples)
+    first, last = store.time_range()
+    t0 = (first + last) / 2
+    t1 = t0 + args.window
+    print(f"{args.drones} drones x {args.samples} samples, window {args.window:g} s of drone 1's altitude")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        formats = [("gsrec", recording_file.save_binary), ("gsarc", archive.save_archive)]
+        if not args.no_json:
+            formats.append(("json", recording_file.save_json))
+        for name, save in formats:
+            path = os.path.join(tmp, "flight." + name)
+            save(store, path)
+            r = {'file_bytes': os.path.getsize(path)}
+            r['load_window_s'], r['load_window_peak'] = measure(lambda: load_window(path, 1, t0, t1), args.runs)
+            r['open_s'], _ = measure(lambda: open_recording(path), args.runs)
+            # Queries on an open recording (GraphPanel keeps it for every refresh)
+            recording = open_recording(path)
+            r['query_window_s'], r['query_window_peak'] = measure(
+                lambda: recording.query(drones=[1], fields=['alt'], t0=t0, t1=t1), args.runs)
+            r['load_field_s'], r['load_field_peak'] = measure(lambda: load_field(path, 'alt'), args.runs)
+            r['query_field_s'], r['query_field_peak'] = measure(lambda: recording.query(fields=['alt']), args.runs)
+            results[name] = r
+
+    print(f"{'format':<7} {'MB':>7} {'open ms':>8} | {'window: load ms':>15} {'query ms':>9} {'load MB':>8} "
+          f"{'query MB':>9} | {'field: load ms':>14} {'query ms':>9} {'load MB':>8} {'query MB':>9}")
+    for name, r in results.items():
+        print(f"{name:<7} {r['file_bytes'] / 1e6:>7.1f} {r['open_s'] * 1e3:>8.1f} | "
+              f"{r['load_window_s'] * 1e3:>15.1f} {r['query_window_s'] * 1e3:>9.2f} {r['load_window_peak'] / 1e6:>8.1f} "
+              f"{r['query_window_peak'] / 1e6:>9.2f} | {r['load_field_s'] * 1e3:>14.1f} "
+              f"{r['query_field_s'] * 1e3:>9.1f} {r['load_field_peak'] / 1e6:>8.1f} {r['query_field_peak'] / 1e6:>9.1f}")
+    print("(queries run on an open recording, see 'open ms'; peak = traced Python/NumPy allocations, "
+          "memory-mapped pages of .gsrec aren't counted)")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'drones': args.drones, 'samples': args.samples, 'window_s': args.window,
+                       'results': results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
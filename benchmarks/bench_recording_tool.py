@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Batch throughput of recording_tool.py: converts and summarizes a directory
+of JSON recordings with 1 worker process and with --jobs workers, and
+reports files/s and input MB/s for each, so the scaling across cores shows.
+
+    python benchmarks/bench_recording_tool.py --files 32 --samples 20000 --jobs 8
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.append(root_dir)
+
+from bench_recording_format import make_store
+from core import recording_file
+
+
+def run_tool(*args):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(root_dir, "recording_tool.py"), *args],
+                   check=False, stderr=subprocess.DEVNULL, stdout=subprocess.DEVNULL, cwd=root_dir)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the batch recording CLI")
+    parser.add_argument("--files", type=int, default=16, help="JSON recordings in the batch")
+    parser.add_argument("--drones", type=int, default=4)
+    parser.add_argument("--samples", type=int, default=10000, help="Samples per drone")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Worker processes of the parallel run")
+    parser.add_argument("--json", type=str, default=None, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        logs = os.path.join(tmp, "logs")
+        os.makedirs(logs)
+        first = os.path.join(logs, "flight000.json")
+        recording_file.save_json(make_store(args.drones, args.samples), first)
+        with open(first, 'rb') as f:
+            data = f.read()
+        for i in range(1, args.files):
+            with open(os.path.join(logs, f"flight{i:03d}.json"), 'wb') as f:
+                f.write(data)
+        total = len(data) * args.files
+        print(f"{args.files} JSON recordings, {total / 1e6:.0f} MB ({args.drones} drones x {args.samples} samples each)")
+
+        for jobs in sorted({1, args.jobs}):
+            out = os.path.join(tmp, f"out{jobs}")
+            t_convert = run_tool("convert", logs, "--format", "gsarc", "--out", out, "--jobs", str(jobs))
+            t_summary = run_tool("summarize", logs, "--out", os.path.join(tmp, f"s{jobs}.csv"), "--jobs", str(jobs))
+            results[jobs] = {'convert_s': t_convert, 'summarize_s': t_summary,
+                             'convert_mb_per_s': total / t_convert / 1e6, 'summarize_mb_per_s': total / t_summary / 1e6}
+
+    print(f"{'jobs':>4} {'convert s':>10} {'MB/s':>7} {'summarize s':>12} {'MB/s':>7}")
+    for jobs, r in results.items():
+        print(f"{jobs:>4} {r['convert_s']:>10.2f} {r['convert_mb_per_s']:>7.1f} {r['summarize_s']:>12.2f} "
+              f"{r['summarize_mb_per_s']:>7.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'files': args.files, 'bytes': total, 'results': results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
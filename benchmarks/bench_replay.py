@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Decoder throughput on real traffic: replays a raw capture (main.py --capture)
+through SerialBridge as fast as possible, with the same chunk boundaries as
+when it was recorded. Prints a digest of the decoded states, so two versions
+of the decoder can be checked for identical output on the same capture.
+
+    python main.py -s stream -p /dev/ttyUSB0 --capture flight.gsraw   # record
+    python benchmarks/bench_replay.py --capture flight.gsraw
+
+Without --capture, a synthetic one is made from data/recording.json.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.append(root_dir)
+
+from core import recording_file
+from core.link_stats import LinkStats
+from gs_serial import protocols
+from gs_serial.raw_capture import RawCaptureWriter, read_capture, replay_records, DATA
+from gs_serial.serial_bridge import SerialBridge
+
+
+def make_capture(path, layout, chunk, corrupt, repeat, seed=0):
+    """Encodes data/recording.json frame by frame and logs it in 'chunk'-byte reads."""
+    store = recording_file.load_recording(os.path.join(root_dir, "data", "recording.json"))
+    span = max(int(track.column('timestamp')[-1]) for track in store if len(track)) + 1
+    blob = bytearray()
+    for r in range(repeat):
+        for i in range(store.max_len):
+            for track in store:
+                if i < len(track):
+                    state = track[i].to_dict()
+                    state['timestamp'] += r * span   # Keep the device clock moving forward
+                    blob += layout.encode(state)
+    rng = random.Random(seed)
+    for _ in range(int(len(blob) * corrupt)):
+        blob[rng.randrange(len(blob))] = rng.randrange(256)
+    writer = RawCaptureWriter(path, layout.name)
+    source = writer.add_source("synthetic")
+    t = time.perf_counter()
+    for i in range(0, len(blob), chunk):
+        writer.write(source, bytes(blob[i:i + chunk]), t + i * 1e-6)
+    writer.close()
+
+
+def run(records, protocol):
+    digest = hashlib.sha256()
+    link_stats = LinkStats()
+
+    def on_states(states, rx_time):
+        for state in states:
+            digest.update(repr(state.to_tuple()).encode())
+
+    start = time.perf_counter()
+    count = replay_records(records, lambda: SerialBridge(layout=protocol, link_stats=link_stats), on_states)
+    elapsed = time.perf_counter() - start
+    # Totals only: per-drone rate/jitter reflect the replay speed, not the link
+    return count, elapsed, digest.hexdigest(), link_stats.summary()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a raw capture through the decoder")
+    parser.add_argument("--capture", type=str, default=None, help="Raw capture file (main.py --capture)")
+    parser.add_argument("--protocol", type=str, default="auto", help="Layout to decode with ('auto' detects)")
+    parser.add_argument("--layout", type=str, default="gcs64", choices=protocols.available_layouts(),
+                        help="Wire format of the synthetic capture")
+    parser.add_argument("--chunk", type=int, default=4096, help="Read size of the synthetic capture")
+    parser.add_argument("--corrupt", type=float, default=0.001, help="Fraction of corrupted bytes (synthetic)")
+    parser.add_argument("--repeat", type=int, default=20, help="Copies of the recording (synthetic)")
+    parser.add_argument("--runs", type=int, default=3, help="Replays (best is reported)")
+    parser.add_argument("--json", type=str, default=None, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.capture
+        if path is None:
+            path = os.path.join(tmp, "synthetic.gsraw")
+            make_capture(path, protocols.get_layout(args.layout), args.chunk, args.corrupt, args.repeat)
+        header, records = read_capture(path)
+    nbytes = sum(len(r[3]) for r in records if r[2] == DATA)
+    print(f"{path if args.capture else 'synthetic capture'}: {len(records)} records, {nbytes / 1e6:.2f} MB, "
+          f"{records[-1][0] if records else 0:.1f} s of traffic")
+
+    best = None
+    for _ in range(args.runs):
+        count, elapsed, digest, summary = run(records, args.protocol)
+        if best is not None and digest != best[2]:
+            print("[WARNING] Replays decoded different states: the decoder is not deterministic")
+        best = (count, elapsed, digest, summary) if best is None or elapsed < best[1] else best
+    count, elapsed, digest, summary = best
+    results = {'states': count, 'seconds': elapsed, 'states_per_s': count / elapsed,
+               'mb_per_s': nbytes / elapsed / 1e6, 'digest': digest, 'link': summary}
+    print(f"{count} states in {elapsed:.3f}s: {results['states_per_s']:,.0f} states/s, "
+          f"{results['mb_per_s']:.1f} MB/s")
+    print(f"digest {digest}")
+    print(f"link: {summary}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
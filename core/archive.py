@@ -0,0 +1,280 @@
+import json
+import lzma
+import os
+import struct
+import zlib
+from collections import OrderedDict
+import numpy as np
+
+from core.telemetry_store import TelemetryStore, DroneTrack, FIELD_DTYPES, TIME_DTYPE
+from core.drone_state import STATE_FIELDS
+
+# Compressed recording archive (all little-endian):
+#
+#   preamble   ARCHIVE_MAGIC, format version (u32), header length (u32)
+#   header     UTF-8 JSON: codec, chunk size, per-column encoding, and per
+#              drone the sample count and, for every chunk, its first time
+#              and each column's (offset, length, stored dtype)
+#   data       the compressed column chunks
+#
+# Every column is cut into chunks of CHUNK_SAMPLES. A chunk is quantized
+# (floats with a scale: round(v / scale); floats without one: their bit
+# pattern as int64; ints as they are), delta-encoded (the first value is
+# kept as an int64 prefix, so each chunk decodes on its own), stored in the
+# narrowest integer type that holds the deltas and compressed with zlib or
+# lzma. Reading a sample decompresses only the chunk of that column it is in.
+
+ARCHIVE_MAGIC = b"GSARC\x00\r\n"
+ARCHIVE_VERSION = 1
+PREAMBLE = struct.Struct("<8sII")
+ARCHIVE_EXTENSION = ".gsarc"
+
+CHUNK_SAMPLES = 4096
+# Decoded chunks kept per column (the play head and its neighbour)
+CACHE_CHUNKS = 2
+
+# Quantization step per float field (None = lossless). 1e-7 deg is ~1 cm.
+SCALES = {
+    'lat': 1e-7, 'lon': 1e-7, 'alt': 1e-3,
+    'velocity_north': 1e-3, 'velocity_east': 1e-3, 'velocity_down': 1e-3,
+    'heading': 1e-2,
+}
+# Time is stored in microseconds (the unit of the device timestamp)
+TIME_SCALE = 1e-6
+TIME_COLUMN = "t"
+
+CODECS = {
+    'zlib': (lambda data, level: zlib.compress(data, 6 if level is None else level), zlib.decompress),
+    'lzma': (lambda data, level: lzma.compress(data, preset=6 if level is None else level), lzma.decompress),
+}
+_NARROW = [np.dtype(t) for t in ('<i1', '<i2', '<i4', '<i8')]
+
+
+def is_archive(path):
+    with open(path, 'rb') as f:
+        return f.read(len(ARCHIVE_MAGIC)) == ARCHIVE_MAGIC
+
+
+# --- Column codec ---
+
+def encode_chunk(values, scale, compress):
+    """One column chunk -> (compressed bytes, stored dtype string)."""
+    if scale:
+        q = np.rint(np.asarray(values, dtype=np.float64) / scale).astype(np.int64)
+    elif values.dtype.kind == 'f':
+        q = np.ascontiguousarray(values, dtype='<f8').view(np.int64)
+    else:
+        q = values.astype(np.int64)
+    deltas = q[1:] - q[:-1]   # Wraps around for bit patterns; cumsum undoes it
+    lo, hi = (int(deltas.min()), int(deltas.max())) if len(deltas) else (0, 0)
+    for dtype in _NARROW:
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            break
+    return compress(q[:1].tobytes() + deltas.astype(dtype).tobytes()), dtype.str
+
+
+def decode_chunk(data, stored, scale, dtype, decompress):
+    """Inverse of encode_chunk: the chunk's values as 'dtype'."""
+    raw = decompress(data)
+    deltas = np.frombuffer(raw, dtype=stored, offset=8)
+    q = np.empty(len(deltas) + 1, dtype=np.int64)
+    q[0] = np.frombuffer(raw, dtype=np.int64, count=1)[0]
+    np.cumsum(deltas, dtype=np.int64, out=q[1:])
+    q[1:] += q[0]
+    if scale:
+        return (q * scale).astype(dtype, copy=False)
+    if dtype.kind == 'f':
+        return q.view('<f8').astype(dtype, copy=False)
+    return q.astype(dtype, copy=False)
+
+
+# --- Writer ---
+
+def save_archive(store, path, codec='zlib', level=None, chunk_samples=CHUNK_SAMPLES, lossless=False):
+    """
+    Writes a TelemetryStore as a compressed archive (through a temp file, then
+    renamed). 'lossless' stores floats exactly instead of quantizing them (SCALES).
+    """
+    if codec not in CODECS:
+        raise ValueError(f"Unknown codec '{codec}' (expected one of {sorted(CODECS)})")
+    compress = CODECS[codec][0]
+    scales = {f: None if lossless else SCALES.get(f) for f in STATE_FIELDS}
+    scales[TIME_COLUMN] = TIME_SCALE
+    schema = [[f, FIELD_DTYPES[f].str, scales[f]] for f in STATE_FIELDS]
+
+    blobs = []
+    offset = 0
+    drones = []
+    for track in store:
+        n = len(track)
+        columns = {f: track.column(f) for f in STATE_FIELDS}
+        columns[TIME_COLUMN] = track.time
+        chunks = []
+        for start in range(0, n, chunk_samples):
+            end = min(start + chunk_samples, n)
+            entry = {'t0': track.time[start].item(), 'columns': {}}
+            for name, col in columns.items():
+                blob, stored = encode_chunk(col[start:end], scales[name], lambda b: compress(b, level))
+                entry['columns'][name] = [offset, len(blob), stored]
+                blobs.append(blob)
+                offset += len(blob)
+            chunks.append(entry)
+        drones.append({'id': track.drone_id, 'count': n, 'chunks': chunks})
+
+    header = json.dumps({'codec': codec, 'chunk_samples': chunk_samples, 'fields': schema,
+                         'time': [TIME_DTYPE.str, TIME_SCALE], 'drones': drones}).encode()
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(PREAMBLE.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, path)
+
+
+# --- Reader ---
+
+class ChunkedColumn:
+    """
+    One column of an archived drone, decompressed a chunk at a time.
+    Indexing with an int decodes (and caches) only that sample's chunk;
+    slicing returns an ndarray, so DroneTrack.column() and conversions see a
+    normal array. A slice spanning more chunks than the cache decodes the
+    whole column once and keeps it (e.g. the field a graph plots).
+    """
+
+    def __init__(self, archive, chunks, count, chunk_samples, scale, dtype):
+        self._archive = archive
+        self._chunks = chunks      # [(offset, length, stored dtype), ...]
+        self._count = count
+        self._chunk_samples = chunk_samples
+        self._scale = scale
+        self.dtype = dtype
+        self._cache = OrderedDict()
+        self._full = None
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def nbytes(self):
+        full = self._full.nbytes if self._full is not None else 0
+        return full + sum(a.nbytes for a in self._cache.values())
+
+    def chunk(self, k):
+        cached = self._cache.get(k)
+        if cached is not None:
+            self._cache.move_to_end(k)
+            return cached
+        values = self._decode(k)
+        self._cache[k] = values
+        if len(self._cache) > CACHE_CHUNKS:
+            self._cache.popitem(last=False)
+        return values
+
+    def _decode(self, k):
+        offset, length, stored = self._chunks[k]
+        return self._archive.decode(offset, length, stored, self._scale, self.dtype)
+
+    def __getitem__(self, index):
+        if self._full is not None:
+            return self._full[index]
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._count)
+            if start >= stop:
+                return np.empty(0, dtype=self.dtype)
+            first, last = start // self._chunk_samples, (stop - 1) // self._chunk_samples
+            if last - first >= CACHE_CHUNKS:
+                self._full = np.concatenate([self._decode(k) for k in range(len(self._chunks))])
+                self._cache.clear()
+                return self._full[index]
+            parts = [self.chunk(k) for k in range(first, last + 1)]
+            base = first * self._chunk_samples
+            return np.concatenate(parts)[start - base:stop - base:step]
+        if index < 0:
+            index += self._count
+        k, i = divmod(index, self._chunk_samples)
+        return self.chunk(k)[i]
+
+
+class ArchiveReader:
+    """
+    Random access to an archive: the header is parsed up front and the
+    compressed data memory-mapped; chunks are decompressed on demand.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            preamble = f.read(PREAMBLE.size)
+            if len(preamble) < PREAMBLE.size:
+                raise ValueError(f"{path}: truncated archive header")
+            magic, version, header_len = PREAMBLE.unpack(preamble)
+            if magic != ARCHIVE_MAGIC:
+                raise ValueError(f"{path}: not a recording archive")
+            if version > ARCHIVE_VERSION:
+                raise ValueError(f"{path}: archive format v{version} is newer than this viewer (v{ARCHIVE_VERSION})")
+            self.header = json.loads(f.read(header_len).decode())
+        self.data_start = PREAMBLE.size + header_len
+        self.chunk_samples = self.header['chunk_samples']
+        codec = self.header['codec']
+        if codec not in CODECS:
+            raise ValueError(f"{path}: unknown codec '{codec}'")
+        self._decompress = CODECS[codec][1]
+        self._data = (np.memmap(path, dtype=np.uint8, mode='r')
+                      if os.path.getsize(path) > self.data_start else None)
+        self.fields = {name: (np.dtype(dtype), scale) for name, dtype, scale in self.header['fields']}
+        unknown = set(self.fields) - set(STATE_FIELDS)
+        if unknown:
+            raise ValueError(f"{path}: unknown field(s) {sorted(unknown)}")
+        time_dtype, time_scale = self.header['time']
+        self.fields[TIME_COLUMN] = (np.dtype(time_dtype), time_scale)
+
+    def decode(self, offset, length, stored, scale, dtype):
+        start = self.data_start + offset
+        return decode_chunk(self._data[start:start + length].tobytes(), np.dtype(stored), scale, dtype,
+                            self._decompress)
+
+    def read(self, entry, name, start, stop):
+        """
+        Samples [start, stop) of field 'name' for one 'drones' entry, decoding
+        only the chunks they are in (nothing is cached).
+        """
+        dtype, scale = self.fields[name]
+        if start >= stop:
+            return np.empty(0, dtype=dtype)
+        first, last = start // self.chunk_samples, (stop - 1) // self.chunk_samples
+        parts = [self.decode(*entry['chunks'][k]['columns'][name], scale, dtype) for k in range(first, last + 1)]
+        base = first * self.chunk_samples
+        return np.concatenate(parts)[start - base:stop - base]
+
+    def column(self, entry, name):
+        """ChunkedColumn of field 'name' for one 'drones' entry of the header."""
+        dtype, scale = self.fields[name]
+        chunks = [tuple(c['columns'][name]) for c in entry['chunks']]
+        return ChunkedColumn(self, chunks, entry['count'], self.chunk_samples, scale, dtype)
+
+    def load(self):
+        """
+        A TelemetryStore over the archive. Time columns are decoded now (the
+        time index needs them); every other column decodes chunk by chunk.
+        """
+        store = TelemetryStore()
+        for entry in self.header['drones']:
+            n = entry['count']
+            columns = {}
+            for f in STATE_FIELDS:
+                if f in self.fields:
+                    columns[f] = self.column(entry, f)
+                else:
+                    # Field added after the file was written
+                    columns[f] = np.zeros(n, dtype=FIELD_DTYPES[f])
+            time = self.column(entry, TIME_COLUMN)[:n]
+            time.flags.writeable = False
+            store.add_track(DroneTrack.from_columns(entry['id'], columns, time))
+        return store
+
+
+def load_archive(path):
+    return ArchiveReader(path).load()
@@ -0,0 +1,284 @@
+import math
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from core import recording_file
+from core.flight_summary import SUMMARY_FIELDS, GPS_LOSS, LINK_GAP, summarize_store, track_events
+from core.geo_math import EARTH_RADIUS_M, haversine_m
+
+# Metadata of every recording in the library, kept in one SQLite file:
+#
+#   files   one row per recording: mtime and size when it was indexed, format,
+#           drone and sample counts, time range, bounding box, event counts
+#           (or the error that kept it from loading)
+#   drones  the flight summary of every drone in it (core/flight_summary.py)
+#   events  every GPS loss and link gap: drone, kind, start, duration, position
+#
+# Files are only parsed when their mtime or size differ from the indexed ones,
+# so rescanning a library that hasn't changed costs one stat() per file.
+# The catalog is a cache: a database from another schema version is rebuilt.
+
+SCHEMA_VERSION = 1
+CATALOG_NAME = "catalog.sqlite"
+EVENT_KINDS = (GPS_LOSS, LINK_GAP)
+
+DRONE_COLUMNS = [f for f in SUMMARY_FIELDS if f != "file"]
+_INTEGER = {"drone_id", "samples", "timed", "battery_start", "battery_end", "battery_drain",
+            "gps_losses", "link_gaps"}
+
+_SCHEMA = f"""
+CREATE TABLE files (
+    path TEXT PRIMARY KEY, mtime REAL NOT NULL, size INTEGER NOT NULL, format TEXT,
+    drones INTEGER, samples INTEGER, t_start REAL, t_end REAL,
+    min_lat REAL, max_lat REAL, min_lon REAL, max_lon REAL,
+    gps_losses INTEGER, link_gaps INTEGER, error TEXT, indexed_at REAL
+);
+CREATE TABLE drones (
+    path TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    {", ".join(f"{c} {'INTEGER' if c in _INTEGER else 'REAL'}" for c in DRONE_COLUMNS)},
+    PRIMARY KEY (path, drone_id)
+);
+CREATE INDEX drones_by_id ON drones (drone_id);
+CREATE TABLE events (
+    path TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    drone_id INTEGER NOT NULL, kind TEXT NOT NULL, t REAL, duration_s REAL, lat REAL, lon REAL
+);
+CREATE INDEX events_by_drone ON events (path, drone_id, kind);
+CREATE INDEX events_by_position ON events (kind, lat, lon);
+"""
+
+
+def index_file(path, sample_period=None):
+    """Parses one recording into catalog rows (runs in the indexing processes)."""
+    store = recording_file.load_recording(path)
+    events = []
+    for track in store:
+        events += [{"drone_id": track.drone_id, **e} for e in track_events(track, sample_period)]
+    return {"format": recording_file.recording_format(path),
+            "drones": summarize_store(store, source=path, sample_period=sample_period),
+            "events": events}
+
+
+def _distance_m(lat1, lon1, lat2, lon2):
+    if None in (lat1, lon1, lat2, lon2):
+        return None
+    return float(haversine_m(lat1, lon1, lat2, lon2))
+
+
+def _radius_box(lat, lon, radius_m):
+    """(min_lat, max_lat, min_lon, max_lon) around a point, for the index; distances are checked exactly after."""
+    dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+    dlon = dlat / max(math.cos(math.radians(lat)), 1e-6)
+    return lat - dlat, lat + dlat, lon - dlon, lon + dlon
+
+
+class Catalog:
+    """
+    Index of the recordings under some directories. One connection per
+    thread: the UI opens its own to query while a rescan writes through another.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=30.0)
+        self.db.row_factory = sqlite3.Row
+        self.db.create_function("distance_m", 4, _distance_m, deterministic=True)
+        self.db.execute("PRAGMA journal_mode=WAL")   # Readers don't wait for a rescan
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("PRAGMA foreign_keys=ON")
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self._create()
+
+    def _create(self):
+        with self.db:
+            for table in ("events", "drones", "files"):
+                self.db.execute(f"DROP TABLE IF EXISTS {table}")
+            self.db.executescript(_SCHEMA)
+            self.db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Indexing ---
+
+    def update(self, paths, jobs=None, prune=True, progress=None):
+        """
+        Indexes the recordings in 'paths' (files and directories) that are new
+        or whose mtime/size changed, across 'jobs' processes (1 = in this
+        thread). 'prune' drops entries of files that no longer exist.
+        progress(done, total, path) is called after each file.
+        Returns {'indexed', 'unchanged', 'failed', 'removed'} counts.
+        """
+        found = {}
+        for path in recording_file.find_recordings(paths):
+            st = os.stat(path)
+            found[os.path.abspath(path)] = (st.st_mtime, st.st_size)
+        known = {row["path"]: (row["mtime"], row["size"])
+                 for row in self.db.execute("SELECT path, mtime, size FROM files")}
+        stale = [path for path, stat in found.items() if known.get(path) != stat]
+        counts = {"indexed": 0, "unchanged": len(found) - len(stale), "failed": 0, "removed": 0}
+
+        if prune:
+            gone = [path for path in known if path not in found and not os.path.exists(path)]
+            with self.db:
+                self.db.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in gone])
+            counts["removed"] = len(gone)
+
+        def store(done, path, result, error):
+            self._store(path, found[path], result, error)
+            counts["failed" if error else "indexed"] += 1
+            if error:
+                print(f"[WARNING] {path}: not indexed ({error})", file=sys.stderr)
+            if progress:
+                progress(done, len(stale), path)
+
+        if jobs == 1 or len(stale) < 2:
+            for done, path in enumerate(stale, 1):
+                try:
+                    result, error = index_file(path), None
+                except Exception as e:
+                    result, error = None, str(e) or type(e).__name__
+                store(done, path, result, error)
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                futures = {pool.submit(index_file, path): path for path in stale}
+                for done, future in enumerate(as_completed(futures), 1):
+                    try:
+                        result, error = future.result(), None
+                    except Exception as e:
+                        result, error = None, str(e) or type(e).__name__
+                    store(done, futures[future], result, error)
+        return counts
+
+    def _store(self, path, stat, result, error):
+        """Replaces the rows of one file (a broken file is kept with its error, so it isn't retried until it changes)."""
+        drones = result["drones"] if result else []
+        events = result["events"] if result else []
+        row = {"path": path, "mtime": stat[0], "size": stat[1], "format": result and result["format"],
+               "drones": len(drones), "samples": sum(d["samples"] for d in drones),
+               "gps_losses": sum(d["gps_losses"] for d in drones), "link_gaps": sum(d["link_gaps"] for d in drones),
+               "error": error, "indexed_at": time.time()}
+        for key, agg, source in (("t_start", min, "start_s"), ("min_lat", min, "min_lat"), ("max_lat", max, "max_lat"),
+                                 ("min_lon", min, "min_lon"), ("max_lon", max, "max_lon")):
+            values = [d[source] for d in drones if d.get(source) is not None]
+            row[key] = agg(values) if values else None
+        ends = [d["start_s"] + d["duration_s"] for d in drones]
+        row["t_end"] = max(ends) if ends else None
+
+        with self.db:
+            self.db.execute("DELETE FROM files WHERE path = ?", (path,))
+            self.db.execute(f"INSERT INTO files ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                            list(row.values()))
+            self.db.executemany(
+                f"INSERT INTO drones (path, {', '.join(DRONE_COLUMNS)}) "
+                f"VALUES (?{', ?' * len(DRONE_COLUMNS)})",
+                [[path] + [d.get(c) for c in DRONE_COLUMNS] for d in drones])
+            self.db.executemany(
+                "INSERT INTO events (path, drone_id, kind, t, duration_s, lat, lon) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(path, e["drone_id"], e["kind"], e["t"], e["duration_s"], e["lat"], e["lon"]) for e in events])
+
+    # --- Queries ---
+
+    def find(self, drone_id=None, event=None, near=None, radius_m=None, t0=None, t1=None, under=None):
+        """
+        Drones (one row per recording and drone: 'file' plus the summary
+        fields and 'events') matching every filter given:
+          drone_id      that drone
+          event         had at least one event of this kind (EVENT_KINDS);
+                        'events' counts them
+          near, radius  (lat, lon) and metres: the event happened that close,
+                        or without 'event', the flight's bounding box comes that close
+          t0, t1        the flight (or event) overlaps [t0, t1] seconds of recording time
+          under         the file is under this directory
+        """
+        if event is not None and event not in EVENT_KINDS:
+            raise ValueError(f"Unknown event kind '{event}' (expected one of {list(EVENT_KINDS)})")
+        where, params = [], []
+        if drone_id is not None:
+            where.append("d.drone_id = ?")
+            params.append(int(drone_id))
+        if under:
+            prefix = os.path.join(os.path.abspath(under), "")
+            where.append("substr(d.path, 1, ?) = ?")
+            params += [len(prefix), prefix]
+        if near is not None and radius_m is None:
+            raise ValueError("'near' needs a radius")
+
+        if event is None:
+            if t0 is not None:
+                where.append("d.start_s + d.duration_s >= ?")
+                params.append(t0)
+            if t1 is not None:
+                where.append("d.start_s <= ?")
+                params.append(t1)
+            if near is not None:
+                # Distance from the point to the nearest point of the bounding box
+                lat, lon = near
+                where.append("d.min_lat IS NOT NULL AND distance_m(?, ?, MIN(MAX(?, d.min_lat), d.max_lat), "
+                             "MIN(MAX(?, d.min_lon), d.max_lon)) <= ?")
+                params += [lat, lon, lat, lon, radius_m]
+            sql = (f"SELECT d.path AS file, {', '.join('d.' + c for c in DRONE_COLUMNS)}, "
+                   f"d.gps_losses + d.link_gaps AS events FROM drones d")
+        else:
+            conditions = ["e.path = d.path", "e.drone_id = d.drone_id", "e.kind = ?"]
+            join_params = [event]
+            if t0 is not None:
+                conditions.append("e.t + e.duration_s >= ?")
+                join_params.append(t0)
+            if t1 is not None:
+                conditions.append("e.t <= ?")
+                join_params.append(t1)
+            if near is not None:
+                lat, lon = near
+                min_lat, max_lat, min_lon, max_lon = _radius_box(lat, lon, radius_m)
+                conditions += ["e.lat BETWEEN ? AND ?", "e.lon BETWEEN ? AND ?", "distance_m(?, ?, e.lat, e.lon) <= ?"]
+                join_params += [min_lat, max_lat, min_lon, max_lon, lat, lon, radius_m]
+            sql = (f"SELECT d.path AS file, {', '.join('d.' + c for c in DRONE_COLUMNS)}, COUNT(*) AS events "
+                   f"FROM drones d JOIN events e ON {' AND '.join(conditions)}")
+            params = join_params + params
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if event is not None:
+            sql += " GROUP BY d.path, d.drone_id"
+        sql += " ORDER BY d.path, d.drone_id"
+        return [self._summary(row) for row in self.db.execute(sql, params)]
+
+    def summaries(self, paths):
+        """Summary rows (SUMMARY_FIELDS) of the given recordings, in path order."""
+        rows = []
+        for path in sorted(os.path.abspath(p) for p in paths):
+            rows += [self._summary(row) for row in self.db.execute(
+                f"SELECT path AS file, {', '.join(DRONE_COLUMNS)} FROM drones WHERE path = ? ORDER BY drone_id",
+                (path,))]
+        return rows
+
+    def events(self, path, drone_id=None, kind=None):
+        """Events of one recording (optionally one drone / kind), in time order."""
+        sql, params = "SELECT drone_id, kind, t, duration_s, lat, lon FROM events WHERE path = ?", [os.path.abspath(path)]
+        if drone_id is not None:
+            sql += " AND drone_id = ?"
+            params.append(int(drone_id))
+        if kind is not None:
+            sql += " AND kind = ?"
+            params.append(kind)
+        return [dict(row) for row in self.db.execute(sql + " ORDER BY t", params)]
+
+    def files(self):
+        """One dict per indexed file (including the ones that failed, with 'error' set)."""
+        return [dict(row) for row in self.db.execute("SELECT * FROM files ORDER BY path")]
+
+    @staticmethod
+    def _summary(row):
+        row = dict(row)
+        row["timed"] = bool(row["timed"])
+        return row
@@ -1,4 +1,5 @@
 import argparse
+import os
 
 # --- Constants ---
 # Margins: (Left, Top, Right, Bottom)
@@ -11,11 +12,72 @@ def parse_args():
     
     # --- Data Source Config ---
     parser.add_argument("-s", "--source", type=str, default="none", 
-                        choices=["file", "stream", "none"],
-                        help="Data source: 'file', 'stream', or 'none'")
+                        choices=["file", "stream", "replay", "none"],
+                        help="Data source: 'file', 'stream', 'replay' (a --capture file) or 'none'")
     
     parser.add_argument("-p", "--path", type=str, 
-                        help="Path to JSON file (if source=file) or Stream Address (if source=stream)")
+                        help="Path to a recording, .gsrec or .json (if source=file), Stream Address (if source=stream) "
+                             "or raw capture (if source=replay). "
+                             "Streams may list several sources separated by commas, including "
+                             "udp://host:port, tcp://host:port and tcp-listen://host:port")
+
+    # --- Live Ingest Params ---
+    parser.add_argument("--protocol", type=str, default="auto",
+                        choices=["auto", "gcs64", "drone_self_state"],
+                        help="Wire format of the stream ('auto' detects it from the first bytes)")
+    parser.add_argument("--native_lib", type=str, default=None,
+                        help="Path to libgs_serial_reader.so (make -C gs_serial) to decode in C; "
+                             "falls back to pure Python if missing")
+    parser.add_argument("--queue_size", type=int, default=10000,
+                        help="Max decoded states buffered between the reader thread and the UI")
+    parser.add_argument("--queue_policy", type=str, default="drop_oldest",
+                        choices=["drop_oldest", "block"],
+                        help="What the reader does when the ingest queue is full")
+
+    parser.add_argument("--ingest", type=str, default="auto",
+                        choices=["auto", "thread", "asyncio", "process"],
+                        help="Live reader: one thread per device, one asyncio loop for any number of "
+                             "serial/FIFO/UDP/TCP sources, or that loop in a separate decoder process "
+                             "('auto': asyncio for several or network sources)")
+    parser.add_argument("--shm_capacity", type=int, default=65536,
+                        help="Records in the shared-memory ring between the decoder process and the UI "
+                             "(--ingest process)")
+    parser.add_argument("--reorder_window", type=float, default=0.05,
+                        help="Seconds states are held to merge sources in per-drone time order (asyncio ingest)")
+    parser.add_argument("--read_size", type=int, default=16384,
+                        help="Max bytes per read from the stream")
+    parser.add_argument("--baudrate", type=int, default=115200, help="Serial port baud rate")
+    parser.add_argument("--low_latency", action="store_true",
+                        help="Put the serial port in low-latency mode (Linux ASYNC_LOW_LATENCY, e.g. FTDI)")
+    parser.add_argument("--no_reconnect", action="store_true",
+                        help="Stop on EOF/disconnect instead of reopening the device with backoff")
+
+    parser.add_argument("--capture", type=str, default=None,
+                        help="Log the raw bytes of every live source, with receive times, to this file "
+                             "(replay it with -s replay; disables the native decoder)")
+    parser.add_argument("--replay_speed", type=float, default=1.0,
+                        help="Replay speed for -s replay: 1 = original timing, N = N times faster, "
+                             "0 = as fast as possible")
+    parser.add_argument("--latency_log", type=str, default=None,
+                        help="Rolling log file for per-drone latency/jitter summaries (live mode)")
+    parser.add_argument("--record_dir", type=str, default="recordings",
+                        help="Where live recordings are written while recording (interrupted ones "
+                             "are recovered from here at startup)")
+    parser.add_argument("--history_minutes", type=float, default=10.0,
+                        help="Live mode: minutes of history kept at full resolution per drone; older "
+                             "samples go to the --history_tiers (0 = keep every sample)")
+    parser.add_argument("--history_tiers", type=str, default="1:60,10:1440",
+                        help="Decimated live history beyond --history_minutes: comma-separated "
+                             "BUCKET_SECONDS:KEEP_MINUTES tiers of per-bucket min/max/mean, finest first "
+                             "('' = drop older samples)")
+    parser.add_argument("--playback_speed", type=float, default=1.0,
+                        help="Initial playback speed of recordings, x real time (0.1 - 64)")
+    parser.add_argument("--catalog", type=str, default=None,
+                        help="Catalog database the Load dialog searches (default: catalog.sqlite in "
+                             "--record_dir; '' = plain file dialog)")
+    parser.add_argument("--library", type=str, default=None,
+                        help="Comma-separated directories of recordings indexed into the catalog "
+                             "(default: --record_dir)")
 
     # --- Simulation Params ---
     parser.add_argument("--num_drones", type=int, default=4, help="Number of drones to simulate")
@@ -29,9 +91,29 @@ def parse_args():
 
     args = parser.parse_args()
 
-    if args.source in ["file", "stream"] and not args.path:
+    if args.source in ["file", "stream", "replay"] and not args.path:
         parser.error(f"argument --source {args.source} requires --path (-p) to be specified.")
 
+    try:
+        args.history_tiers = [(float(bucket), float(minutes) * 60.0) for bucket, minutes in
+                              (tier.split(":") for tier in args.history_tiers.split(",") if tier.strip())]
+    except ValueError:
+        parser.error(f"argument --history_tiers: expected BUCKET_SECONDS:KEEP_MINUTES[,...], "
+                     f"got '{args.history_tiers}'")
+    if any(bucket <= 0 or keep <= 0 for bucket, keep in args.history_tiers):
+        parser.error("argument --history_tiers: bucket and minutes must be positive")
+
+    if not 0.1 <= args.playback_speed <= 64:
+        parser.error(f"argument --playback_speed: expected 0.1 - 64, got {args.playback_speed:g}")
+
+    if args.catalog is None:
+        args.catalog = os.path.join(args.record_dir, "catalog.sqlite")
+    args.library = [d.strip() for d in (args.library or args.record_dir).split(",") if d.strip()]
+
+    if args.ingest == "auto":
+        multi = args.source == "stream" and ("," in args.path or "://" in args.path)
+        args.ingest = "asyncio" if multi else "thread"
+
     return args
 
 def calculate_bounds(args):
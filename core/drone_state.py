@@ -1,8 +1,38 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, fields, field, make_dataclass, MISSING
+from operator import attrgetter
 import random
 
-@dataclass
-class DroneSelfState:
+
+class _StateMethods:
+    """Constructors and converters shared by DroneSelfState and FrozenDroneSelfState."""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_tuple(cls, values):
+        """From a tuple in field order (e.g. the decoder's unpacked values)."""
+        return cls(*values)
+
+    @classmethod
+    def from_row(cls, columns, index):
+        """From one row of columnar data: 'columns' maps field name -> NumPy array."""
+        return cls(*[columns[f][index].item() for f in STATE_FIELDS])
+
+    @classmethod
+    def from_dict(cls, values):
+        return cls(**values)
+
+    def to_tuple(self):
+        """Field values in declaration order (no copies, unlike dataclasses.astuple)."""
+        return _get_fields(self)
+
+    def to_dict(self):
+        """Field name -> value (no deep copy, unlike dataclasses.asdict)."""
+        return dict(zip(STATE_FIELDS, _get_fields(self)))
+
+
+@dataclass(slots=True)
+class DroneSelfState(_StateMethods):
     # Mimicking the C struct fields
     id: int
     lat: float
@@ -16,11 +46,12 @@ class DroneSelfState:
     battery_precentages: int
     drones_keep_alive: int  # 4 bits (represented as int)
     gps_3d_fix: int         # 1 bit (represented as int)
+    timestamp: int = 0      # Device clock from the packet (microseconds), 0 if unknown
 
     @staticmethod
     def create_from_viz_data(id_num, lat, lon, heading):
         """
-        Factory method to create a struct from basic viz data, 
+        Factory method to create a struct from basic viz data,
         filling the rest with 'recorded' garbage/random data.
         """
         return DroneSelfState(
@@ -37,4 +68,20 @@ class DroneSelfState:
             battery_precentages=random.randint(20, 100),
             drones_keep_alive=15, # 1111 in binary
             gps_3d_fix=1
-        )
\ No newline at end of file
+        )
+
+
+STATE_FIELDS = tuple(f.name for f in fields(DroneSelfState))
+_get_fields = attrgetter(*STATE_FIELDS)
+
+# Seconds per unit of DroneSelfState.timestamp (microseconds)
+DEVICE_TIME_UNIT = 1e-6
+
+# Immutable (and hashable) variant with the same fields, for samples that are shared
+# between components and must not be edited in place
+FrozenDroneSelfState = make_dataclass(
+    "FrozenDroneSelfState",
+    [(f.name, f.type) if f.default is MISSING else (f.name, f.type, field(default=f.default))
+     for f in fields(DroneSelfState)],
+    bases=(_StateMethods,), frozen=True, slots=True)
+FrozenDroneSelfState.__module__ = __name__  # For pickling
@@ -0,0 +1,121 @@
+import numpy as np
+
+from core.geo_math import haversine_m
+from core.link_stats import GAP_FACTOR
+
+# Columns of a summary row, in CSV order
+SUMMARY_FIELDS = [
+    "file", "drone_id", "samples", "timed", "start_s", "duration_s", "distance_m", "max_speed_mps",
+    "battery_start", "battery_end", "battery_drain", "gps_losses", "gps_loss_s", "link_gaps", "link_loss_s",
+    "min_lat", "max_lat", "min_lon", "max_lon",
+]
+# Event kinds reported by track_events()
+GPS_LOSS = "gps_loss"
+LINK_GAP = "link_gap"
+
+
+def _times(track, sample_period):
+    """(sample times, whether they come from device timestamps)."""
+    timed = bool(len(track) and np.any(track.column('timestamp')))
+    if not timed and sample_period:
+        return np.arange(len(track)) * float(sample_period), timed
+    return track.time, timed
+
+
+def _gaps(dt):
+    """(mask of the intervals that are link gaps, usual interval)."""
+    positive = dt[dt > 0]
+    interval = float(np.median(positive)) if len(positive) else 0.0
+    gaps = dt > GAP_FACTOR * interval if interval else np.zeros(len(dt), dtype=bool)
+    return gaps, interval
+
+
+def _fix_losses(fix):
+    """(first sample, first sample with a fix again or len) of every run without a 3D fix."""
+    edges = np.diff(np.r_[1, fix.astype(np.int8), 1])
+    return np.flatnonzero(edges == -1), np.flatnonzero(edges == 1)
+
+
+def summarize_track(track, sample_period=None):
+    """
+    Flight summary of one DroneTrack, computed on whole columns:
+      duration_s     first to last sample
+      distance_m     great-circle length of the path between samples that both have a 3D fix
+      max_speed_mps  highest horizontal speed reported (velocity_north/east)
+      battery_*      first and last battery percentage, and the difference
+      gps_losses     number of times the 3D fix was lost (or missing at the start)
+      gps_loss_s     time spent after samples without a 3D fix, until the next sample
+      link_gaps      intervals longer than GAP_FACTOR x the usual one (core/link_stats.py)
+      link_loss_s    time missing in those gaps beyond the usual interval
+      min/max_lat/lon  bounding box of the samples with a fix (None without any)
+    Recordings without device timestamps are timed by sample index, or by
+    'sample_period' seconds per sample if given ('timed' is False for them).
+    """
+    n = len(track)
+    t, timed = _times(track, sample_period)
+    row = {"drone_id": track.drone_id, "samples": n, "timed": timed}
+    if n == 0:
+        return row
+
+    dt = np.diff(t)
+    fix = track.column('gps_3d_fix') != 0
+    lat, lon = track.column('lat'), track.column('lon')
+    both_fixed = fix[:-1] & fix[1:]
+    steps = haversine_m(lat[:-1], lon[:-1], lat[1:], lon[1:])
+    battery = track.column('battery_precentages')
+    gaps, interval = _gaps(dt)
+
+    row.update({
+        "start_s": float(t[0]),
+        "duration_s": float(t[-1] - t[0]),
+        "distance_m": float(steps[both_fixed].sum()),
+        "max_speed_mps": float(np.hypot(track.column('velocity_north'), track.column('velocity_east')).max()),
+        "battery_start": int(battery[0]),
+        "battery_end": int(battery[-1]),
+        "battery_drain": int(battery[0]) - int(battery[-1]),
+        "gps_losses": len(_fix_losses(fix)[0]),
+        "gps_loss_s": float(dt[~fix[:-1]].sum()),
+        "link_gaps": int(gaps.sum()),
+        "link_loss_s": float((dt[gaps] - interval).sum()),
+    })
+    if fix.any():
+        row.update({"min_lat": float(lat[fix].min()), "max_lat": float(lat[fix].max()),
+                    "min_lon": float(lon[fix].min()), "max_lon": float(lon[fix].max())})
+    return row
+
+
+def track_events(track, sample_period=None):
+    """
+    GPS losses and link gaps of one DroneTrack as dicts of kind, t (start),
+    duration_s and lat/lon: the last fixed position before a GPS loss (None if
+    the track starts without a fix), the position before a link gap.
+    """
+    n = len(track)
+    if n < 2:
+        return []
+    t, _ = _times(track, sample_period)
+    lat, lon = track.column('lat'), track.column('lon')
+    events = []
+
+    starts, ends = _fix_losses(track.column('gps_3d_fix') != 0)
+    for start, end in zip(starts, ends):
+        where = (float(lat[start - 1]), float(lon[start - 1])) if start else (None, None)
+        events.append({"kind": GPS_LOSS, "t": float(t[start]),
+                       "duration_s": float(t[min(end, n - 1)] - t[start]), "lat": where[0], "lon": where[1]})
+
+    dt = np.diff(t)
+    gaps, interval = _gaps(dt)
+    for i in np.flatnonzero(gaps):
+        events.append({"kind": LINK_GAP, "t": float(t[i]), "duration_s": float(dt[i] - interval),
+                       "lat": float(lat[i]), "lon": float(lon[i])})
+    events.sort(key=lambda e: e["t"])
+    return events
+
+
+def summarize_store(store, source=None, sample_period=None):
+    """Summary rows (SUMMARY_FIELDS) for every drone with samples in a TelemetryStore."""
+    rows = []
+    for track in store:
+        if len(track):
+            rows.append({"file": source, **summarize_track(track, sample_period)})
+    return rows
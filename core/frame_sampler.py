@@ -0,0 +1,120 @@
+import numpy as np
+
+# Interpolated position of every drone at one time, in a few NumPy calls
+# instead of a Python loop over drones:
+#
+#   sampler = FrameSampler()
+#   frame = sampler.sample(store, t)
+#   frame.ids, frame.lat, frame.lon, frame.heading, frame.vn, frame.ve   -> one entry per drone
+#
+# The tracks' columns are separate arrays, so a window of WINDOW_S seconds on
+# either side of 't' is copied into one array per field (drone after drone)
+# and reused while the play head stays inside it. The samples around 't' of
+# every drone are then found by a single searchsorted: each drone's times are
+# offset by its position in the window (drone k's start at k * stride), so the
+# window is sorted as a whole.
+#
+# The window is a copy: call invalidate() after samples are appended to or
+# dropped from the store (a different store is noticed on its own).
+
+# Seconds of recording on either side of the play head copied per window
+WINDOW_S = 10.0
+FRAME_FIELDS = ('lat', 'lon', 'heading', 'velocity_north', 'velocity_east')
+
+
+class Frame:
+    """
+    Every drone with samples at one time, in id order: 'ids', the sample at or
+    before the time of each drone ('index', for track[index]) and the
+    interpolated lat, lon, heading (degrees, wrap-aware), vn and ve.
+    """
+
+    __slots__ = ("ids", "index", "lat", "lon", "heading", "vn", "ve")
+
+    def __init__(self, ids, index, lat, lon, heading, vn, ve):
+        self.ids = ids
+        self.index = index
+        self.lat = lat
+        self.lon = lon
+        self.heading = heading
+        self.vn = vn
+        self.ve = ve
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class FrameSampler:
+    """Interpolates every drone of a TelemetryStore at a time, in one NumPy pass."""
+
+    def __init__(self, window=WINDOW_S):
+        self.window = window
+        self._store = None
+        self._span = None
+
+    def invalidate(self):
+        """The store changed: rebuild the window on the next sample()."""
+        self._span = None
+
+    def _build(self, store, t):
+        t0, t1 = t - self.window, t + self.window
+        ids, base, times, cols = [], [], [], {f: [] for f in FRAME_FIELDS}
+        for track in store:
+            time = track.time
+            if not len(time):
+                continue
+            # From the last sample at or before t0 to the first one after t1
+            start = max(int(time.searchsorted(t0, side='right')) - 1, 0)
+            stop = min(int(time.searchsorted(t1, side='right')) + 1, len(time))
+            ids.append(track.drone_id)
+            base.append(start)
+            times.append(time[start:stop])
+            for f in FRAME_FIELDS:
+                cols[f].append(track.column_range(f, start, stop))
+
+        counts = np.array([len(x) for x in times], dtype=np.int64)
+        self._ids = np.array(ids, dtype=np.int64)
+        self._ends = np.cumsum(counts)
+        self._starts = self._ends - counts
+        # Track index of the window's sample k: k + _base[drone]
+        self._base = np.array(base, dtype=np.int64) - self._starts
+        self._time = np.concatenate(times) if times else np.empty(0)
+        self._cols = {f: np.concatenate(c) if c else np.empty(0) for f, c in cols.items()}
+        if len(counts):
+            self._first = self._time[self._starts]
+            self._extent = self._time[self._ends - 1] - self._first
+            self._offset = np.arange(len(counts)) * (self._extent.max() + 1.0)
+            self._keys = (self._time - np.repeat(self._first, counts)) + np.repeat(self._offset, counts)
+        self._store = store
+        self._span = (t0, t1)
+
+    def sample(self, store, t):
+        """The Frame of 'store' at time 't'. Before its first / after its last sample a drone stays there."""
+        if store is not self._store or self._span is None or not self._span[0] <= t <= self._span[1]:
+            self._build(store, t)
+        if not len(self._ids):
+            empty = np.empty(0)
+            return Frame(self._ids, self._ids, empty, empty, empty, empty, empty)
+
+        # Last sample at or before t of every drone (the first one if t is earlier)
+        rel = np.minimum(np.maximum(t - self._first, 0.0), self._extent)
+        i = np.searchsorted(self._keys, rel + self._offset, side='right') - 1
+        i = np.where(t < self._first, self._starts, i)
+        j = np.minimum(i + 1, self._ends - 1)
+
+        time = self._time
+        t_i, t_j = time[i], time[j]
+        dt = t_j - t_i
+        moving = (dt > 0) & (t > t_i)
+        alpha = np.where(moving, np.minimum((t - t_i) / np.where(moving, dt, 1.0), 1.0), 0.0)
+
+        cols = self._cols
+        values = {}
+        for f in ('lat', 'lon', 'velocity_north', 'velocity_east'):
+            a = cols[f][i]
+            values[f] = a + (cols[f][j] - a) * alpha
+        h = cols['heading'][i]
+        heading = (h + ((cols['heading'][j] - h + 180) % 360 - 180) * alpha) % 360
+
+        return Frame(self._ids, i + self._base, values['lat'], values['lon'], heading,
+                     values['velocity_north'], values['velocity_east'])
@@ -1,4 +1,8 @@
 import math
+import numpy as np
+
+EARTH_RADIUS_M = 6371008.8  # Mean Earth radius
+
 
 def lat_lon_to_screen(lat, lon, bounds, screen_dims, padding):
     """
@@ -27,6 +31,28 @@ def lat_lon_to_screen(lat, lon, bounds, screen_dims, padding):
 
     return screen_x, screen_y
 
+
+def lat_lon_array_to_screen(lat, lon, bounds, screen_dims, padding):
+    """
+    lat_lon_to_screen for NumPy arrays of points (e.g. every drone of a frame).
+    Returns two arrays: screen X and screen Y.
+    """
+    min_lat, max_lat, min_lon, max_lon = bounds
+    w, h = screen_dims
+    pad_l, pad_t, pad_r, pad_b = padding
+
+    draw_w = w - pad_l - pad_r
+    draw_h = h - pad_t - pad_b
+
+    if max_lon == min_lon or max_lat == min_lat:
+        x_pct = y_pct = np.full(np.shape(lat), 0.5)
+    else:
+        x_pct = (np.asarray(lon) - min_lon) / (max_lon - min_lon)
+        y_pct = (np.asarray(lat) - min_lat) / (max_lat - min_lat)
+
+    return pad_l + x_pct * draw_w, (h - pad_b) - y_pct * draw_h
+
+
 def calculate_drone_polygon(center_x, center_y, heading_deg, size):
     """
     Returns coordinate pairs for the 4 drone legs based on heading.
@@ -51,4 +77,14 @@ def calculate_drone_polygon(center_x, center_y, heading_deg, size):
         py = center_y - r * math.cos(rad)
         points[key] = (px, py)
         
-    return points
\ No newline at end of file
+    return points
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance in meters between points given in degrees.
+    Works element-wise on NumPy arrays (e.g. consecutive samples of a track).
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(v) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
@@ -0,0 +1,171 @@
+import numpy as np
+
+from core.drone_state import STATE_FIELDS
+from core.telemetry_store import TIME_DTYPE
+
+# Live history retention: every sample of the last FULL_RESOLUTION seconds,
+# then (bucket seconds, seconds kept) tiers of per-bucket min/max/mean,
+# finest first. What falls out of the last tier is dropped.
+FULL_RESOLUTION = 600.0
+DEFAULT_TIERS = ((1.0, 3600.0), (10.0, 24 * 3600.0))
+
+# Expired rows are only moved once there are this many (or 1/8 of the
+# track), so shifting the kept rows down costs O(1) per sample amortized
+COMPACT_MIN_ROWS = 256
+
+FIELD_INDEX = {f: i for i, f in enumerate(STATE_FIELDS)}
+STATS = ("min", "max", "mean")
+
+
+def _expired_count(times, cutoff):
+    """Rows older than 'cutoff' worth moving now (0 if too few yet)."""
+    count = int(np.searchsorted(times, cutoff, side='left'))
+    return count if count >= max(COMPACT_MIN_ROWS, len(times) // 8) else 0
+
+
+class DecimatedTier:
+    """
+    min/max/mean of every field per 'bucket' seconds of one drone, kept for
+    'retention' seconds behind its newest bucket. A bucket's time is the mean
+    time of its samples, so tiers and the full-resolution track stay in order.
+    """
+
+    def __init__(self, bucket, retention, capacity=COMPACT_MIN_ROWS):
+        self.bucket = bucket
+        self.retention = retention
+        self._n = 0
+        width = len(STATE_FIELDS)
+        self._time = np.empty(capacity, dtype=TIME_DTYPE)
+        self._count = np.empty(capacity, dtype=np.int64)
+        self._stats = {s: np.empty((capacity, width)) for s in STATS}
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def nbytes(self):
+        return self._time.nbytes + self._count.nbytes + sum(a.nbytes for a in self._stats.values())
+
+    def _grow(self, needed):
+        capacity = max(len(self._time) * 2, needed)
+        n = self._n
+        for name in ("_time", "_count"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:n] = old[:n]
+            setattr(self, name, new)
+        for s, old in self._stats.items():
+            new = np.empty((capacity, old.shape[1]))
+            new[:n] = old[:n]
+            self._stats[s] = new
+
+    def add(self, time, count, mins, maxs, means):
+        """
+        Merges rows in time order: 'count' samples each, with their mean 'time'
+        and (rows x STATE_FIELDS) min/max/mean arrays.
+        """
+        if not len(time):
+            return
+        keys = np.floor(time / self.bucket)
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        counts = np.add.reduceat(count, starts)
+        time = np.add.reduceat(time * count, starts) / counts
+        mins = np.minimum.reduceat(mins, starts, axis=0)
+        maxs = np.maximum.reduceat(maxs, starts, axis=0)
+        means = np.add.reduceat(means * count[:, None], starts, axis=0) / counts[:, None]
+
+        n = self._n
+        if n and np.floor(self._time[n - 1] / self.bucket) == keys[0]:
+            # First bucket continues the newest one
+            i = n - 1
+            c0, c1 = self._count[i], counts[0]
+            total = c0 + c1
+            self._time[i] = (self._time[i] * c0 + time[0] * c1) / total
+            self._stats["mean"][i] = (self._stats["mean"][i] * c0 + means[0] * c1) / total
+            np.minimum(self._stats["min"][i], mins[0], out=self._stats["min"][i])
+            np.maximum(self._stats["max"][i], maxs[0], out=self._stats["max"][i])
+            self._count[i] = total
+            time, counts, mins, maxs, means = time[1:], counts[1:], mins[1:], maxs[1:], means[1:]
+
+        end = n + len(time)
+        if end > len(self._time):
+            self._grow(end)
+        self._time[n:end] = time
+        self._count[n:end] = counts
+        self._stats["min"][n:end] = mins
+        self._stats["max"][n:end] = maxs
+        self._stats["mean"][n:end] = means
+        self._n = end
+
+    def expire(self):
+        """Removes the buckets older than the retention and returns them as add() arguments (or None)."""
+        n = self._n
+        if not n:
+            return None
+        expired = _expired_count(self._time[:n], self._time[n - 1] - self.retention)
+        if not expired:
+            return None
+        rows = (self._time[:expired].copy(), self._count[:expired].copy(),
+                *(self._stats[s][:expired].copy() for s in STATS))
+        keep = n - expired
+        for a in (self._time, self._count, *self._stats.values()):
+            a[:keep] = a[expired:n]
+        self._n = keep
+        return rows
+
+    def series(self, field, stat="mean"):
+        """(times, values) views of one field's per-bucket 'min', 'max' or 'mean'."""
+        return self._time[:self._n], self._stats[stat][:self._n, FIELD_INDEX[field]]
+
+
+class HistoryPolicy:
+    """
+    Bounds the live history: apply() moves every drone's samples older than
+    'full_seconds' (behind its own newest sample) into its decimated tiers,
+    so memory and the cost of anything that walks a track stay flat however
+    long the session runs. 'tiers' is a sequence of (bucket s, retention s).
+    """
+
+    def __init__(self, full_seconds=FULL_RESOLUTION, tiers=DEFAULT_TIERS):
+        self.full_seconds = full_seconds
+        self.tiers = tuple(tiers)
+        self.moved = 0
+
+    def apply(self, store):
+        """Compacts every track of a TelemetryStore. Returns the number of samples moved out."""
+        moved = 0
+        for track in store:
+            n = len(track)
+            if not n:
+                continue
+            time = track.time
+            count = _expired_count(time, time[-1] - self.full_seconds)
+            if not count:
+                continue
+            if not track.tiers:
+                track.tiers = [DecimatedTier(bucket, retention) for bucket, retention in self.tiers]
+            if track.tiers:
+                values = np.column_stack([track.column(f)[:count] for f in STATE_FIELDS]).astype(np.float64)
+                rows = (time[:count].copy(), np.ones(count, dtype=np.int64), values, values, values)
+                for tier in track.tiers:
+                    tier.add(*rows)
+                    rows = tier.expire()
+                    if rows is None:
+                        break
+            track.drop_first(count)
+            moved += count
+        self.moved += moved
+        return moved
+
+
+def series(track, field, stat="mean"):
+    """
+    (times, values) of one field over a drone's whole history: its tiers'
+    buckets (oldest first) followed by every full-resolution sample.
+    Without tiers these are zero-copy views of the track.
+    """
+    parts = [tier.series(field, stat) for tier in reversed(track.tiers) if len(tier)]
+    if not parts:
+        return track.time, track.column(field)
+    return (np.concatenate([p[0] for p in parts] + [track.time]),
+            np.concatenate([p[1] for p in parts] + [track.column(field)]))
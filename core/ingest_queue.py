@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import deque
+
+# Overflow policies
+DROP_OLDEST = "drop_oldest"  # Evict the oldest pending item (reader never stalls)
+BLOCK = "block"              # Reader waits for the UI to drain (back-pressure)
+POLICIES = (DROP_OLDEST, BLOCK)
+
+
+class IngestQueue:
+    """
+    Bounded, thread-safe hand-off between the reader thread and the Tk loop.
+
+    The reader pushes decoded states with put()/put_many(); the UI drains
+    everything pending once per render tick with drain(). Nothing in here
+    touches Tk, so it is safe to call from any thread.
+    Every item is stamped with its receive and enqueue times
+    (time.perf_counter), available through drain_timed().
+    """
+
+    def __init__(self, maxsize=10000, policy=DROP_OLDEST):
+        if maxsize <= 0:
+            raise ValueError(f"maxsize must be positive, got {maxsize}")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overflow policy '{policy}'. Expected one of {POLICIES}")
+
+        self.maxsize = maxsize
+        self.policy = policy
+        self._items = deque()
+        self._lock = threading.Lock()
+        self._not_full = threading.Condition(self._lock)
+        self._closed = False
+
+        # Counters
+        self.pushed = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    @property
+    def depth(self):
+        """Number of items waiting to be drained."""
+        return len(self._items)
+
+    def put(self, item, timeout=None, rx_time=None):
+        return self.put_many((item,), timeout, rx_time)
+
+    def put_many(self, items, timeout=None, rx_time=None):
+        """
+        Appends items in order. With the BLOCK policy this waits (up to
+        'timeout' seconds per item) for room; items that still don't fit
+        are counted as dropped. Returns the number of items accepted.
+        'rx_time' is when the bytes were read (defaults to now).
+        """
+        accepted = 0
+        enq_time = time.perf_counter()
+        if rx_time is None:
+            rx_time = enq_time
+        with self._not_full:
+            for item in items:
+                if len(self._items) >= self.maxsize:
+                    if self.policy == DROP_OLDEST:
+                        self._items.popleft()
+                        self.dropped += 1
+                    elif not self._not_full.wait_for(self._has_room, timeout) or self._closed:
+                        self.dropped += 1
+                        continue
+                self._items.append((item, rx_time, enq_time))
+                accepted += 1
+
+            self.pushed += accepted
+            if len(self._items) > self.max_depth:
+                self.max_depth = len(self._items)
+        return accepted
+
+    def drain(self, max_items=None):
+        """Removes and returns pending items (all of them by default), oldest first."""
+        return [entry[0] for entry in self.drain_timed(max_items)]
+
+    def drain_timed(self, max_items=None):
+        """Like drain(), but returns (item, rx_time, enq_time) tuples."""
+        with self._not_full:
+            if max_items is None or max_items >= len(self._items):
+                items = list(self._items)
+                self._items.clear()
+            else:
+                items = [self._items.popleft() for _ in range(max_items)]
+            if items:
+                self._not_full.notify_all()
+        return items
+
+    def close(self):
+        """Wakes up any producer blocked on a full queue."""
+        with self._not_full:
+            self._closed = True
+            self._not_full.notify_all()
+
+    def stats(self):
+        return {
+            'depth': self.depth,
+            'max_depth': self.max_depth,
+            'pushed': self.pushed,
+            'dropped': self.dropped,
+        }
+
+    def _has_room(self):
+        return self._closed or len(self._items) < self.maxsize
@@ -0,0 +1,174 @@
+import codecs
+import json
+import os
+import re
+import threading
+from collections import deque
+import numpy as np
+
+from core.drone_state import STATE_FIELDS
+from core.telemetry_store import FIELD_DTYPES
+
+READ_CHUNK = 1 << 20    # Bytes read from the file at a time
+BLOCK_SIZE = 8192       # Samples per block handed to the UI
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class _JsonStream:
+    """
+    Minimal pull parser for the recording layout (a list of lists of objects):
+    reads the file in chunks and decodes one sample object at a time, so the
+    whole document never exists as Python objects at once.
+    """
+
+    def __init__(self, f, chunk_size=READ_CHUNK):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.json = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.bytes_read = 0
+        self.eof = False
+
+    def _fill(self):
+        """Reads one more chunk. Returns False at end of file."""
+        if self.eof:
+            return False
+        data = self.f.read(self.chunk_size)
+        self.bytes_read += len(data)
+        if not data:
+            self.eof = True
+        self.buf = self.buf[self.pos:] + self.decoder.decode(data, final=self.eof)
+        self.pos = 0
+        return not self.eof or len(self.buf) > 0
+
+    def peek(self):
+        """Next non-whitespace character ('' at end of file)."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Invalid recording: expected '{char}' at byte ~{self.bytes_read}, found '{found}'")
+        self.pos += 1
+
+    def value(self):
+        """Decodes the next JSON value (a sample object; objects can't be cut short silently)."""
+        self.peek()
+        while True:
+            try:
+                value, self.pos = self.json.raw_decode(self.buf, self.pos)
+                return value
+            except json.JSONDecodeError:
+                if self.eof or not self._fill():
+                    raise
+
+    def items(self):
+        """Yields the elements of the list at the cursor, leaving the cursor after its ']'."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield
+            sep = self.peek()
+            self.pos += 1
+            if sep == ']':
+                return
+            if sep != ',':
+                raise ValueError(f"Invalid recording: expected ',' or ']' at byte ~{self.bytes_read}, found '{sep}'")
+
+
+def _columns(rows, present):
+    return {f: np.array([d[f] for d in rows], dtype=FIELD_DTYPES[f]) for f in STATE_FIELDS if f in present}
+
+
+def iter_blocks(f, block_size=BLOCK_SIZE, stream=None):
+    """
+    Parses a JSON recording from the binary file 'f' and yields
+    (trajectory index, drone id, columns) with at most 'block_size' samples
+    per block; columns map field -> NumPy array (FIELD_DTYPES).
+    Empty trajectories yield one empty block so their id slot still exists.
+    """
+    stream = stream or _JsonStream(f)
+    for index, _ in enumerate(stream.items()):
+        drone_id = None
+        present = None
+        rows = []
+        for _ in stream.items():
+            rows.append(stream.value())
+            if present is None:
+                present = rows[0].keys()
+                unknown = set(present) - set(STATE_FIELDS)
+                if unknown:
+                    raise TypeError(f"Unknown field(s) in recording: {sorted(unknown)}")
+                drone_id = rows[0]['id']
+            if len(rows) >= block_size:
+                yield index, drone_id, _columns(rows, present)
+                rows = []
+        if rows or drone_id is None:
+            yield index, drone_id if drone_id is not None else index + 1, _columns(rows, present or ())
+
+
+class IncrementalJsonLoader:
+    """
+    Parses a JSON recording in a worker thread. The UI thread polls it
+    (poll()) and appends the blocks to its TelemetryStore, so playback can
+    start with the first block while the rest is still loading.
+    """
+
+    def __init__(self, path, block_size=BLOCK_SIZE):
+        self.path = path
+        self.block_size = block_size
+        self.total_bytes = os.path.getsize(path)
+        self.bytes_read = 0
+        self.samples = 0
+        self.done = False
+        self.cancelled = False
+        self.error = None
+        self._blocks = deque()
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"load:{path}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def progress(self):
+        """Fraction of the file parsed, 0..1."""
+        return self.bytes_read / self.total_bytes if self.total_bytes else 1.0
+
+    def poll(self):
+        """Blocks parsed since the last call: [(drone id, columns), ...]."""
+        blocks = []
+        while self._blocks:
+            blocks.append(self._blocks.popleft())
+        return blocks
+
+    def _run(self):
+        try:
+            with open(self.path, 'rb') as f:
+                stream = _JsonStream(f)
+                for _, drone_id, columns in iter_blocks(f, self.block_size, stream):
+                    if self._cancel.is_set():
+                        self.cancelled = True
+                        break
+                    self._blocks.append((drone_id, columns))
+                    self.samples += len(columns['id']) if 'id' in columns else 0
+                    self.bytes_read = stream.bytes_read
+        except Exception as e:
+            self.error = e
+        finally:
+            self.bytes_read = self.total_bytes if self.error is None and not self.cancelled else self.bytes_read
+            self.done = True
@@ -0,0 +1,152 @@
+import bisect
+import logging
+import logging.handlers
+import time
+
+from core.drone_state import DEVICE_TIME_UNIT
+
+# Pipeline stages, all measured per drone:
+#   link   - host receive time minus the packet's device timestamp, relative to the
+#            smallest value seen (the clocks aren't synchronized, so only the variable
+#            part of the radio/serial delay is meaningful)
+#   decode - bytes read -> state pushed into the ingest queue
+#   queue  - pushed into the ingest queue -> frame rendered
+STAGES = ("link", "decode", "queue")
+
+# Histogram bin edges in seconds: 50 us .. ~52 s, four bins per octave
+BIN_EDGES = [50e-6 * 2 ** (k / 4.0) for k in range(81)]
+
+
+class LatencyHistogram:
+    """Fixed log-spaced bins, O(1) memory and O(log bins) update."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BIN_EDGES) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(BIN_EDGES, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, pct):
+        """Upper edge of the bin holding the pct-th percentile (seconds)."""
+        if self.count == 0:
+            return None
+        target = pct / 100.0 * self.count
+        running = 0
+        for i, c in enumerate(self.counts):
+            running += c
+            if running >= target and c:
+                return BIN_EDGES[i] if i < len(BIN_EDGES) else self.max
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+
+class DroneLatency:
+    """Histograms and inter-arrival jitter for one drone."""
+
+    def __init__(self):
+        self.histograms = {stage: LatencyHistogram() for stage in STAGES}
+        self.jitter = 0.0        # RFC 3550 interarrival jitter (seconds)
+        self.min_transit = None  # Baseline for the 'link' stage
+        self.last_rx = None
+        self.last_ts = None
+
+    def record(self, device_ts, t_rx, t_enq, t_render):
+        self.histograms["decode"].add(max(0.0, t_enq - t_rx))
+        self.histograms["queue"].add(max(0.0, t_render - t_enq))
+
+        if device_ts:
+            ts = device_ts * DEVICE_TIME_UNIT
+            transit = t_rx - ts
+            if self.min_transit is None or transit < self.min_transit:
+                self.min_transit = transit
+            self.histograms["link"].add(transit - self.min_transit)
+
+            if self.last_ts is not None:
+                d = (t_rx - self.last_rx) - (ts - self.last_ts)
+                self.jitter += (abs(d) - self.jitter) / 16.0
+            self.last_rx = t_rx
+            self.last_ts = ts
+
+
+class LatencyMonitor:
+    """
+    Per-drone end-to-end latency tracking for the live stream.
+    Fed by DroneApp after each render with the timed entries from the ingest queue.
+    """
+
+    SUMMARY_INTERVAL = 0.5   # s between overlay text refreshes
+    LOG_INTERVAL = 5.0       # s between log lines
+
+    def __init__(self, log_path=None, max_bytes=1_000_000, backup_count=5):
+        self.drones = {}
+        self._summary = []
+        self._summary_time = 0.0
+        self._log_time = time.perf_counter()
+
+        self.logger = None
+        if log_path:
+            self.logger = logging.getLogger(f"gs.latency.{id(self)}")
+            self.logger.setLevel(logging.INFO)
+            self.logger.propagate = False
+            handler = logging.handlers.RotatingFileHandler(log_path, maxBytes=max_bytes,
+                                                           backupCount=backup_count)
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            self.logger.addHandler(handler)
+
+    def record_batch(self, entries, t_render):
+        """entries: (state, rx_time, enq_time) tuples as returned by IngestQueue.drain_timed()."""
+        drones = self.drones
+        for state, t_rx, t_enq in entries:
+            stats = drones.get(state.id)
+            if stats is None:
+                stats = drones[state.id] = DroneLatency()
+            stats.record(state.timestamp, t_rx, t_enq, t_render)
+
+        if self.logger and t_render - self._log_time >= self.LOG_INTERVAL:
+            self._log_time = t_render
+            for line in self.summary(max_drones=None):
+                self.logger.info(line)
+
+    def summary(self, max_drones=8):
+        """One text line per drone: p50/p99 per stage in ms, plus jitter."""
+        lines = []
+        for drone_id in sorted(self.drones)[:max_drones]:
+            stats = self.drones[drone_id]
+            parts = [f"D{drone_id:<3}"]
+            for stage in STAGES:
+                h = stats.histograms[stage]
+                if h.count:
+                    parts.append(f"{stage} {_ms(h.percentile(50))}/{_ms(h.percentile(99))}")
+                else:
+                    parts.append(f"{stage} -")
+            parts.append(f"jit {stats.jitter * 1000.0:.1f}")
+            lines.append("  ".join(parts))
+        return lines
+
+    def overlay_lines(self):
+        """Cached summary() for the map overlay, refreshed every SUMMARY_INTERVAL."""
+        if not self.drones:
+            return []
+        now = time.perf_counter()
+        if now - self._summary_time >= self.SUMMARY_INTERVAL:
+            self._summary_time = now
+            self._summary = ["latency ms p50/p99"] + self.summary()
+        return self._summary
+
+
+def _ms(seconds):
+    if seconds is None:
+        return "-"
+    return f"{seconds * 1000.0:.1f}"
@@ -0,0 +1,197 @@
+import itertools
+import time
+
+from core.drone_state import DEVICE_TIME_UNIT
+
+# A device-clock interval this many times longer than the drone's usual
+# packet interval counts as a gap (packets lost on the link)
+GAP_FACTOR = 2.5
+# Packet rate is re-estimated over windows of this many seconds (host clock)
+RATE_WINDOW = 1.0
+# A drone silent for this long reports a rate of 0
+STALE_AFTER = 3.0
+# A device timestamp this many seconds behind the drone's previous one is a
+# clock reset (reboot, firmware restart), not a reordered packet
+CLOCK_RESET = 2.0
+
+
+class DroneLinkStats:
+    """Rolling link counters for one drone. Every update is O(1)."""
+
+    __slots__ = ("packets", "rejected", "gaps", "missed", "out_of_order", "clock_resets",
+                 "rate", "jitter", "interval",
+                 "last_rx", "last_ts", "_window_start", "_window_count")
+
+    def __init__(self):
+        self.packets = 0
+        self.rejected = 0
+        self.gaps = 0           # Number of gaps detected
+        self.missed = 0         # Estimated packets lost inside those gaps
+        self.out_of_order = 0   # Packets older than one already received
+        self.clock_resets = 0   # Device clock jumped back more than CLOCK_RESET
+        self.rate = 0.0         # Packets per second over the last RATE_WINDOW
+        self.jitter = 0.0       # RFC 3550 interarrival jitter (seconds)
+        self.interval = None    # Smoothed device-clock interval between packets (seconds)
+        self.last_rx = None
+        self.last_ts = None
+        self._window_start = None
+        self._window_count = 0
+
+    def record(self, device_ts, t_rx):
+        self.packets += 1
+
+        # --- Rate ---
+        if self._window_start is None:
+            self._window_start = t_rx
+        self._window_count += 1
+        elapsed = t_rx - self._window_start
+        if elapsed >= RATE_WINDOW:
+            self.rate = self._window_count / elapsed
+            self._window_start = t_rx
+            self._window_count = 0
+
+        # --- Sequence: gaps, reordering, jitter (device clock) ---
+        # Packets without a timestamp fall back to the host clock
+        ts = device_ts * DEVICE_TIME_UNIT if device_ts else t_rx
+        last_ts = self.last_ts
+        if last_ts is not None:
+            dt = ts - last_ts
+            if dt < -CLOCK_RESET:
+                # The device restarted its clock: the sequence starts over from this packet
+                self.clock_resets += 1
+            elif dt < 0:
+                self.out_of_order += 1
+                return
+            else:
+                interval = self.interval
+                if interval is not None and interval > 0 and dt > GAP_FACTOR * interval:
+                    self.gaps += 1
+                    self.missed += max(1, round(dt / interval) - 1)
+                elif dt > 0:
+                    # Gaps are kept out of the interval estimate
+                    self.interval = dt if interval is None else interval + (dt - interval) / 16.0
+
+                if device_ts:
+                    d = (t_rx - self.last_rx) - dt
+                    self.jitter += (abs(d) - self.jitter) / 16.0
+
+        self.last_rx = t_rx
+        self.last_ts = ts
+
+    def current_rate(self, now):
+        if self.last_rx is None or now - self.last_rx > STALE_AFTER:
+            return 0.0
+        return self.rate
+
+
+class LinkStats:
+    """
+    Stream statistics fed by SerialBridge while it decodes: bytes read,
+    packets accepted/rejected, bytes skipped while resyncing, and per-drone
+    rate, jitter, gaps and out-of-order arrivals.
+
+    Written by the reader thread, read by the UI thread. Readers only take
+    snapshots of plain counters, so no lock is needed.
+    """
+
+    SUMMARY_INTERVAL = 0.5   # s between overlay text refreshes
+
+    def __init__(self):
+        self.drones = {}
+        self.bytes_read = 0
+        self.packets = 0
+        self.rejected = 0
+        self.skipped_bytes = 0
+        self._summary = []
+        self._summary_time = 0.0
+
+    def _drone(self, drone_id):
+        stats = self.drones.get(drone_id)
+        if stats is None:
+            stats = self.drones[drone_id] = DroneLinkStats()
+        return stats
+
+    # --- Updates (decoder side) ---
+
+    def count_bytes(self, n):
+        self.bytes_read += n
+
+    def count_skipped(self, n):
+        """Bytes thrown away while looking for the next packet."""
+        if n > 0:
+            self.skipped_bytes += n
+
+    def count_rejected(self, n, ids=()):
+        """
+        Candidate packets that failed validation. 'ids' are the drone ids of
+        the rejected packets, where they look plausible (1..255).
+        """
+        self.rejected += n
+        for drone_id in ids:
+            if 0 < drone_id <= 255:
+                self._drone(drone_id).rejected += 1
+
+    def record_states(self, states, t_rx=None):
+        """Accepted packets, all received at host time 't_rx' (time.perf_counter)."""
+        if not states:
+            return
+        if t_rx is None:
+            t_rx = time.perf_counter()
+        self.record_timed(states, itertools.repeat(t_rx))
+
+    def record_timed(self, states, rx_times):
+        """Accepted packets, each with its own host receive time (e.g. drained from a shared ring)."""
+        self.packets += len(states)
+        drones = self.drones
+        for state, t_rx in zip(states, rx_times):
+            stats = drones.get(state.id)
+            if stats is None:
+                stats = self._drone(state.id)
+            stats.record(state.timestamp, t_rx)
+
+    # --- Queries (any thread) ---
+
+    def snapshot(self, now=None):
+        """Plain-dict copy of every counter: stream totals plus one entry per drone."""
+        if now is None:
+            now = time.perf_counter()
+        drones = {}
+        for drone_id, s in sorted(list(self.drones.items())):
+            drones[drone_id] = {
+                'packets': s.packets,
+                'rate': s.current_rate(now),
+                'jitter': s.jitter,
+                'interval': s.interval,
+                'gaps': s.gaps,
+                'missed': s.missed,
+                'out_of_order': s.out_of_order,
+                'clock_resets': s.clock_resets,
+                'rejected': s.rejected,
+                'age': None if s.last_rx is None else now - s.last_rx,
+            }
+        return {
+            'bytes_read': self.bytes_read,
+            'packets': self.packets,
+            'rejected': self.rejected,
+            'skipped_bytes': self.skipped_bytes,
+            'drones': drones,
+        }
+
+    def summary(self, max_drones=8):
+        snap = self.snapshot()
+        lines = [f"rx {snap['bytes_read'] / 1024.0:.0f}KB  ok {snap['packets']}  "
+                 f"bad {snap['rejected']}  skip {snap['skipped_bytes']}B"]
+        for drone_id, d in list(snap['drones'].items())[:max_drones]:
+            lines.append(f"D{drone_id:<3} {d['rate']:5.1f}/s  jit {d['jitter'] * 1000.0:.1f}  "
+                         f"gap {d['gaps']}  ooo {d['out_of_order']}  bad {d['rejected']}")
+        return lines
+
+    def overlay_lines(self):
+        """Link lines for the top-left corner of the map; summary() is rerun at most every SUMMARY_INTERVAL."""
+        if not self.bytes_read:
+            return []
+        now = time.perf_counter()
+        if now - self._summary_time >= self.SUMMARY_INTERVAL:
+            self._summary_time = now
+            self._summary = ["link"] + self.summary()
+        return self._summary
@@ -0,0 +1,85 @@
+import time
+
+# Speeds offered by the playback controls (x real time)
+SPEEDS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0)
+MIN_SPEED = SPEEDS[0]
+MAX_SPEED = SPEEDS[-1]
+
+
+def clamp_speed(speed):
+    return min(max(float(speed), MIN_SPEED), MAX_SPEED)
+
+
+class PlaybackClock:
+    """
+    Maps wall-clock time (time.perf_counter) to recording time. While running,
+    recording time = anchor + (wall time since the anchor) * speed, negative
+    in reverse. Every change (start, pause, seek, speed, direction) re-anchors
+    at the current recording time, so the picture never jumps.
+
+    Playback doesn't depend on how long a frame takes to draw: a late tick
+    just reads a later time, and the frames in between are skipped (counted
+    in 'skipped').
+    """
+
+    def __init__(self, speed=1.0, clock=time.perf_counter):
+        self._clock = clock
+        self.speed = clamp_speed(speed)
+        self.reverse = False
+        self.running = False
+        self._data_anchor = 0.0
+        self._wall_anchor = clock()
+        self._last_tick = None
+        self.ticks = 0
+        self.skipped = 0
+
+    @property
+    def rate(self):
+        """Recording seconds per wall-clock second (negative in reverse)."""
+        return -self.speed if self.reverse else self.speed
+
+    def time(self, wall=None):
+        """Recording time now (or at perf_counter time 'wall')."""
+        if not self.running:
+            return self._data_anchor
+        if wall is None:
+            wall = self._clock()
+        return self._data_anchor + (wall - self._wall_anchor) * self.rate
+
+    def _anchor(self, data_time):
+        self._data_anchor = float(data_time)
+        self._wall_anchor = self._clock()
+
+    def start(self, data_time=None):
+        """Runs from 'data_time' (default: where it is)."""
+        self._anchor(self.time() if data_time is None else data_time)
+        self.running = True
+        self._last_tick = None
+
+    def pause(self):
+        self._anchor(self.time())
+        self.running = False
+
+    def seek(self, data_time):
+        self._anchor(data_time)
+
+    def set_speed(self, speed):
+        self._anchor(self.time())
+        self.speed = clamp_speed(speed)
+
+    def set_reverse(self, reverse):
+        self._anchor(self.time())
+        self.reverse = bool(reverse)
+
+    def tick(self, interval):
+        """
+        Recording time of the frame about to be drawn. 'interval' is the
+        intended wall time between frames (s); the frames that should have
+        been drawn since the last tick, but weren't, count as skipped.
+        """
+        wall = self._clock()
+        if self._last_tick is not None and interval > 0:
+            self.skipped += max(round((wall - self._last_tick) / interval) - 1, 0)
+        self._last_tick = wall
+        self.ticks += 1
+        return self.time(wall)
@@ -0,0 +1,175 @@
+import os
+import threading
+import time
+import numpy as np
+
+from core.drone_state import STATE_FIELDS
+from core import recording_file
+from core.recording_file import JOURNAL_DTYPE, TIME_COLUMN
+from core.telemetry_store import sample_time
+
+# A batch is written when it reaches FLUSH_RECORDS rows or is FLUSH_INTERVAL
+# seconds old, whichever comes first; written data is fsync'ed at most every
+# FSYNC_INTERVAL seconds (and on close).
+FLUSH_INTERVAL = 0.25
+FLUSH_RECORDS = 4096
+FSYNC_INTERVAL = 2.0
+MAX_PENDING = 200000    # Rows held while the disk stalls before new ones are dropped
+
+PARTIAL_SUFFIX = ".part"
+
+
+class StreamingRecorder:
+    """
+    Writes a live session to disk while it is being recorded, instead of
+    keeping it in memory until Stop.
+
+    append() is called from the UI thread and only queues the row; a writer
+    thread turns each batch into one journal segment (core/recording_file.py),
+    and close() writes the footer index. A journal that was never closed
+    (crash, power loss) loses at most the last unsynced batches and is
+    repaired by recording_file.recover_journal().
+    """
+
+    def __init__(self, path, flush_interval=FLUSH_INTERVAL, flush_records=FLUSH_RECORDS,
+                 fsync_interval=FSYNC_INTERVAL, max_pending=MAX_PENDING):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_records = flush_records
+        self.fsync_interval = fsync_interval
+        self.max_pending = max_pending
+
+        self._file = open(path, 'wb')
+        self._file.write(recording_file.journal_preamble())
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+        self._pending = []
+        self._cond = threading.Condition()
+        self._closing = False
+        self._segments = []         # (offset, count), for the footer
+        self._drone_counts = {}     # Samples per drone, also gives the default time of each row
+
+        # Counters
+        self.samples = 0            # Written to the file
+        self.dropped = 0            # Discarded because the writer fell MAX_PENDING rows behind
+        self.fsyncs = 0
+        self.max_flush_time = 0.0
+        self.error = None
+
+        self._thread = threading.Thread(target=self._run, name="recorder", daemon=True)
+        self._thread.start()
+
+    def append(self, state, rx_time=None):
+        """
+        Queues one DroneSelfState (or anything with to_tuple()). Never blocks on I/O.
+        'rx_time' times a state without a device timestamp, as in DroneTrack.append.
+        """
+        with self._cond:
+            if self._closing or self.error is not None:
+                return
+            if len(self._pending) >= self.max_pending:
+                if self.dropped == 0:
+                    print(f"[WARNING] Recorder is {self.max_pending} samples behind the stream "
+                          f"(slow disk?); new samples are dropped until it catches up.")
+                self.dropped += 1
+                return
+            self._pending.append(state.to_tuple() + (rx_time,))
+            if len(self._pending) >= self.flush_records:
+                self._cond.notify()
+
+    def close(self):
+        """Writes what is left plus the footer index, and returns the file path."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._thread.join()
+        return self.path
+
+    def stats(self):
+        with self._cond:
+            pending = len(self._pending)
+        return {'samples': self.samples, 'pending': pending, 'dropped': self.dropped,
+                'segments': len(self._segments), 'fsyncs': self.fsyncs,
+                'max_flush_ms': self.max_flush_time * 1e3}
+
+    # --- Writer thread ---
+
+    def _run(self):
+        f = self._file
+        last_sync = time.perf_counter()
+        dirty = False
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._closing or len(self._pending) >= self.flush_records,
+                                        timeout=self.flush_interval)
+                    batch, self._pending = self._pending, []
+                    closing = self._closing
+                if batch:
+                    start = time.perf_counter()
+                    self._write_segment(f, batch)
+                    self.max_flush_time = max(self.max_flush_time, time.perf_counter() - start)
+                    dirty = True
+                if dirty and (closing or time.perf_counter() - last_sync >= self.fsync_interval):
+                    os.fsync(f.fileno())
+                    self.fsyncs += 1
+                    last_sync = time.perf_counter()
+                    dirty = False
+                if closing:
+                    break
+            f.write(recording_file.journal_footer(f.tell(), self._segments, self._drone_counts))
+            f.flush()
+            os.fsync(f.fileno())
+        except OSError as e:
+            # Keep what is on disk; recover_journal() can still read it
+            print(f"[ERROR] Recorder stopped writing {self.path}: {e}")
+            with self._cond:
+                self.error = e
+                self._pending = []
+        finally:
+            f.close()
+
+    def _write_segment(self, f, batch):
+        rows = np.empty(len(batch), dtype=JOURNAL_DTYPE)
+        columns = list(zip(*batch))
+        for name, values in zip(STATE_FIELDS, columns):
+            rows[name] = values
+        # Same default time as DroneTrack.append: device clock, else the receive time, else the sample index
+        counts = self._drone_counts
+        t = []
+        for drone_id, ts, rx_time in zip(rows['id'].tolist(), rows['timestamp'].tolist(), columns[-1]):
+            n = counts.get(drone_id, 0)
+            counts[drone_id] = n + 1
+            t.append(sample_time(ts, n, rx_time))
+        rows[TIME_COLUMN] = t
+
+        offset = f.tell()
+        f.write(recording_file.journal_segment(rows))
+        f.flush()   # In the page cache: survives a crash of this process, fsync covers the OS
+        self._segments.append((offset, len(rows)))
+        self.samples += len(rows)
+
+
+def recover_partial_recordings(directory):
+    """
+    Closes the journals left in 'directory' by a session that never stopped
+    recording, and renames them without PARTIAL_SUFFIX. Returns their paths.
+    """
+    recovered = []
+    if not os.path.isdir(directory):
+        return recovered
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(PARTIAL_SUFFIX):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            samples = recording_file.recover_journal(path)
+        except (OSError, ValueError, TypeError) as e:
+            print(f"[WARNING] Could not recover {path}: {e}")
+            continue
+        final_path = path[:-len(PARTIAL_SUFFIX)]
+        os.replace(path, final_path)
+        print(f"[WARNING] Recovered {samples} samples from an interrupted recording: {final_path}")
+        recovered.append(final_path)
+    return recovered
@@ -0,0 +1,340 @@
+import json
+import os
+import struct
+import sys
+import zlib
+import numpy as np
+
+from core.telemetry_store import TelemetryStore, DroneTrack, FIELD_DTYPES, TIME_DTYPE
+from core.drone_state import STATE_FIELDS
+from core.archive import ARCHIVE_MAGIC, ARCHIVE_EXTENSION, load_archive, save_archive
+
+# Binary recording layout (all little-endian):
+#
+#   preamble   magic (8 bytes), format version (u32), header length (u32)
+#   header     UTF-8 JSON: schema (field name + NumPy dtype) and drone index
+#              (id, sample count, offset of each column in the data section)
+#   data       one fixed-width column per field per drone, plus its time column,
+#              each starting on a COLUMN_ALIGN boundary
+#
+# The data section is opened with np.memmap, so loading reads only the header
+# and playback only touches the pages of the samples it draws.
+
+MAGIC = b"GSREC\x00\r\n"
+VERSION = 1
+PREAMBLE = struct.Struct("<8sII")
+COLUMN_ALIGN = 64
+TIME_COLUMN = "t"
+
+# Journal layout, written while recording (core/recorder.py) and readable
+# after a crash:
+#
+#   preamble   JOURNAL_MAGIC, format version (u32), header length (u32)
+#   header     UTF-8 JSON: schema of one row
+#   segments   SEGMENT (tag, row count, CRC-32 of the rows), then the rows
+#              (JOURNAL_DTYPE, every drone interleaved in arrival order)
+#   footer     UTF-8 JSON index: segment offsets/counts, samples per drone
+#   trailer    TRAILER: footer offset, footer length, TRAILER_MAGIC
+#
+# A file without a valid trailer was not closed: its segments are scanned
+# and the first truncated or corrupt one ends the recording.
+
+JOURNAL_MAGIC = b"GSJRN\x00\r\n"
+SEGMENT = struct.Struct("<4sII")
+SEGMENT_TAG = b"SEG1"
+TRAILER = struct.Struct("<QI8s")
+TRAILER_MAGIC = b"GSJEND\r\n"
+JOURNAL_DTYPE = np.dtype([(f, FIELD_DTYPES[f]) for f in STATE_FIELDS] + [(TIME_COLUMN, TIME_DTYPE)])
+
+BINARY_EXTENSION = ".gsrec"
+JSON_EXTENSION = ".json"
+RECORDING_EXTENSIONS = (BINARY_EXTENSION, ARCHIVE_EXTENSION, JSON_EXTENSION)
+FILETYPES = [("Recordings", "*.gsrec *.gsarc *.json"), ("Binary Recordings", "*.gsrec"),
+             ("Compressed Archives", "*.gsarc"), ("JSON Files", "*.json"), ("All Files", "*.*")]
+
+
+def _align(n):
+    return (n + COLUMN_ALIGN - 1) // COLUMN_ALIGN * COLUMN_ALIGN
+
+
+def _magic(path):
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC))
+
+
+def is_binary_recording(path):
+    return _magic(path) == MAGIC
+
+
+def is_journal(path):
+    return _magic(path) == JOURNAL_MAGIC
+
+
+def is_json_recording(path):
+    """Anything without the magic of a binary format is treated as JSON."""
+    return _magic(path) not in (MAGIC, JOURNAL_MAGIC, ARCHIVE_MAGIC)
+
+
+def recording_format(path):
+    """'gsrec', 'journal', 'gsarc' or 'json', by magic like load_recording()."""
+    return {MAGIC: "gsrec", JOURNAL_MAGIC: "journal", ARCHIVE_MAGIC: "gsarc"}.get(_magic(path), "json")
+
+
+def find_recordings(paths, extensions=RECORDING_EXTENSIONS):
+    """Files named in 'paths', plus every recording under the directories among them (sorted)."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, _, filenames in os.walk(path):
+                found += [os.path.join(dirpath, name) for name in sorted(filenames)
+                          if name.lower().endswith(extensions)]
+        elif os.path.exists(path):
+            found.append(path)
+        else:
+            print(f"[WARNING] {path}: not found", file=sys.stderr)
+    return sorted(set(found))
+
+
+# --- Binary ---
+
+def save_binary(store, path):
+    """Writes a TelemetryStore as a binary recording (through a temp file, then renamed)."""
+    schema = [[f, FIELD_DTYPES[f].str] for f in STATE_FIELDS]
+    drones = []
+    offset = 0
+    for track in store:
+        n = len(track)
+        columns = {}
+        for name, dtype in schema + [[TIME_COLUMN, TIME_DTYPE.str]]:
+            columns[name] = offset
+            offset = _align(offset + n * np.dtype(dtype).itemsize)
+        drones.append({'id': track.drone_id, 'count': n, 'columns': columns})
+    header = json.dumps({'fields': schema, 'time': TIME_DTYPE.str, 'drones': drones}).encode()
+    data_start = _align(PREAMBLE.size + len(header))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+        f.write(header)
+        for track, entry in zip(store, drones):
+            for name, col_offset in entry['columns'].items():
+                if name == TIME_COLUMN:
+                    col = np.ascontiguousarray(track.time, dtype=TIME_DTYPE)
+                else:
+                    col = np.ascontiguousarray(track.column(name), dtype=FIELD_DTYPES[name])
+                f.seek(data_start + col_offset)
+                f.write(col.tobytes())
+        # Pad the last column so every offset is inside the file
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+
+def read_header(path):
+    """Returns (header dict, offset of the data section)."""
+    with open(path, 'rb') as f:
+        preamble = f.read(PREAMBLE.size)
+        if len(preamble) < PREAMBLE.size:
+            raise ValueError(f"{path}: truncated recording header")
+        magic, version, header_len = PREAMBLE.unpack(preamble)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a binary recording")
+        if version > VERSION:
+            raise ValueError(f"{path}: recording format v{version} is newer than this viewer (v{VERSION})")
+        header = json.loads(f.read(header_len).decode())
+    return header, _align(PREAMBLE.size + header_len)
+
+
+def load_binary(path):
+    """
+    Opens a binary recording as a TelemetryStore whose columns are read-only
+    np.memmap views. Nothing but the header is read up front.
+    """
+    header, data_start = read_header(path)
+    schema = {name: np.dtype(dtype) for name, dtype in header['fields']}
+    unknown = set(schema) - set(STATE_FIELDS)
+    if unknown:
+        raise TypeError(f"Unknown field(s) in recording: {sorted(unknown)}")
+    schema[TIME_COLUMN] = np.dtype(header.get('time', TIME_DTYPE.str))
+
+    data = np.memmap(path, dtype=np.uint8, mode='r') if os.path.getsize(path) > data_start else None
+    store = TelemetryStore()
+    for entry in header['drones']:
+        n = entry['count']
+        columns = {}
+        for name, dtype in schema.items():
+            if n == 0:
+                columns[name] = np.empty(0, dtype=dtype)
+                continue
+            start = data_start + entry['columns'][name]
+            columns[name] = data[start:start + n * dtype.itemsize].view(dtype)
+        for f in STATE_FIELDS:
+            if f not in columns:
+                # Field added after the file was written
+                columns[f] = np.zeros(n, dtype=FIELD_DTYPES[f])
+        store.add_track(DroneTrack.from_columns(entry['id'], columns, columns.pop(TIME_COLUMN)))
+    return store
+
+
+# --- Journal ---
+
+def journal_preamble():
+    """Preamble and header of a new journal."""
+    header = json.dumps({'fields': [[name, JOURNAL_DTYPE[name].str] for name in JOURNAL_DTYPE.names]}).encode()
+    return PREAMBLE.pack(JOURNAL_MAGIC, VERSION, len(header)) + header
+
+
+def journal_segment(rows):
+    """One segment: SEGMENT header, then the JOURNAL_DTYPE rows."""
+    payload = rows.tobytes()
+    return SEGMENT.pack(SEGMENT_TAG, len(rows), zlib.crc32(payload)) + payload
+
+
+def journal_footer(offset, segments, drone_counts):
+    """Footer index and trailer; 'offset' is where the footer starts."""
+    footer = json.dumps({'segments': segments, 'samples': sum(c for _, c in segments),
+                         'drones': {str(k): v for k, v in sorted(drone_counts.items())}}).encode()
+    return footer + TRAILER.pack(offset, len(footer), TRAILER_MAGIC)
+
+
+def _read_footer(f, size):
+    if size < TRAILER.size:
+        return None
+    f.seek(size - TRAILER.size)
+    offset, length, magic = TRAILER.unpack(f.read(TRAILER.size))
+    if magic != TRAILER_MAGIC or offset + length + TRAILER.size != size:
+        return None
+    f.seek(offset)
+    try:
+        return json.loads(f.read(length).decode())
+    except ValueError:
+        return None
+
+
+def _scan_segments(f, start, size):
+    """[(offset, count), ...] of the intact segments, and where the last one ends."""
+    segments = []
+    pos = start
+    while pos + SEGMENT.size <= size:
+        f.seek(pos)
+        tag, count, crc = SEGMENT.unpack(f.read(SEGMENT.size))
+        end = pos + SEGMENT.size + count * JOURNAL_DTYPE.itemsize
+        if tag != SEGMENT_TAG or end > size:
+            break
+        if zlib.crc32(f.read(count * JOURNAL_DTYPE.itemsize)) != crc:
+            break
+        segments.append((pos, count))
+        pos = end
+    return segments, pos
+
+
+def _journal_layout(path):
+    """(segments, complete): from the footer index, or by scanning an unterminated file."""
+    with open(path, 'rb') as f:
+        magic, version, header_len = PREAMBLE.unpack(f.read(PREAMBLE.size))
+        if magic != JOURNAL_MAGIC:
+            raise ValueError(f"{path}: not a recording journal")
+        if version > VERSION:
+            raise ValueError(f"{path}: journal format v{version} is newer than this viewer (v{VERSION})")
+        header = json.loads(f.read(header_len).decode())
+        if [list(x) for x in header['fields']] != [[n, JOURNAL_DTYPE[n].str] for n in JOURNAL_DTYPE.names]:
+            raise TypeError(f"{path}: journal schema doesn't match this viewer")
+        size = os.fstat(f.fileno()).st_size
+        footer = _read_footer(f, size)
+        if footer is not None:
+            return [tuple(s) for s in footer['segments']], True
+        segments, _ = _scan_segments(f, PREAMBLE.size + header_len, size)
+        return segments, False
+
+
+def read_journal_rows(path):
+    """All rows of a journal (JOURNAL_DTYPE, arrival order) and whether it was closed cleanly."""
+    segments, complete = _journal_layout(path)
+    if not segments:
+        return np.empty(0, dtype=JOURNAL_DTYPE), complete
+    data = np.memmap(path, dtype=np.uint8, mode='r')
+    parts = [data[pos + SEGMENT.size:pos + SEGMENT.size + count * JOURNAL_DTYPE.itemsize].view(JOURNAL_DTYPE)
+             for pos, count in segments]
+    return np.concatenate(parts), complete
+
+
+def load_journal(path):
+    """Regroups the journal rows per drone into a TelemetryStore (in memory)."""
+    rows, complete = read_journal_rows(path)
+    if not complete:
+        print(f"[WARNING] {path} was not closed cleanly; loaded the {len(rows)} samples written before it stopped.")
+    store = TelemetryStore()
+    if len(rows) == 0:
+        return store
+    order = np.argsort(rows['id'], kind='stable')
+    rows = rows[order]
+    ids, starts = np.unique(rows['id'], return_index=True)
+    for drone_id, part in zip(ids.tolist(), np.split(rows, starts[1:])):
+        track = store.track(drone_id, create=True)
+        track.extend_columns({f: part[f] for f in STATE_FIELDS}, t=part[TIME_COLUMN])
+    return store
+
+
+def recover_journal(path):
+    """
+    Makes an unterminated journal (recorder crashed) loadable without a scan:
+    drops the torn tail and appends the footer. Returns the number of samples kept.
+    """
+    with open(path, 'r+b') as f:
+        magic, _, header_len = PREAMBLE.unpack(f.read(PREAMBLE.size))
+        if magic != JOURNAL_MAGIC:
+            raise ValueError(f"{path}: not a recording journal")
+        size = os.fstat(f.fileno()).st_size
+        footer = _read_footer(f, size)
+        if footer is not None:
+            return footer['samples']
+        segments, end = _scan_segments(f, PREAMBLE.size + header_len, size)
+        counts = {}
+        for pos, count in segments:
+            f.seek(pos + SEGMENT.size)
+            ids = np.frombuffer(f.read(count * JOURNAL_DTYPE.itemsize), dtype=JOURNAL_DTYPE)['id']
+            for drone_id, n in zip(*np.unique(ids, return_counts=True)):
+                counts[int(drone_id)] = counts.get(int(drone_id), 0) + int(n)
+        f.truncate(end)
+        f.seek(end)
+        f.write(journal_footer(end, segments, counts))
+        f.flush()
+        os.fsync(f.fileno())
+    return sum(c for _, c in segments)
+
+
+# --- JSON (import/export) ---
+
+def load_json(path):
+    with open(path, 'r') as f:
+        raw_data = json.load(f)
+    # Parse List[List[Dict]] straight into columns (no per-sample objects)
+    return TelemetryStore.from_dict_lists(raw_data)
+
+
+def save_json(store, path, indent=2):
+    with open(path, 'w') as f:
+        json.dump(store.to_dict_lists(), f, indent=indent)
+
+
+# --- Format dispatch ---
+
+def load_recording(path):
+    """Binary recordings, journals and archives are recognised by their magic, anything else is parsed as JSON."""
+    magic = _magic(path)
+    if magic == MAGIC:
+        return load_binary(path)
+    if magic == JOURNAL_MAGIC:
+        return load_journal(path)
+    if magic == ARCHIVE_MAGIC:
+        return load_archive(path)
+    return load_json(path)
+
+
+def save_recording(store, path):
+    """Writes JSON for '.json' paths, a compressed archive for '.gsarc' and the binary format otherwise."""
+    if path.lower().endswith(JSON_EXTENSION):
+        save_json(store, path)
+    elif path.lower().endswith(ARCHIVE_EXTENSION):
+        save_archive(store, path)
+    else:
+        save_binary(store, path)
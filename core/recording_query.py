@@ -0,0 +1,178 @@
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+import numpy as np
+
+from core import recording_file
+from core.archive import ArchiveReader, is_archive
+from core.drone_state import STATE_FIELDS
+from core.telemetry_store import FIELD_DTYPES, TIME_DTYPE
+
+# Windowed reads of a recording without loading it:
+#
+#   rec = open_recording("flight.gsarc")
+#   alt = rec.query(drones=[3], fields=["alt"], t0=120.0, t1=150.0)[3]
+#   alt["t"], alt["alt"]   -> NumPy arrays of the samples in [t0, t1]
+#
+# Binary recordings are memory-mapped: the window is found by binary search on
+# the time column and only its pages of the requested columns are read.
+# Archives find the window from the first time of every chunk (header) and
+# decompress only the chunks of the requested columns it covers. Journals and
+# JSON have no per-drone index, so they are loaded once and sliced.
+
+TIME_COLUMN = recording_file.TIME_COLUMN
+
+
+class Recording(ABC):
+    """
+    A recording opened for queries. Subclasses find the sample window of a
+    drone (_window) and read a column range (_read); query() does the rest.
+    """
+
+    @abstractmethod
+    def drone_ids(self):
+        """Drones with samples, sorted."""
+
+    @abstractmethod
+    def _counts(self):
+        """{drone_id: sample count}."""
+
+    @abstractmethod
+    def _window(self, drone_id, t0, t1):
+        """Sample range [start, stop) of 'drone_id' with t0 <= t <= t1 (None = open)."""
+
+    @abstractmethod
+    def _read(self, drone_id, name, start, stop):
+        """Values of field 'name' of 'drone_id' for samples [start, stop)."""
+
+    @abstractmethod
+    def load(self):
+        """The whole recording as a TelemetryStore (what load_recording returns)."""
+
+    def time_range(self):
+        """(first, last) sample time over all drones, or None if there are none."""
+        ends = [(self._read(d, TIME_COLUMN, 0, 1)[0], self._read(d, TIME_COLUMN, n - 1, n)[0])
+                for d, n in self._counts().items() if n]
+        if not ends:
+            return None
+        return float(min(e[0] for e in ends)), float(max(e[1] for e in ends))
+
+    def query(self, drones=None, fields=None, t0=None, t1=None, bbox=None):
+        """
+        {drone_id: {'t': times, field: values, ...}} of the samples with
+        t0 <= t <= t1 (seconds, the recording's time column; None = open end).
+        'drones' and 'fields' default to all of them; drones that aren't in the
+        recording are left out. 'bbox' (min_lat, max_lat, min_lon, max_lon)
+        keeps only the samples inside it. The arrays are copies: they don't
+        keep the file open.
+        """
+        fields = list(STATE_FIELDS) if fields is None else list(fields)
+        unknown = set(fields) - set(STATE_FIELDS) - {TIME_COLUMN}
+        if unknown:
+            raise ValueError(f"Unknown field(s): {sorted(unknown)}")
+        available = self._counts()
+        result = {}
+        for drone_id in self.drone_ids() if drones is None else drones:
+            if not available.get(drone_id):
+                continue
+            start, stop = self._window(drone_id, t0, t1)
+            columns = {TIME_COLUMN: self._read(drone_id, TIME_COLUMN, start, stop)}
+            if bbox is not None:
+                min_lat, max_lat, min_lon, max_lon = bbox
+                lat = self._read(drone_id, 'lat', start, stop)
+                lon = self._read(drone_id, 'lon', start, stop)
+                mask = (lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)
+                columns = {TIME_COLUMN: columns[TIME_COLUMN][mask], 'lat': lat[mask], 'lon': lon[mask]}
+            for f in fields:
+                if f not in columns:
+                    values = self._read(drone_id, f, start, stop)
+                    columns[f] = values[mask] if bbox is not None else values
+            result[drone_id] = {name: columns[name] for name in [TIME_COLUMN] + fields}
+        return result
+
+
+class StoreRecording(Recording):
+    """
+    Queries over a TelemetryStore. Over load_binary()'s memory-mapped columns
+    this reads only the window; over an in-memory store it just slices.
+    """
+
+    def __init__(self, store, path=None):
+        self.store = store
+        self.path = path
+
+    def drone_ids(self):
+        return sorted(t.drone_id for t in self.store if len(t))
+
+    def _counts(self):
+        return {t.drone_id: len(t) for t in self.store}
+
+    def _window(self, drone_id, t0, t1):
+        time = self.store.track(drone_id).time
+        start = 0 if t0 is None else int(np.searchsorted(time, t0, side='left'))
+        stop = len(time) if t1 is None else int(np.searchsorted(time, t1, side='right'))
+        return start, max(start, stop)
+
+    def _read(self, drone_id, name, start, stop):
+        track = self.store.track(drone_id)
+        column = track.time if name == TIME_COLUMN else track.column(name)
+        return np.array(column[start:stop])
+
+    def load(self):
+        return self.store
+
+
+class ArchiveRecording(Recording):
+    """Queries over a compressed archive: only the chunks a window covers are decompressed."""
+
+    def __init__(self, path):
+        self.path = path
+        self.reader = ArchiveReader(path)
+        self._entries = {entry['id']: entry for entry in self.reader.header['drones']}
+        # (drone_id, first sample, times) decoded by the last _window, which query() reads next
+        self._last_times = None
+
+    def drone_ids(self):
+        return sorted(d for d, entry in self._entries.items() if entry['count'])
+
+    def _counts(self):
+        return {d: entry['count'] for d, entry in self._entries.items()}
+
+    def _window(self, drone_id, t0, t1):
+        entry = self._entries[drone_id]
+        n, size = entry['count'], self.reader.chunk_samples
+        starts = [c['t0'] for c in entry['chunks']]
+        # Chunks that can hold [t0, t1]: from the last one starting at or before t0
+        first = 0 if t0 is None else max(bisect_right(starts, t0) - 1, 0)
+        last = len(starts) - 1 if t1 is None else bisect_right(starts, t1) - 1
+        if last < first:
+            return 0, 0
+        base = first * size
+        time = self.reader.read(entry, TIME_COLUMN, base, min((last + 1) * size, n))
+        self._last_times = (drone_id, base, time)
+        start = 0 if t0 is None else int(np.searchsorted(time, t0, side='left'))
+        stop = len(time) if t1 is None else int(np.searchsorted(time, t1, side='right'))
+        return base + start, base + max(start, stop)
+
+    def _read(self, drone_id, name, start, stop):
+        if name == TIME_COLUMN and self._last_times is not None:
+            cached_id, base, time = self._last_times
+            if cached_id == drone_id and base <= start and stop <= base + len(time):
+                return time[start - base:stop - base].copy()
+        if name not in self.reader.fields:
+            # Field added after the file was written
+            return np.zeros(stop - start, dtype=FIELD_DTYPES[name])
+        dtype = TIME_DTYPE if name == TIME_COLUMN else FIELD_DTYPES[name]
+        return self.reader.read(self._entries[drone_id], name, start, stop).astype(dtype, copy=False)
+
+    def load(self):
+        return self.reader.load()
+
+
+def open_recording(path):
+    """
+    A Recording for queries. Binary recordings and archives are read lazily;
+    journals and JSON are loaded whole (they have no per-drone index).
+    """
+    if is_archive(path):
+        return ArchiveRecording(path)
+    return StoreRecording(recording_file.load_recording(path), path)
@@ -0,0 +1,359 @@
+from dataclasses import fields
+import numpy as np
+
+from core.drone_state import DroneSelfState, STATE_FIELDS, DEVICE_TIME_UNIT
+
+# One column per DroneSelfState field. Python int/float map to 64-bit so values
+# round-trip exactly (JSON recordings carry double precision lat/lon).
+FIELD_DTYPES = {f.name: np.dtype('<f8') if f.type in (float, 'float') else np.dtype('<i8')
+                for f in fields(DroneSelfState)}
+TIME_DTYPE = np.dtype('<f8')
+
+INITIAL_CAPACITY = 256
+# Samples per track looked at to estimate the typical sample interval
+PERIOD_SAMPLES = 4096
+
+
+def sample_time(timestamp, index, rx_time=None):
+    """
+    Default time (s) of a sample: its device timestamp, else the host receive
+    time 'rx_time' (live data), else its index in the drone's track. Shared
+    by DroneTrack.append and the recorder's journal, so both give a sample the same time.
+    """
+    if timestamp:
+        return timestamp * DEVICE_TIME_UNIT
+    return float(index) if rx_time is None else rx_time
+
+
+class StateRow:
+    """
+    Read-only view of one sample, with the same attributes as DroneSelfState.
+    Costs two references; values are read from the columns on access.
+    """
+
+    __slots__ = ("_track", "_index")
+
+    def __init__(self, track, index):
+        self._track = track
+        self._index = index
+
+    def __getattr__(self, name):
+        try:
+            col = self._track._cols[name]
+        except KeyError:
+            raise AttributeError(name) from None
+        return col[self._index].item()
+
+    @property
+    def t(self):
+        return self._track._time[self._index].item()
+
+    def to_state(self):
+        return DroneSelfState.from_row(self._track._cols, self._index)
+
+    def to_dict(self):
+        return {f: self._track._cols[f][self._index].item() for f in STATE_FIELDS}
+
+    def __repr__(self):
+        return f"StateRow({self.to_dict()})"
+
+
+class DroneTrack:
+    """
+    History of one drone: one NumPy column per field plus a time column
+    shared by all of them. Appends are amortized O(1) (capacity doubles),
+    indexing is O(1) and column() returns a zero-copy view.
+
+    The time column never decreases (a sample older than the previous one,
+    e.g. out of order or after a device clock reset, gets the previous
+    time), so it doubles as a sorted index: index_at() / locate() find the
+    samples around any time by binary search.
+    """
+
+    def __init__(self, drone_id, capacity=INITIAL_CAPACITY):
+        self.drone_id = drone_id
+        self._n = 0
+        self._cols = {f: np.empty(capacity, dtype=FIELD_DTYPES[f]) for f in STATE_FIELDS}
+        self._time = np.empty(capacity, dtype=TIME_DTYPE)
+        # Samples removed by drop_first(): untimed samples are numbered from the start of the track
+        self._dropped = 0
+        # Decimated samples older than the live retention window (core.history.DecimatedTier),
+        # finest first; empty unless a HistoryPolicy has moved samples out
+        self.tiers = []
+
+    @classmethod
+    def from_columns(cls, drone_id, columns, time):
+        """
+        Wraps existing arrays (e.g. read-only np.memmap views) without copying.
+        The first append copies them into memory (the track is full, so it grows).
+        """
+        track = cls(drone_id, capacity=0)
+        track._cols = {f: columns[f] for f in STATE_FIELDS}
+        track._time = time
+        track._n = len(time)
+        return track
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def capacity(self):
+        return len(self._time)
+
+    def _grow(self, needed):
+        capacity = max(self.capacity * 2, needed, INITIAL_CAPACITY)
+        n = self._n
+        for f, col in self._cols.items():
+            new = np.empty(capacity, dtype=col.dtype)
+            new[:n] = col[:n]
+            self._cols[f] = new
+        new = np.empty(capacity, dtype=TIME_DTYPE)
+        new[:n] = self._time[:n]
+        self._time = new
+
+    def append(self, state, t=None, rx_time=None):
+        """
+        Appends one DroneSelfState (or anything with the same attributes).
+        't' defaults to sample_time(): the device timestamp in seconds, else 'rx_time',
+        else the sample index (counted from the first sample ever appended, so
+        drop_first() doesn't reset it).
+        """
+        i = self._n
+        if i == self.capacity:
+            self._grow(i + 1)
+        cols = self._cols
+        for f in STATE_FIELDS:
+            cols[f][i] = getattr(state, f)
+        if t is None:
+            t = sample_time(state.timestamp, self._dropped + i, rx_time)
+        if i and t < self._time[i - 1]:
+            t = self._time[i - 1]
+        self._time[i] = t
+        self._n = i + 1
+
+    def extend_columns(self, columns, t=None):
+        """Appends whole columns at once: {field: sequence}. Missing fields are left as 0."""
+        count = len(next(iter(columns.values()))) if columns else 0
+        if count == 0:
+            return
+        start, end = self._n, self._n + count
+        if end > self.capacity:
+            self._grow(end)
+        for f in STATE_FIELDS:
+            if f in columns:
+                self._cols[f][start:end] = columns[f]
+            else:
+                self._cols[f][start:end] = 0
+        if t is None:
+            ts = self._cols['timestamp'][start:end]
+            index = np.arange(start, end, dtype=TIME_DTYPE) + self._dropped
+            t = np.where(ts != 0, ts * DEVICE_TIME_UNIT, index)
+        time = self._time[start:end]
+        time[:] = t
+        if start:
+            np.maximum(time, self._time[start - 1], out=time)
+        np.maximum.accumulate(time, out=time)
+        self._n = end
+
+    def compact(self):
+        """Drops the spare capacity (e.g. after a bulk load), one column at a time."""
+        n = self._n
+        if self.capacity == n:
+            return
+        for f, col in self._cols.items():
+            self._cols[f] = col[:n].copy()
+        self._time = self._time[:n].copy()
+
+    def drop_first(self, count):
+        """Removes the 'count' oldest samples. The rest moves down; the capacity is kept for new appends."""
+        n = self._n
+        count = min(count, n)
+        keep = n - count
+        if not self._time.flags.writeable:
+            # Memory-mapped recording: copy what stays
+            self._cols = {f: col[count:n].copy() for f, col in self._cols.items()}
+            self._time = self._time[count:n].copy()
+        else:
+            for col in self._cols.values():
+                col[:keep] = col[count:n]
+            self._time[:keep] = self._time[count:n]
+        self._n = keep
+        self._dropped += count
+
+    def __getitem__(self, index):
+        n = self._n
+        if isinstance(index, slice):
+            return [StateRow(self, i) for i in range(*index.indices(n))]
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError(f"sample {index} out of range for drone {self.drone_id} ({n} samples)")
+        return StateRow(self, index)
+
+    def __iter__(self):
+        return (StateRow(self, i) for i in range(self._n))
+
+    def column(self, field):
+        """Zero-copy view of one field. Stays valid but stops following appends once the track grows."""
+        return self._cols[field][:self._n]
+
+    def column_range(self, field, start, stop):
+        """
+        Samples [start, stop) of one field, sliced from the column itself: on an
+        archive (ChunkedColumn) only the chunks they cover are decoded.
+        """
+        return self._cols[field][start:min(stop, self._n)]
+
+    @property
+    def time(self):
+        return self._time[:self._n]
+
+    @property
+    def end_time(self):
+        """Time of the newest sample (None if empty)."""
+        return self._time[self._n - 1].item() if self._n else None
+
+    # --- Time index ---
+
+    def index_at(self, t):
+        """Last sample at or before time 't' (the first one if 't' is earlier). O(log n)."""
+        i = int(np.searchsorted(self._time[:self._n], t, side='right')) - 1
+        return min(max(i, 0), self._n - 1)
+
+    def locate(self, t):
+        """
+        (i, j, alpha) for interpolating at time 't': the samples before and after
+        it (j == i at either end of the track) and the fraction of the way from i to j.
+        """
+        i = self.index_at(t)
+        j = i + 1
+        if j >= self._n:
+            return i, i, 0.0
+        t0 = self._time[i].item()
+        t1 = self._time[j].item()
+        if t <= t0 or t1 <= t0:
+            return i, j, 0.0
+        return i, j, min((t - t0) / (t1 - t0), 1.0)
+
+    def to_states(self):
+        cols = [self._cols[f][:self._n].tolist() for f in STATE_FIELDS]
+        return [DroneSelfState(*row) for row in zip(*cols)]
+
+    def to_dicts(self):
+        cols = [self._cols[f][:self._n].tolist() for f in STATE_FIELDS]
+        return [dict(zip(STATE_FIELDS, row)) for row in zip(*cols)]
+
+    @property
+    def nbytes(self):
+        return (sum(c.nbytes for c in self._cols.values()) + self._time.nbytes
+                + sum(tier.nbytes for tier in self.tiers))
+
+
+class TelemetryStore:
+    """
+    Columnar history of every drone, replacing List[List[DroneSelfState]].
+    Behaves like the old list: store[drone_id - 1] is that drone's DroneTrack
+    (an empty one for ids never seen), len(store) is the highest id seen, and
+    iterating yields the tracks in id order.
+    """
+
+    def __init__(self):
+        self._tracks = []
+
+    def __len__(self):
+        return len(self._tracks)
+
+    def __iter__(self):
+        return iter(self._tracks)
+
+    def __getitem__(self, index):
+        return self._tracks[index]
+
+    def track(self, drone_id, create=False):
+        """The DroneTrack of 'drone_id' (None if unknown, unless create=True)."""
+        idx = drone_id - 1
+        if idx >= len(self._tracks):
+            if not create:
+                return None
+            while len(self._tracks) <= idx:
+                self._tracks.append(DroneTrack(len(self._tracks) + 1))
+        return self._tracks[idx]
+
+    def append(self, state, t=None, rx_time=None):
+        """Appends one sample. Returns True if it is the first sample of its drone."""
+        track = self.track(state.id, create=True)
+        is_new = len(track) == 0
+        track.append(state, t, rx_time)
+        return is_new
+
+    def add_track(self, track):
+        """Installs a DroneTrack (e.g. DroneTrack.from_columns) in place of the one for its id."""
+        self.track(track.drone_id, create=True)
+        self._tracks[track.drone_id - 1] = track
+
+    def drone_ids(self):
+        return [t.drone_id for t in self._tracks if len(t)]
+
+    @property
+    def max_len(self):
+        return max((len(t) for t in self._tracks), default=0)
+
+    def time_range(self, include_history=False):
+        """
+        (first, last) sample time over all drones, or None if there are no samples.
+        include_history: start at the oldest decimated bucket (DroneTrack.tiers) instead.
+        """
+        tracks = [t for t in self._tracks if len(t)]
+        if not tracks:
+            return None
+        first = min(t._time[0].item() for t in tracks)
+        if include_history:
+            first = min([first] + [tier.series("id")[0][0].item() for t in tracks for tier in t.tiers if len(tier)])
+        return first, max(t._time[len(t) - 1].item() for t in tracks)
+
+    def sample_period(self):
+        """Typical interval between samples (median over the start of every track), 1.0 if unknown."""
+        steps = [np.diff(t._time[:min(len(t), PERIOD_SAMPLES)]) for t in self._tracks if len(t) > 1]
+        steps = np.concatenate(steps) if steps else np.empty(0)
+        steps = steps[steps > 0]
+        return float(np.median(steps)) if len(steps) else 1.0
+
+    @property
+    def nbytes(self):
+        return sum(t.nbytes for t in self._tracks)
+
+    def clear(self):
+        self._tracks = []
+
+    def compact(self):
+        for track in self._tracks:
+            track.compact()
+
+    # --- Conversion ---
+
+    @classmethod
+    def from_trajectories(cls, trajectories):
+        """From List[List[DroneSelfState]] (one list per drone, index = id - 1)."""
+        store = cls()
+        for i, path in enumerate(trajectories):
+            track = store.track(path[0].id if path else i + 1, create=True)
+            track.extend_columns({f: [getattr(s, f) for s in path] for f in STATE_FIELDS})
+        return store
+
+    @classmethod
+    def from_dict_lists(cls, raw_data):
+        """From the JSON recording layout: List[List[dict]], built column by column."""
+        store = cls()
+        for i, raw_path in enumerate(raw_data):
+            drone_id = raw_path[0]['id'] if raw_path else i + 1
+            track = store.track(drone_id, create=True)
+            present = raw_path[0].keys() if raw_path else ()
+            unknown = set(present) - set(STATE_FIELDS)
+            if unknown:
+                raise TypeError(f"Unknown field(s) in recording: {sorted(unknown)}")
+            track.extend_columns({f: [d[f] for d in raw_path] for f in STATE_FIELDS if f in present})
+        return store
+
+    def to_dict_lists(self):
+        """JSON recording layout: List[List[dict]]."""
+        return [track.to_dicts() for track in self._tracks]
@@ -3,7 +3,6 @@ import os
 import json
 import random
 import math
-from dataclasses import asdict
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 root_dir = os.path.dirname(current_dir)
@@ -147,7 +146,7 @@ def generate_file():
     try:
         serializable_data = []
         for path in trajectories:
-            path_dicts = [asdict(state) for state in path]
+            path_dicts = [state.to_dict() for state in path]
             serializable_data.append(path_dicts)
             
         with open(output_path, 'w') as f:
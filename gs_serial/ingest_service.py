@@ -0,0 +1,482 @@
+import asyncio
+import heapq
+import itertools
+import os
+import stat
+import threading
+import time
+from urllib.parse import urlsplit
+
+from core.drone_state import DEVICE_TIME_UNIT
+from core.link_stats import CLOCK_RESET
+from gs_serial.serial_bridge import SerialBridge, READ_BATCH_SIZE
+from gs_serial.stream_manager import (DEFAULT_BAUDRATE, BACKOFF_INITIAL, BACKOFF_MAX,
+                                      device_key)
+
+try:
+    import serial
+except ImportError:  # Only needed for serial sources
+    serial = None
+
+# Source kinds and their spec syntax
+#   serial:///dev/ttyUSB0   (or a bare /dev/tty* path)
+#   fifo:///tmp/drone_pipe  (or any other bare path: named pipe or file)
+#   udp://0.0.0.0:14550     bind and receive datagrams
+#   tcp://10.0.0.2:5760     connect to a TCP server
+#   tcp-listen://0.0.0.0:5760   accept TCP clients (each connection gets its own decoder)
+SERIAL = "serial"
+FIFO = "fifo"
+UDP = "udp"
+TCP = "tcp"
+TCP_LISTEN = "tcp-listen"
+SOURCE_KINDS = (SERIAL, FIFO, UDP, TCP, TCP_LISTEN)
+
+# States are held this long (host clock) so packets of the same drone coming
+# from different sources can be put back in device-timestamp order
+REORDER_WINDOW = 0.05
+
+
+class SourceSpec:
+    """A parsed source description (see SOURCE_KINDS)."""
+
+    def __init__(self, kind, path=None, host=None, port=None, text=None):
+        if kind not in SOURCE_KINDS:
+            raise ValueError(f"Unknown source kind '{kind}'. Expected one of {SOURCE_KINDS}")
+        self.kind = kind
+        self.path = path
+        self.host = host
+        self.port = port
+        self.text = text or (path if path else f"{kind}://{host}:{port}")
+
+    @property
+    def key(self):
+        """Identity used to refuse a second reader on the same source."""
+        if self.path:
+            return device_key(self.path)
+        return f"{self.kind}://{self.host}:{self.port}"
+
+    def __repr__(self):
+        return f"SourceSpec({self.text!r})"
+
+
+def parse_source(text):
+    """Parses 'udp://host:port', 'tcp://...', 'tcp-listen://...', 'serial://path', 'fifo://path' or a bare path."""
+    text = text.strip()
+    if "://" not in text:
+        kind = SERIAL if text.startswith("/dev/tty") else FIFO
+        return SourceSpec(kind, path=text, text=text)
+
+    parts = urlsplit(text)
+    kind = parts.scheme.lower()
+    if kind in (SERIAL, FIFO):
+        path = parts.netloc + parts.path
+        if not path:
+            raise ValueError(f"Source '{text}' has no path")
+        return SourceSpec(kind, path=path, text=text)
+    if kind in (UDP, TCP, TCP_LISTEN):
+        if parts.port is None:
+            raise ValueError(f"Source '{text}' needs a port (e.g. {kind}://127.0.0.1:5760)")
+        return SourceSpec(kind, host=parts.hostname or "0.0.0.0", port=parts.port, text=text)
+    raise ValueError(f"Unknown source kind '{kind}' in '{text}'. Expected one of {SOURCE_KINDS}")
+
+
+class TimeOrderedMerger:
+    """
+    Merges the states of every source into one stream that is time-ordered
+    per drone. Each state waits up to 'window' seconds (host clock) in a
+    per-drone heap keyed by its device timestamp; a state older than the
+    last one released for its drone is dropped ('late'), as is a second copy
+    of the same timestamp ('duplicates', e.g. two radios hearing one packet).
+    A state more than CLOCK_RESET seconds (and well over the window) older
+    than that is a device clock reset ('clock_resets'): the drone's ordering
+    starts over from it. States without a timestamp can't be ordered and
+    pass straight through.
+    """
+
+    def __init__(self, window=REORDER_WINDOW):
+        self.window = window
+        # Backward jump (device clock units) taken as a clock reset
+        self._reset_jump = max(CLOCK_RESET, 20 * window) / DEVICE_TIME_UNIT
+        self._heaps = {}
+        self._last_ts = {}
+        self._seq = itertools.count()
+        self._pending = []
+
+        # Counters
+        self.merged = 0
+        self.duplicates = 0
+        self.late = 0
+        self.clock_resets = 0
+
+    def __len__(self):
+        return sum(len(h) for h in self._heaps.values()) + len(self._pending)
+
+    def push(self, states, rx_time):
+        heaps = self._heaps
+        for state in states:
+            ts = state.timestamp
+            if not ts:
+                self._pending.append((state, rx_time))
+                continue
+            heap = heaps.get(state.id)
+            if heap is None:
+                heap = heaps[state.id] = []
+            heapq.heappush(heap, (ts, next(self._seq), state, rx_time))
+
+    def pop_ready(self, now, flush_all=False):
+        """Returns the (state, rx_time) pairs whose window has passed, per-drone ordered."""
+        out = self._pending
+        self._pending = []
+        deadline = now - self.window
+        last_ts = self._last_ts
+        for drone_id, heap in self._heaps.items():
+            last = last_ts.get(drone_id)
+            while heap and (flush_all or heap[0][3] <= deadline):
+                ts, _, state, rx_time = heapq.heappop(heap)
+                if last is not None and last - ts > self._reset_jump:
+                    self._clock_reset(heap, last, out)
+                    last = None
+                if last is not None and ts <= last:
+                    if ts == last:
+                        self.duplicates += 1
+                    else:
+                        self.late += 1
+                    continue
+                last = ts
+                out.append((state, rx_time))
+            if last is not None:
+                last_ts[drone_id] = last
+        self.merged += len(out)
+        return out
+
+    def _clock_reset(self, heap, last, out):
+        """
+        A drone's clock went back: states still held from before the reset
+        are released now (in order, late ones dropped), the rest stay queued.
+        """
+        self.clock_resets += 1
+        old_clock = last - self._reset_jump
+        before = sorted(entry for entry in heap if entry[0] > old_clock)
+        heap[:] = [entry for entry in heap if entry[0] <= old_clock]
+        heapq.heapify(heap)
+        for ts, _, state, rx_time in before:
+            if ts <= last:
+                if ts == last:
+                    self.duplicates += 1
+                else:
+                    self.late += 1
+                continue
+            last = ts
+            out.append((state, rx_time))
+
+    def stats(self):
+        return {'pending': len(self), 'merged': self.merged, 'duplicates': self.duplicates,
+                'late': self.late, 'clock_resets': self.clock_resets}
+
+
+class _SourceStats:
+    __slots__ = ("spec", "status", "connects", "disconnects", "bytes", "states")
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.status = "starting"
+        self.connects = 0
+        self.disconnects = 0
+        self.bytes = 0
+        self.states = 0
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self, service, bridge, source_stats):
+        self.service = service
+        self.bridge = bridge
+        self.bridge.source_name = source_stats.spec.text
+        self.source_stats = source_stats
+
+    def datagram_received(self, data, addr):
+        self.source_stats.bytes += len(data)
+        # Every datagram is a new chunk of the stream; packets may straddle datagrams
+        self.service._deliver(self.bridge.feed(data), self.bridge.last_rx_time, self.source_stats)
+
+    def error_received(self, exc):
+        print(f"UDP source {self.source_stats.spec.text}: {exc}")
+
+
+class IngestService:
+    """
+    asyncio ingest for any number of sources in one event loop thread.
+
+    Every source (or accepted TCP connection) gets its own SerialBridge from
+    'bridge_factory', so framing and layout detection never mix streams.
+    Decoded states from all sources go through a TimeOrderedMerger and are
+    handed to on_states(states, rx_time) from the loop thread; the callback
+    must be thread-safe (e.g. IngestQueue.put_many).
+
+    connect()/disconnect()/is_connected()/stop_all() mirror StreamManager,
+    so main.py can use either.
+    """
+
+    def __init__(self, on_states, bridge_factory=None, read_size=READ_BATCH_SIZE,
+                 baudrate=DEFAULT_BAUDRATE, low_latency=False, reconnect=True,
+                 reorder_window=REORDER_WINDOW,
+                 backoff_initial=BACKOFF_INITIAL, backoff_max=BACKOFF_MAX):
+        self.on_states = on_states
+        self.bridge_factory = bridge_factory or (lambda: SerialBridge(layout="auto"))
+        self.read_size = read_size
+        self.baudrate = baudrate
+        self.low_latency = low_latency
+        self.reconnect = reconnect
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.merger = TimeOrderedMerger(reorder_window)
+
+        self.loop = None
+        self._thread = None
+        self._started = threading.Event()
+        self._tasks = {}     # spec key -> asyncio.Task   (loop thread only)
+        self._sources = {}   # spec key -> _SourceStats
+        self._flush_handle = None
+
+    # --- Control (any thread) ---
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._started.clear()
+        self._thread = threading.Thread(target=self._run_loop, name="ingest-service", daemon=True)
+        self._thread.start()
+        self._started.wait()
+
+    def connect(self, source, on_states=None):
+        """
+        Adds a source (spec string or SourceSpec) and returns its SourceSpec.
+        A source that is already being read is not opened twice.
+        'on_states' is accepted for StreamManager compatibility; all sources share the service callback.
+        Reader options (baudrate, read_size, ...) are set for all sources on the service.
+        """
+        spec = parse_source(source) if isinstance(source, str) else source
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(self._add_source(spec), self.loop)
+        future.result()
+        return spec
+
+    def disconnect(self, source, timeout=2.0):
+        """Stops one source. Returns False if it wasn't connected."""
+        if self.loop is None:
+            return False
+        spec = parse_source(source) if isinstance(source, str) else source
+        future = asyncio.run_coroutine_threadsafe(self._remove_source(spec.key), self.loop)
+        return future.result(timeout)
+
+    def is_connected(self, source):
+        spec = parse_source(source) if isinstance(source, str) else source
+        return spec.key in self._sources
+
+    def stop_all(self, timeout=2.0):
+        """Closes every source, delivers what the merger still holds and ends the loop thread."""
+        if self.loop is None or not self._thread.is_alive():
+            return
+        future = asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop)
+        try:
+            future.result(timeout)
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout)
+
+    def stats(self):
+        return {
+            'merger': self.merger.stats(),
+            'sources': {s.spec.text: {'status': s.status, 'connects': s.connects,
+                                      'disconnects': s.disconnects, 'bytes': s.bytes,
+                                      'states': s.states}
+                        for s in list(self._sources.values())},
+        }
+
+    # --- Loop thread ---
+
+    def _run_loop(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        if self.merger.window > 0:
+            self._flush_handle = self.loop.call_soon(self._flush)
+        self._started.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    async def _add_source(self, spec):
+        if spec.key in self._tasks:
+            print(f"Already connected to {spec.text}; ignoring second connect.")
+            return
+        source_stats = self._sources[spec.key] = _SourceStats(spec)
+        task = asyncio.get_running_loop().create_task(self._run_source(spec, source_stats))
+        self._tasks[spec.key] = task
+
+    async def _remove_source(self, key):
+        task = self._tasks.get(key)
+        if task is None:
+            return False
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return True
+
+    async def _shutdown(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        self._emit(self.merger.pop_ready(time.perf_counter(), flush_all=True))
+
+    async def _run_source(self, spec, source_stats):
+        backoff = self.backoff_initial
+        try:
+            while True:
+                source_stats.status = "connecting"
+                once = False
+                states_before = source_stats.states
+                try:
+                    if spec.kind in (SERIAL, FIFO):
+                        once = await self._read_device(spec, source_stats)
+                    elif spec.kind == TCP:
+                        await self._read_tcp(spec, source_stats)
+                    elif spec.kind == UDP:
+                        await self._read_udp(spec, source_stats)
+                    else:
+                        await self._serve_tcp(spec, source_stats)
+                    print(f"Stream Ended: {spec.text}")
+                except (OSError, ValueError, RuntimeError) as e:
+                    print(f"Stream Error on {spec.text}: {e}")
+                source_stats.disconnects += 1
+                # The connection delivered data (even if it then failed): retry quickly again
+                if source_stats.states > states_before:
+                    backoff = self.backoff_initial
+
+                if not self.reconnect or once:
+                    break
+                source_stats.status = "waiting"
+                print(f"Reconnecting to {spec.text} in {backoff:.1f}s...")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2.0, self.backoff_max)
+        finally:
+            source_stats.status = "stopped"
+            self._tasks.pop(spec.key, None)
+            self._sources.pop(spec.key, None)
+
+    def _connected(self, spec, source_stats):
+        source_stats.status = "connected"
+        source_stats.connects += 1
+        print(f"Stream Connected: {spec.text}")
+
+    async def _read_device(self, spec, source_stats):
+        """Serial port, FIFO or file. Returns True if it was a regular file (read once)."""
+        bridge = self.bridge_factory()
+        bridge.source_name = spec.text
+        serial_obj = None
+        if spec.kind == SERIAL:
+            if serial is None:
+                raise RuntimeError("pyserial is required for serial sources")
+            serial_obj = serial.Serial(spec.path, self.baudrate, timeout=0, exclusive=True)
+            if self.low_latency and hasattr(serial_obj, 'set_low_latency_mode'):
+                serial_obj.set_low_latency_mode(True)
+            fd = serial_obj.fileno()
+            is_file = False
+        else:
+            fd = os.open(spec.path, os.O_RDONLY | os.O_NONBLOCK)
+            is_file = stat.S_ISREG(os.fstat(fd).st_mode)
+        source = serial_obj if serial_obj is not None else fd
+        self._connected(spec, source_stats)
+
+        loop = asyncio.get_running_loop()
+        readable = asyncio.Event()
+        try:
+            if not is_file:
+                loop.add_reader(fd, readable.set)
+            while True:
+                if is_file:
+                    # Regular files are always readable (and epoll rejects them); just yield
+                    await asyncio.sleep(0)
+                else:
+                    await readable.wait()
+                    readable.clear()
+                before = bridge.link_stats.bytes_read
+                states = bridge.read_states(source, self.read_size)
+                source_stats.bytes += bridge.link_stats.bytes_read - before
+                if states is None:
+                    return is_file
+                self._deliver(states, bridge.last_rx_time, source_stats)
+        finally:
+            if not is_file:
+                loop.remove_reader(fd)
+            if serial_obj is not None:
+                serial_obj.close()
+            else:
+                os.close(fd)
+
+    async def _read_stream(self, reader, spec, source_stats):
+        bridge = self.bridge_factory()
+        bridge.source_name = spec.text
+        while True:
+            chunk = await reader.read(self.read_size)
+            if not chunk:
+                return
+            source_stats.bytes += len(chunk)
+            self._deliver(bridge.feed(chunk), bridge.last_rx_time, source_stats)
+
+    async def _read_tcp(self, spec, source_stats):
+        reader, writer = await asyncio.open_connection(spec.host, spec.port)
+        self._connected(spec, source_stats)
+        try:
+            await self._read_stream(reader, spec, source_stats)
+        finally:
+            writer.close()
+
+    async def _serve_tcp(self, spec, source_stats):
+        async def handle(reader, writer):
+            peer = writer.get_extra_info('peername')
+            print(f"TCP client connected to {spec.text}: {peer}")
+            try:
+                await self._read_stream(reader, spec, source_stats)
+            except OSError as e:
+                print(f"TCP client {peer} error: {e}")
+            finally:
+                writer.close()
+                print(f"TCP client disconnected from {spec.text}: {peer}")
+
+        server = await asyncio.start_server(handle, spec.host, spec.port)
+        self._connected(spec, source_stats)
+        async with server:
+            await server.serve_forever()
+
+    async def _read_udp(self, spec, source_stats):
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _DatagramProtocol(self, self.bridge_factory(), source_stats),
+            local_addr=(spec.host, spec.port))
+        self._connected(spec, source_stats)
+        try:
+            # Datagrams are handled by the protocol; wait here until cancelled
+            await loop.create_future()
+        finally:
+            transport.close()
+
+    def _deliver(self, states, rx_time, source_stats):
+        if not states:
+            return
+        source_stats.states += len(states)
+        if self.merger.window > 0:
+            self.merger.push(states, rx_time)
+        else:
+            self.on_states(states, rx_time)
+
+    def _flush(self):
+        self._emit(self.merger.pop_ready(time.perf_counter()))
+        self._flush_handle = self.loop.call_later(self.merger.window / 2.0, self._flush)
+
+    def _emit(self, ready):
+        if not ready:
+            return
+        # One hand-off per flush; the oldest receive time stands for the batch
+        self.on_states([state for state, _ in ready], min(rx for _, rx in ready))
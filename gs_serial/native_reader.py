@@ -0,0 +1,152 @@
+import ctypes
+import os
+from itertools import repeat
+import numpy as np
+
+from core.drone_state import DroneSelfState
+from gs_serial import protocols
+
+# Built by `make -C gs_serial`
+DEFAULT_LIB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "libgs_serial_reader.so")
+
+# Mirrors struct gs_state_record in serial_reader.h
+NATIVE_RECORD_DTYPE = np.dtype([
+    ('id', '<i4'),
+    ('lat', '<f4'),
+    ('lon', '<f4'),
+    ('alt', '<f4'),
+    ('velocity_north', '<f4'),
+    ('velocity_east', '<f4'),
+    ('velocity_down', '<f4'),
+    ('heading', '<f4'),
+    ('timestamp', '<i8'),
+    ('sm_current_stat', '<i4'),
+])
+
+# gs_read_batch return codes
+GS_READ_EOF = -1
+GS_READ_ERROR = -2
+
+# The native decoder only speaks the 64-byte frame
+SUPPORTED_LAYOUTS = (protocols.GCS64.name,)
+
+
+class ReaderStats(ctypes.Structure):
+    _fields_ = [
+        ('bytes_read', ctypes.c_uint64),
+        ('packets', ctypes.c_uint64),
+        ('rejected', ctypes.c_uint64),
+        ('skipped_bytes', ctypes.c_uint64),
+    ]
+
+
+def load_library(lib_path):
+    """
+    Loads the native reader. Returns None (and says why) if it isn't built.
+    ctypes.CDLL releases the GIL for the duration of every call.
+    """
+    if not lib_path or not os.path.exists(lib_path):
+        print(f"Native reader not found at {lib_path}; using the pure-Python decoder. "
+              f"Build it with `make -C gs_serial`.")
+        return None
+    try:
+        lib = ctypes.CDLL(lib_path, use_errno=True)
+    except OSError as e:
+        print(f"Failed to load native reader {lib_path}: {e}. Using the pure-Python decoder.")
+        return None
+
+    size_p = ctypes.POINTER(ctypes.c_size_t)
+    lib.gs_decode_batch.argtypes = [ctypes.c_void_p, size_p, ctypes.c_size_t,
+                                    ctypes.c_void_p, ctypes.c_size_t, ctypes.POINTER(ReaderStats)]
+    lib.gs_decode_batch.restype = ctypes.c_long
+    lib.gs_read_batch.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_size_t,
+                                  size_p, size_p, ctypes.c_size_t,
+                                  ctypes.c_void_p, ctypes.c_size_t, ctypes.POINTER(ReaderStats)]
+    lib.gs_read_batch.restype = ctypes.c_long
+    return lib
+
+
+class NativeReader:
+    """
+    Accelerated read + sync + validate + decode for the 'gcs64' layout.
+    Works directly on a RingBuffer's storage so it can be mixed with the
+    pure-Python path (e.g. SerialBridge.feed()).
+    """
+
+    def __init__(self, lib, ring, max_records=4096):
+        self.lib = lib
+        self.ring = ring
+        self.records = np.empty(max_records, dtype=NATIVE_RECORD_DTYPE)
+        self.stats = ReaderStats()
+        self._read_pos = ctypes.c_size_t(0)
+        self._write_pos = ctypes.c_size_t(0)
+
+    def _buffer_address(self):
+        return ctypes.addressof(ctypes.c_char.from_buffer(self.ring.data))
+
+    def read(self, fd, read_size):
+        """
+        One read() from 'fd' plus batch decode. Returns a view of the decoded
+        records (valid until the next call), or None on EOF.
+        Raises OSError on read errors.
+        """
+        ring = self.ring
+        if ring.capacity - ring.write_pos < read_size:
+            # Let the ring grow if the unread tail plus a full read doesn't fit
+            ring.reserve(read_size).release()
+
+        self._read_pos.value = ring.read_pos
+        self._write_pos.value = ring.write_pos
+        n = self.lib.gs_read_batch(
+            fd, self._buffer_address(), ring.capacity,
+            ctypes.byref(self._read_pos), ctypes.byref(self._write_pos), read_size,
+            self.records.ctypes.data, len(self.records), ctypes.byref(self.stats))
+        self._sync_ring()
+
+        if n == GS_READ_EOF:
+            return None
+        if n == GS_READ_ERROR:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err) if err else "native read failed")
+        records = self.records[:n]
+        if n == len(self.records):
+            # Output array was full; decode the rest of the buffered bytes too
+            records = records.copy()
+            records = np.concatenate([records, self.decode_buffered()])
+        return records
+
+    def decode_buffered(self):
+        """Decodes whatever is already in the ring buffer without reading."""
+        ring = self.ring
+        chunks = []
+        while True:
+            self._read_pos.value = ring.read_pos
+            n = self.lib.gs_decode_batch(
+                self._buffer_address(), ctypes.byref(self._read_pos), ring.write_pos,
+                self.records.ctypes.data, len(self.records), ctypes.byref(self.stats))
+            self._write_pos.value = ring.write_pos
+            self._sync_ring()
+            chunks.append(self.records[:n].copy())
+            if n < len(self.records):
+                break
+        return np.concatenate(chunks)
+
+    def _sync_ring(self):
+        ring = self.ring
+        ring.read_pos = self._read_pos.value
+        ring.write_pos = self._write_pos.value
+        if ring.read_pos == ring.write_pos:
+            ring.clear()
+
+
+def states_from_native_records(records, layout=protocols.GCS64):
+    """Converts NATIVE_RECORD_DTYPE records into DroneSelfState objects."""
+    if len(records) == 0:
+        return []
+    cols = []
+    for f in protocols.STATE_FIELDS:
+        if f in NATIVE_RECORD_DTYPE.names:
+            cols.append(records[f].tolist())
+        else:
+            cols.append(repeat(layout.defaults[f]))
+    return [DroneSelfState(*row) for row in zip(*cols)]
@@ -0,0 +1,413 @@
+# Registry of the binary packet layouts spoken by the drones.
+# Each layout is declared once; the struct, NumPy dtype, scalar decoder,
+# vectorized decoder and encoder are all derived from that declaration.
+import re
+import struct
+from itertools import repeat
+
+import numpy as np
+
+from core.drone_state import DroneSelfState, STATE_FIELDS
+
+# struct code -> NumPy scalar type (all layouts are little endian)
+_NUMPY_CODES = {
+    'b': 'i1', 'B': 'u1', 'h': '<i2', 'H': '<u2', 'i': '<i4', 'I': '<u4',
+    'q': '<i8', 'Q': '<u8', 'f': '<f4', 'd': '<f8',
+}
+_FIELD_CODE = re.compile(r'^(\d*)([bBhHiIqQfds])$')
+_SOURCE_REF = re.compile(r'^(\w+)(?:\[(\d+)\])?$')
+
+# How many bytes detect_layout() looks at by default
+DETECT_BYTES = 4096
+# Fraction of the sample that must decode into valid packets
+DETECT_MIN_COVERAGE = 0.5
+DETECT_MIN_PACKETS = 3
+
+
+def validate_columns(ids, lat, lon):
+    """
+    Vectorized packet sanity check (same rule as SerialBridge.validate_packet).
+    Written as 'not greater' so NaN passes, exactly like the scalar check.
+    """
+    return ((ids > 0) & (ids <= 255)
+            & ~(np.abs(lat) > 90.0) & ~(np.abs(lon) > 180.0))
+
+
+class PacketLayout:
+    """
+    One wire format.
+
+    wire_fields: list of (name, struct code) in wire order, e.g. ('pos', '3f').
+    state_map:   DroneSelfState field -> wire reference ('id' or 'pos[0]').
+    bitfields:   DroneSelfState field -> (wire field, shift, width).
+    defaults:    DroneSelfState field -> constant for fields not on the wire.
+    constants:   wire field -> value written by encode() (e.g. the sync word).
+    """
+
+    def __init__(self, name, wire_fields, state_map, sync_marker=None,
+                 bitfields=None, defaults=None, constants=None, description=""):
+        self.name = name
+        self.description = description
+        self.wire_fields = list(wire_fields)
+        self.sync_marker = sync_marker
+        self.state_map = dict(state_map)
+        self.bitfields = dict(bitfields or {})
+        self.defaults = dict(defaults or {})
+        self.constants = dict(constants or {})
+
+        mapped = set(self.state_map) | set(self.bitfields) | set(self.defaults)
+        missing = [f for f in STATE_FIELDS if f not in mapped]
+        if missing:
+            raise ValueError(f"Layout '{name}' does not provide {missing}")
+
+        # --- Derived: struct / dtype ---
+        fmt = '<'
+        dtype_fields = []
+        self._tuple_index = {}   # wire field -> first index in the unpacked tuple
+        self._counts = {}
+        pos = 0
+        for wire_name, code in self.wire_fields:
+            m = _FIELD_CODE.match(code)
+            if not m:
+                raise ValueError(f"Layout '{name}': unsupported field code '{code}'")
+            count = int(m.group(1) or 1)
+            kind = m.group(2)
+            fmt += code
+            self._tuple_index[wire_name] = pos
+            if kind == 's':
+                dtype_fields.append((wire_name, f'S{count}'))
+                self._counts[wire_name] = 1
+                pos += 1
+            else:
+                if count == 1:
+                    dtype_fields.append((wire_name, _NUMPY_CODES[kind]))
+                else:
+                    dtype_fields.append((wire_name, _NUMPY_CODES[kind], (count,)))
+                self._counts[wire_name] = count
+                pos += count
+
+        self.fmt = fmt
+        self.struct = struct.Struct(fmt)
+        self.size = self.struct.size
+        self.dtype = np.dtype(dtype_fields)
+        if self.dtype.itemsize != self.size:
+            raise ValueError(f"Layout '{name}': dtype size {self.dtype.itemsize} != struct size {self.size}")
+
+        self.state_from_tuple = self._compile_decoder()
+        self.encode = self._compile_encoder()
+
+    def __repr__(self):
+        marker = self.sync_marker.hex() if self.sync_marker else "none"
+        return f"PacketLayout({self.name!r}, size={self.size}, sync={marker})"
+
+    # --- Scalar path ---
+
+    def tuple_index(self, state_field):
+        """Index of a directly mapped DroneSelfState field in the unpacked tuple."""
+        wire_name, elem = self._parse_ref(self.state_map[state_field])
+        return self._tuple_index[wire_name] + elem
+
+    def _parse_ref(self, ref):
+        m = _SOURCE_REF.match(ref)
+        if not m or m.group(1) not in self._tuple_index:
+            raise ValueError(f"Layout '{self.name}': bad wire reference '{ref}'")
+        return m.group(1), int(m.group(2) or 0)
+
+    def _compile_decoder(self):
+        # Generated once per layout, like collections.namedtuple does
+        args = []
+        for f in STATE_FIELDS:
+            if f in self.state_map:
+                args.append(f"{f}=t[{self.tuple_index(f)}]")
+            elif f in self.bitfields:
+                wire_name, shift, width = self.bitfields[f]
+                idx = self._tuple_index[wire_name]
+                args.append(f"{f}=(t[{idx}] >> {shift}) & {(1 << width) - 1}")
+            else:
+                args.append(f"{f}={self.defaults[f]!r}")
+        src = f"def state_from_tuple(t):\n    return DroneSelfState({', '.join(args)})\n"
+        namespace = {'DroneSelfState': DroneSelfState}
+        exec(src, namespace)
+        return namespace['state_from_tuple']
+
+    def _compile_encoder(self):
+        # Builds the flat value list in wire order, then packs with the precompiled struct
+        exprs = {}
+        for wire_name, code in self.wire_fields:
+            if code.endswith('s'):
+                exprs[wire_name] = [repr(self.constants.get(wire_name, b''))]
+            else:
+                exprs[wire_name] = [repr(self.constants.get(wire_name, 0))] * self._counts[wire_name]
+
+        codes = dict(self.wire_fields)
+        for f, ref in self.state_map.items():
+            wire_name, elem = self._parse_ref(ref)
+            cast = 'float' if codes[wire_name][-1] in 'fd' else 'int'
+            exprs[wire_name][elem] = f"{cast}(g(s, {f!r}))"
+
+        packed_bits = {}
+        for f, (wire_name, shift, width) in self.bitfields.items():
+            packed_bits.setdefault(wire_name, []).append(
+                f"((int(g(s, {f!r})) & {(1 << width) - 1}) << {shift})")
+        for wire_name, parts in packed_bits.items():
+            exprs[wire_name][0] = " | ".join(parts)
+
+        values = ", ".join(e for wire_name, _ in self.wire_fields for e in exprs[wire_name])
+        src = (
+            "def encode(s):\n"
+            "    g = _get_item if isinstance(s, dict) else getattr\n"
+            f"    return _pack({values})\n"
+        )
+        namespace = {'_pack': self.struct.pack, '_get_item': lambda d, k: d.get(k, 0)}
+        exec(src, namespace)
+        return namespace['encode']
+
+    # --- Vectorized path ---
+
+    def column(self, records, state_field):
+        """Returns one DroneSelfState field as an array over a record array."""
+        if state_field in self.state_map:
+            wire_name, elem = self._parse_ref(self.state_map[state_field])
+            col = records[wire_name]
+            return col[:, elem] if self._counts[wire_name] > 1 else col
+        if state_field in self.bitfields:
+            wire_name, shift, width = self.bitfields[state_field]
+            return (records[wire_name] >> shift) & ((1 << width) - 1)
+        return np.full(len(records), self.defaults[state_field])
+
+    def states_from_records(self, records):
+        """Converts a record array of this layout into DroneSelfState objects."""
+        if len(records) == 0:
+            return []
+        cols = []
+        for f in STATE_FIELDS:
+            if f in self.defaults and f not in self.state_map and f not in self.bitfields:
+                cols.append(repeat(self.defaults[f]))
+            else:
+                cols.append(self.column(records, f).tolist())
+        return [DroneSelfState(*row) for row in zip(*cols)]
+
+    def validate(self, records):
+        return validate_columns(self.column(records, 'id'),
+                                self.column(records, 'lat'),
+                                self.column(records, 'lon'))
+
+    def frame(self, buf, validate=None, stats=None):
+        """
+        Finds every packet in 'buf' and decodes them in one pass.
+        Returns (records, consumed): the accepted packets as an array of
+        self.dtype, and how many leading bytes of 'buf' can be discarded.
+        If given, 'stats' (core.link_stats.LinkStats) is told about
+        rejected packets and bytes skipped between packets.
+
+        Sync layouts: a packet starts at the first marker after the previous
+        packet and is consumed whether or not it validates.
+        Layouts without a marker: a packet starts at the first offset whose
+        contents validate (i.e. the stream slides one byte at a time).
+        """
+        validate = validate or self.validate
+        arr = np.frombuffer(buf, dtype=np.uint8)
+        n = len(arr)
+        size = self.size
+
+        if self.sync_marker:
+            m0, m1 = self.sync_marker[0], self.sync_marker[1]
+            candidates = np.flatnonzero((arr[:-1] == m0) & (arr[1:] == m1))
+        else:
+            candidates = np.flatnonzero(self._valid_offsets(buf, n, validate))
+
+        # Greedy framing walk over candidate positions (ints only, no unpacking)
+        starts = []
+        next_free = 0
+        consumed = None
+        for pos in candidates.tolist():
+            if pos < next_free:
+                # Inside an already framed packet
+                continue
+            if pos + size > n:
+                # Incomplete packet: keep it for the next read
+                consumed = pos
+                break
+            starts.append(pos)
+            next_free = pos + size
+
+        if consumed is None:
+            if self.sync_marker:
+                # No pending header. Keep last byte just in case
+                if n > next_free and arr[-1] == self.sync_marker[0]:
+                    consumed = n - 1
+                else:
+                    consumed = n
+            else:
+                # Offsets too close to the end could not be checked yet
+                consumed = min(n, max(next_free, n - size + 1))
+
+        if not starts:
+            if stats is not None:
+                stats.count_skipped(consumed)
+            return np.empty(0, dtype=self.dtype), consumed
+
+        count = len(starts)
+        if starts[-1] - starts[0] == (count - 1) * size:
+            # Back-to-back packets (the normal case): view them in place
+            records = np.frombuffer(buf, dtype=self.dtype, count=count, offset=starts[0])
+        else:
+            # Gather the framed packets into one contiguous block
+            rows = arr[np.asarray(starts)[:, None] + np.arange(size)]
+            records = rows.view(self.dtype).reshape(count)
+
+        if stats is not None:
+            stats.count_skipped(consumed - count * size)
+        if self.sync_marker:
+            mask = validate(records)
+            if stats is not None and not mask.all():
+                rejected = records[~mask]
+                stats.count_rejected(len(rejected), self.column(rejected, 'id').tolist())
+            records = records[mask]
+        return records, consumed
+
+    def _valid_offsets(self, buf, n, validate):
+        # Validity of a packet starting at every byte offset, 'size' strided passes
+        valid = np.zeros(max(n, 0), dtype=bool)
+        for phase in range(min(self.size, n)):
+            count = (n - phase) // self.size
+            if count <= 0:
+                continue
+            recs = np.frombuffer(buf, dtype=self.dtype, count=count, offset=phase)
+            valid[phase:phase + count * self.size:self.size] = validate(recs)
+        return valid
+
+
+_REGISTRY = {}
+
+
+def register(layout):
+    if layout.name in _REGISTRY:
+        raise ValueError(f"Layout '{layout.name}' is already registered")
+    _REGISTRY[layout.name] = layout
+    return layout
+
+
+def get_layout(name):
+    try:
+        return _REGISTRY[name]
+    except KeyError:
+        raise KeyError(f"Unknown packet layout '{name}'. Known layouts: {available_layouts()}") from None
+
+
+def available_layouts():
+    return list(_REGISTRY)
+
+
+def detect_layout(sample, validate=None, min_coverage=DETECT_MIN_COVERAGE):
+    """
+    Guesses the layout of a stream from its first few KB.
+    Each registered layout frames the sample; the one whose valid packets
+    cover the largest share of the bytes wins. Layouts with a sync marker
+    win ties. Returns None if nothing reaches 'min_coverage'.
+    """
+    n = len(sample)
+    if n == 0:
+        return None
+
+    best, best_score = None, 0.0
+    for layout in _REGISTRY.values():
+        records, _ = layout.frame(sample, validate)
+        if len(records) < DETECT_MIN_PACKETS:
+            continue
+        coverage = len(records) * layout.size / n
+        score = coverage + (1e-6 if layout.sync_marker else 0.0)
+        if score > best_score:
+            best, best_score = layout, score
+
+    if best_score < min_coverage:
+        return None
+    return best
+
+
+# --- Layouts ---
+
+# Format from device_utils.py:
+# Sync: H (2)
+# Pos: 3f (12)
+# Vel: 3f (12)
+# Hdg: 3f (12)
+# Time: q (8)
+# ID: H (2)
+# State: H (2)
+# Spare: 14s (14)
+# Total: 64 bytes
+GCS64 = register(PacketLayout(
+    name="gcs64",
+    description="64-byte ground station frame with 0xABCD sync word",
+    wire_fields=[
+        ('sync', 'H'),
+        ('pos', '3f'),
+        ('vel', '3f'),
+        ('hdg', '3f'),
+        ('time', 'q'),
+        ('id', 'H'),
+        ('state', 'H'),
+        ('spare', '14s'),
+    ],
+    sync_marker=b'\xcd\xab',  # 0xABCD little endian
+    state_map={
+        'id': 'id',
+        'lat': 'pos[0]',
+        'lon': 'pos[1]',
+        'alt': 'pos[2]',
+        'velocity_north': 'vel[0]',
+        'velocity_east': 'vel[1]',
+        'velocity_down': 'vel[2]',
+        'heading': 'hdg[0]',
+        'sm_current_stat': 'state',
+        'timestamp': 'time',
+    },
+    defaults={
+        'battery_precentages': 100,  # Not on the wire
+        'drones_keep_alive': 15,     # 1111
+        'gps_3d_fix': 1,
+    },
+    constants={'sync': 0xABCD},
+))
+
+# struct drone_self_state from gs_serial/serial_reader.h (#pragma pack(1), 36 bytes).
+# Keep-alive (4 bits, unit 1 at the LSB) and GPS fix (1 bit) share the last short.
+DRONE_SELF_STATE = register(PacketLayout(
+    name="drone_self_state",
+    description="Packed struct drone_self_state (serial_reader.h), no sync word",
+    wire_fields=[
+        ('id', 'h'),
+        ('lat', 'f'),
+        ('lon', 'f'),
+        ('alt', 'f'),
+        ('velocity_north', 'f'),
+        ('velocity_east', 'f'),
+        ('velocity_down', 'f'),
+        ('heading', 'f'),
+        ('sm_current_stat', 'h'),
+        ('battery_precentages', 'h'),
+        ('flags', 'h'),
+    ],
+    state_map={
+        'id': 'id',
+        'lat': 'lat',
+        'lon': 'lon',
+        'alt': 'alt',
+        'velocity_north': 'velocity_north',
+        'velocity_east': 'velocity_east',
+        'velocity_down': 'velocity_down',
+        'heading': 'heading',
+        'sm_current_stat': 'sm_current_stat',
+        'battery_precentages': 'battery_precentages',
+    },
+    bitfields={
+        'drones_keep_alive': ('flags', 0, 4),
+        'gps_3d_fix': ('flags', 4, 1),
+    },
+    defaults={
+        'timestamp': 0,  # No clock on the wire
+    },
+))
+
+DEFAULT_LAYOUT = GCS64
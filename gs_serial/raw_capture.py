@@ -0,0 +1,228 @@
+import json
+import struct
+import threading
+import time
+
+# Raw capture file: the bytes exactly as read from each source, for
+# reproducing decode problems and benchmarking decoders on real traffic.
+#
+#   preamble   MAGIC, format version (u32), header length (u32)
+#   header     UTF-8 JSON: wall-clock start time, protocol option
+#   records    RECORD (receive time in ns since the capture started, source id,
+#              kind, payload length), then the payload
+#
+# Kinds: SOURCE declares a new source id (payload: its name), DATA is one
+# read's bytes, RESET marks the decoder buffer being cleared (reconnect),
+# EOF the source reporting end of stream. Append-only; a torn last record
+# (crash) is ignored when reading.
+
+MAGIC = b"GSRAW\x00\r\n"
+VERSION = 1
+PREAMBLE = struct.Struct("<8sII")
+RECORD = struct.Struct("<QHHI")
+
+DATA = 0
+SOURCE = 1
+RESET = 2
+EOF = 3
+
+FLUSH_INTERVAL = 0.5    # s between flushes of the write buffer
+WRITE_BUFFER = 1 << 16
+
+
+class RawCaptureWriter:
+    """
+    Appends raw chunks to a capture file. Shared by every SerialBridge of a
+    session (thread-safe); each bridge registers itself as one source.
+    """
+
+    def __init__(self, path, protocol=None):
+        self.path = path
+        self._file = open(path, 'wb', buffering=WRITE_BUFFER)
+        header = json.dumps({'started': time.time(), 'protocol': protocol}).encode()
+        self._file.write(PREAMBLE.pack(MAGIC, VERSION, len(header)) + header)
+        self._file.flush()
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+        self._last_flush = self._t0
+        self._sources = 0
+
+        # Counters
+        self.chunks = 0
+        self.bytes = 0
+
+    def add_source(self, name):
+        """Registers a source and returns its id."""
+        with self._lock:
+            source_id = self._sources
+            self._sources += 1
+            self._write(source_id, SOURCE, name.encode(), time.perf_counter())
+        return source_id
+
+    def write(self, source_id, chunk, rx_time=None):
+        """One read's bytes (bytes or memoryview), received at 'rx_time' (time.perf_counter)."""
+        with self._lock:
+            self._write(source_id, DATA, chunk, rx_time)
+            self.chunks += 1
+            self.bytes += len(chunk)
+
+    def mark(self, source_id, kind):
+        """Records a RESET or EOF of 'source_id'."""
+        with self._lock:
+            self._write(source_id, kind, b"", None)
+
+    def _write(self, source_id, kind, payload, rx_time):
+        if self._file is None:
+            return
+        now = time.perf_counter()
+        t_ns = int(((rx_time if rx_time is not None else now) - self._t0) * 1e9)
+        self._file.write(RECORD.pack(max(t_ns, 0), source_id, kind, len(payload)))
+        self._file.write(payload)
+        if now - self._last_flush >= FLUSH_INTERVAL:
+            self._file.flush()
+            self._last_flush = now
+
+    def stats(self):
+        return {'chunks': self.chunks, 'bytes': self.bytes, 'sources': self._sources}
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_capture(path):
+    """
+    Returns (header, records) where records is a list of
+    (t, source_id, kind, payload) with 't' in seconds since the capture started.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < PREAMBLE.size:
+        raise ValueError(f"{path}: truncated capture header")
+    magic, version, header_len = PREAMBLE.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path}: not a raw capture")
+    if version > VERSION:
+        raise ValueError(f"{path}: capture format v{version} is newer than this viewer (v{VERSION})")
+    pos = PREAMBLE.size
+    header = json.loads(data[pos:pos + header_len].decode())
+    pos += header_len
+
+    view = memoryview(data)
+    records = []
+    while pos + RECORD.size <= len(data):
+        t_ns, source_id, kind, length = RECORD.unpack_from(data, pos)
+        pos += RECORD.size
+        if pos + length > len(data):
+            break
+        records.append((t_ns * 1e-9, source_id, kind, view[pos:pos + length]))
+        pos += length
+    return header, records
+
+
+class CaptureReplay:
+    """
+    Feeds capture files back through SerialBridge, one new bridge per
+    recorded source, so framing and decoding see the same chunk boundaries
+    as they did live.
+
+    speed: 1.0 replays with the original timing, N replays N times faster,
+    0 as fast as possible. Decoded batches go to on_states(states, rx_time)
+    from the replay thread, like StreamManager's readers.
+    connect()/disconnect()/is_connected()/stop_all() mirror StreamManager.
+    """
+
+    def __init__(self, on_states, bridge_factory, speed=1.0):
+        self.on_states = on_states
+        self.bridge_factory = bridge_factory
+        self.speed = speed
+        self._threads = {}
+        self._stops = {}
+        self._lock = threading.Lock()
+
+    def connect(self, path, on_states=None, **_):
+        with self._lock:
+            if path in self._threads and self._threads[path].is_alive():
+                print(f"Already replaying {path}; ignoring second connect.")
+                return path
+            stop = threading.Event()
+            thread = threading.Thread(target=self._run, args=(path, on_states or self.on_states, stop),
+                                      name=f"replay:{path}", daemon=True)
+            self._stops[path] = stop
+            self._threads[path] = thread
+        thread.start()
+        return path
+
+    def disconnect(self, path, timeout=2.0):
+        with self._lock:
+            stop = self._stops.pop(path, None)
+            thread = self._threads.pop(path, None)
+        if stop is None:
+            return False
+        stop.set()
+        thread.join(timeout)
+        return True
+
+    def is_connected(self, path):
+        thread = self._threads.get(path)
+        return thread is not None and thread.is_alive()
+
+    def stop_all(self, timeout=2.0):
+        for path in list(self._threads):
+            self.disconnect(path, timeout)
+
+    def _run(self, path, on_states, stop):
+        try:
+            header, records = read_capture(path)
+        except (OSError, ValueError) as e:
+            print(f"Failed to open capture {path}: {e}")
+            return
+        print(f"Replaying {path}: {len(records)} records at "
+              f"{'max speed' if not self.speed else f'{self.speed:g}x'}")
+        count = replay_records(records, self.bridge_factory, on_states, self.speed, stop)
+        print(f"Replay of {path} finished ({count} states)")
+
+
+def replay_records(records, bridge_factory, on_states, speed=0.0, stop=None):
+    """
+    Replays read_capture() records; returns the number of decoded states.
+    Usable headless, e.g. for regression tests of the decoder.
+    """
+    bridges = {}
+    count = 0
+    start = time.perf_counter()
+    for t, source_id, kind, payload in records:
+        if stop is not None and stop.is_set():
+            break
+        if speed:
+            delay = start + t / speed - time.perf_counter()
+            if delay > 0:
+                if stop is not None:
+                    if stop.wait(delay):
+                        break
+                else:
+                    time.sleep(delay)
+
+        if kind == SOURCE:
+            bridge = bridge_factory()
+            bridge.source_name = bytes(payload).decode()
+            bridges[source_id] = bridge
+            continue
+        bridge = bridges.get(source_id)
+        if bridge is None:
+            continue
+        if kind == DATA:
+            states = bridge.feed(payload)
+        elif kind == EOF:
+            states = bridge.feed_eof()
+        elif kind == RESET:
+            bridge.reset()
+            continue
+        else:
+            continue
+        if states:
+            count += len(states)
+            on_states(states, bridge.last_rx_time)
+    return count
@@ -0,0 +1,111 @@
+import os
+
+
+class RingBuffer:
+    """
+    Preallocated byte buffer with read/write cursors.
+
+    Unread data always lives in data[read_pos:write_pos], so callers can
+    search it with bytearray.find() and unpack it in place with
+    struct.unpack_from() without slicing. Consuming bytes only moves the
+    read cursor. When the writer runs out of room at the end of the buffer,
+    the unread tail is moved back to offset 0; bytes that were already
+    consumed are never copied.
+    """
+
+    def __init__(self, capacity=4096):
+        self.data = bytearray(capacity)
+        self.view = memoryview(self.data)
+        self.read_pos = 0
+        self.write_pos = 0
+
+    def __len__(self):
+        return self.write_pos - self.read_pos
+
+    @property
+    def capacity(self):
+        return len(self.data)
+
+    def find(self, sub, start=None):
+        """Returns the absolute index of 'sub' in the unread data, or -1."""
+        if start is None:
+            start = self.read_pos
+        return self.data.find(sub, start, self.write_pos)
+
+    def last_byte(self):
+        """Returns the most recently written unread byte, or None if empty."""
+        if self.write_pos == self.read_pos:
+            return None
+        return self.data[self.write_pos - 1]
+
+    def consume(self, n):
+        """Marks n unread bytes as consumed."""
+        self.read_pos += n
+        if self.read_pos >= self.write_pos:
+            # Empty: rewind both cursors for free
+            self.read_pos = 0
+            self.write_pos = 0
+
+    def consume_to(self, pos):
+        """Consumes everything before the absolute index 'pos'."""
+        self.consume(pos - self.read_pos)
+
+    def clear(self):
+        self.read_pos = 0
+        self.write_pos = 0
+
+    def reserve(self, n):
+        """
+        Returns a writable memoryview of at least n bytes at the write cursor.
+        Call commit() with the number of bytes actually written.
+        """
+        if len(self.data) - self.write_pos < n:
+            unread = self.write_pos - self.read_pos
+            if unread + n > len(self.data):
+                self._grow(unread + n)
+            elif self.read_pos:
+                # Move the unread tail to the front
+                self.view[0:unread] = self.view[self.read_pos:self.write_pos]
+                self.read_pos = 0
+                self.write_pos = unread
+        return self.view[self.write_pos:self.write_pos + n]
+
+    def commit(self, n):
+        self.write_pos += n
+
+    def write(self, chunk):
+        n = len(chunk)
+        self.reserve(n)[:] = chunk
+        self.commit(n)
+
+    def fill_from(self, source, size):
+        """
+        Reads up to 'size' bytes from 'source' straight into the buffer.
+        'source' is either a raw file descriptor or a file-like object
+        (e.g. serial.Serial). Returns the number of bytes read (0 on EOF).
+        """
+        dest = self.reserve(size)
+        if isinstance(source, int):
+            n = os.readv(source, [dest])
+        elif hasattr(source, "readinto"):
+            n = source.readinto(dest) or 0
+        else:
+            chunk = source.read(size)
+            n = len(chunk)
+            dest[:n] = chunk
+        dest.release()
+        self.commit(n)
+        return n
+
+    def _grow(self, min_capacity):
+        capacity = len(self.data)
+        while capacity < min_capacity:
+            capacity *= 2
+        unread = self.write_pos - self.read_pos
+        data = bytearray(capacity)
+        data[0:unread] = self.view[self.read_pos:self.write_pos]
+        self.view.release()
+        self.data = data
+        self.view = memoryview(data)
+        self.read_pos = 0
+        self.write_pos = unread
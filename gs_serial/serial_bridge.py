@@ -1,25 +1,124 @@
-import os
-import struct
-import ctypes
-from core.drone_state import DroneSelfState
-
-# Format from device_utils.py:
-# Sync: H (2)
-# Pos: 3f (12)
-# Vel: 3f (12)
-# Hdg: 3f (12)
-# Time: q (8)
-# ID: H (2)
-# State: H (2)
-# Spare: 14s (14)
-# Total: 64 bytes
-STRUCT_FMT = '<H3f3f3fqHH14s'
-STRUCT_SIZE = 64
-SYNC_MARKER = b'\xcd\xab' # 0xABCD little endian
+import time
+from gs_serial.ring_buffer import RingBuffer
+from gs_serial import protocols
+from gs_serial import native_reader
+from gs_serial import raw_capture
+from core.link_stats import LinkStats
+
+# The 64-byte frame is declared in gs_serial/protocols.py (layout 'gcs64').
+# These aliases are kept for code that packs/unpacks it directly.
+STRUCT_FMT = protocols.GCS64.fmt          # '<H3f3f3fqHH14s'
+STRUCT_SIZE = protocols.GCS64.size        # 64
+SYNC_MARKER = protocols.GCS64.sync_marker # 0xABCD little endian
+PACKET = protocols.GCS64.struct
+PACKET_DTYPE = protocols.GCS64.dtype
+
+READ_SIZE = 256
+# Bytes pulled per syscall by read_states()
+READ_BATCH_SIZE = 16384
+
+# Pass as 'layout' to pick the wire format from the first bytes of the stream
+AUTO_LAYOUT = "auto"
 
 class SerialBridge:
-    def __init__(self, lib_path=None):
-        self.buffer = b""
+    def __init__(self, lib_path=None, buffer_size=4096, layout=protocols.DEFAULT_LAYOUT, link_stats=None,
+                 capture=None):
+        self.ring = RingBuffer(buffer_size)
+        self.layout = None
+        self.set_layout(layout)
+
+        # Per-drone rate/jitter/gaps plus rejected packets and resync bytes.
+        # Pass a shared LinkStats to read the counters from another thread (e.g. the UI).
+        self.link_stats = link_stats if link_stats is not None else LinkStats()
+
+        # Host time (time.perf_counter) at which the last read returned data
+        self.last_rx_time = None
+
+        # Optional gs_serial.raw_capture.RawCaptureWriter: every chunk read is
+        # logged as-is under 'source_name' (set by the reader that owns the bridge)
+        self.capture = capture
+        self.source_name = None
+        self._capture_id = None
+
+        # Optional accelerated backend (gs_serial/serial_reader.cpp).
+        # Falls back to the pure-Python path if the library isn't built.
+        self.native = None
+        if lib_path:
+            lib = native_reader.load_library(lib_path)
+            if lib is not None:
+                self.native = native_reader.NativeReader(lib, self.ring)
+
+    def _use_native(self, stream_source):
+        # Capturing needs the raw chunks, which the native reader never hands back
+        return (self.native is not None
+                and self.capture is None
+                and self.layout is not None
+                and self.layout.name in native_reader.SUPPORTED_LAYOUTS
+                and (isinstance(stream_source, int) or hasattr(stream_source, 'fileno')))
+
+    def set_layout(self, layout):
+        """
+        Selects the wire format: a PacketLayout, a registered layout name,
+        or AUTO_LAYOUT to detect it from the first DETECT_BYTES of the stream.
+        """
+        if layout == AUTO_LAYOUT or layout is None:
+            self.layout = None
+        elif isinstance(layout, str):
+            self.layout = protocols.get_layout(layout)
+        else:
+            self.layout = layout
+
+    def _detect_layout(self, force=False):
+        """
+        Runs layout detection on the buffered bytes once enough have arrived.
+        Returns True once a layout is selected.
+        """
+        ring = self.ring
+        if len(ring) < protocols.DETECT_BYTES and not force:
+            return False
+
+        window = ring.view[ring.read_pos:ring.write_pos]
+        layout = protocols.detect_layout(window)
+        window.release()
+
+        if layout is None:
+            print(f"[WARNING] Could not identify packet layout from {len(ring)} bytes "
+                  f"(known layouts: {protocols.available_layouts()}). Still looking...")
+            # Slide the detection window so a noisy start doesn't stall us forever
+            self.link_stats.count_skipped(len(ring) // 2)
+            ring.consume(len(ring) // 2)
+            return False
+
+        print(f"Detected packet layout: {layout.name} ({layout.description})")
+        self.layout = layout
+        return True
+
+    def _detect_on_eof(self):
+        # Streams shorter than DETECT_BYTES still get a detection attempt
+        return self.layout is None and len(self.ring) > 0 and self._detect_layout(force=True)
+
+    # --- Raw capture ---
+
+    def _capture_source(self):
+        if self._capture_id is None:
+            self._capture_id = self.capture.add_source(self.source_name or f"bridge-{id(self):x}")
+        return self._capture_id
+
+    def _capture_filled(self, n):
+        # The last fill_from() left the chunk at the end of the unread data
+        if self.capture is not None:
+            if n:
+                ring = self.ring
+                self.capture.write(self._capture_source(), ring.view[ring.write_pos - n:ring.write_pos],
+                                   self.last_rx_time)
+            else:
+                self.capture.mark(self._capture_source(), raw_capture.EOF)
+
+    def reset(self):
+        """Drops buffered bytes (e.g. a partial packet from the previous connection)."""
+        self.ring.clear()
+        if self.capture is not None:
+            self.capture.mark(self._capture_source(), raw_capture.RESET)
 
     def validate_packet(self, drone_id, lat, lon):
         """
@@ -35,84 +134,234 @@ class SerialBridge:
             return False
         return True
 
-    def read_state(self, stream_source):
+    def validate_packets(self, records):
         """
-        Reads data from the source and returns a DroneSelfState object.
-        Blocks until a valid packet is found or EOF is reached.
-        Implements a sliding window to synchronize the stream.
+        Vectorized validate_packet() over a record array of the current layout.
+        Returns a boolean mask of the records that pass.
+        """
+        layout = self.layout
+        return protocols.validate_columns(layout.column(records, 'id'),
+                                          layout.column(records, 'lat'),
+                                          layout.column(records, 'lon'))
+
+    def decode_records(self, buf):
+        """
+        Locates every packet in 'buf' and decodes them in one pass.
+        Framing is identical to next_packet(): for the 64-byte frame a packet
+        starts at the first sync marker after the previous packet, and a
+        candidate is consumed whether or not it validates.
+        Returns (records, consumed): the valid packets as an array of the
+        layout's dtype, and how many bytes of 'buf' can be discarded.
+        """
+        return self.layout.frame(buf, self.validate_packets, self.link_stats)
+
+    def states_from_records(self, records):
+        """Converts a record array of the current layout into DroneSelfState objects."""
+        return self.layout.states_from_records(records)
+
+    def decode_many(self, buf):
+        """
+        Decodes every valid packet in 'buf'.
+        Returns (states, consumed) where 'consumed' is the number of leading
+        bytes of 'buf' that no longer need to be kept.
+        """
+        records, consumed = self.decode_records(buf)
+        return self.states_from_records(records), consumed
+
+    def feed(self, chunk):
+        """
+        Appends raw bytes to the ring buffer and returns all the states
+        that can be decoded so far.
+        """
+        self.ring.write(chunk)
+        self.last_rx_time = time.perf_counter()
+        self.link_stats.count_bytes(len(chunk))
+        if self.capture is not None:
+            self.capture.write(self._capture_source(), chunk, self.last_rx_time)
+        return self._drain()
+
+    def feed_eof(self):
+        """End of a fed stream: decodes what a short stream left buffered (see read_states)."""
+        if self._detect_on_eof():
+            return self._drain()
+        return []
+
+    def _drain(self):
+        ring = self.ring
+        if self.layout is None and not self._detect_layout():
+            return []
+        if len(ring) < 2:
+            return []
+        window = ring.view[ring.read_pos:ring.write_pos]
+        states, consumed = self.decode_many(window)
+        window.release()
+        ring.consume(consumed)
+        self.link_stats.record_states(states, self.last_rx_time)
+        return states
+
+    def next_packet(self):
+        """
+        Pops the next valid packet from the ring buffer.
+        Returns the unpacked tuple, or None if more data is needed.
         """
+        if self.layout is None and not self._detect_layout():
+            return None
+        if self.layout.sync_marker:
+            return self._next_synced_packet()
+        return self._next_unsynced_packet()
+
+    def _next_synced_packet(self):
+        ring = self.ring
+        layout = self.layout
+        marker = layout.sync_marker
+        size = layout.size
+        unpack_from = layout.struct.unpack_from
+        i_id, i_lat, i_lon = layout.tuple_index('id'), layout.tuple_index('lat'), layout.tuple_index('lon')
+        stats = self.link_stats
+
         while True:
             # 1. Sync: Look for Sync Marker
-            header_idx = self.buffer.find(SYNC_MARKER)
+            header_idx = ring.find(marker)
             if header_idx == -1:
                 # Header not found yet. Keep last byte just in case
-                if len(self.buffer) > 0:
-                     if self.buffer[-1] == 0xCD:
-                         self.buffer = self.buffer[-1:]
-                     else:
-                         self.buffer = b""
+                if ring.last_byte() == marker[0]:
+                    stats.count_skipped(len(ring) - 1)
+                    ring.consume(len(ring) - 1)
                 else:
-                    self.buffer = b""
-            else:
-                # Header found at header_idx
-                self.buffer = self.buffer[header_idx:]
-
-                if len(self.buffer) >= STRUCT_SIZE:
-                    candidate = self.buffer[:STRUCT_SIZE]
-                    
-                    try:
-                        unpacked = struct.unpack(STRUCT_FMT, candidate)
-                        
-                        # Consume consumed bytes from buffer
-                        self.buffer = self.buffer[STRUCT_SIZE:]
-                        
-                        drone_id = unpacked[11]
-                        lat = unpacked[1]
-                        lon = unpacked[2]
-                        
-                        if self.validate_packet(drone_id, lat, lon):
-                            # Valid packet!
-                            return DroneSelfState(
-                                id=drone_id,
-                                lat=lat,
-                                lon=lon,
-                                alt=unpacked[3],
-                                velocity_north=unpacked[4],
-                                velocity_east=unpacked[5],
-                                velocity_down=unpacked[6],
-                                heading=unpacked[7],       # Heading[0]
-                                sm_current_stat=unpacked[12],
-                                battery_precentages=100,   # Default
-                                drones_keep_alive=15,      # Default (1111)
-                                gps_3d_fix=1               # Default
-                            )
-                        else:
-                            # Bad packet content (validation failed)
-                            pass
-                            
-                    except struct.error:
-                        # Should not happen
-                        self.buffer = self.buffer[STRUCT_SIZE:]
-                
-                else:
-                    # Header found but not enough data.
-                    pass
+                    stats.count_skipped(len(ring))
+                    ring.clear()
+                return None
+
+            # Header found: drop everything before it
+            stats.count_skipped(header_idx - ring.read_pos)
+            ring.consume_to(header_idx)
+
+            if len(ring) < size:
+                # Header found but not enough data.
+                return None
+
+            unpacked = unpack_from(ring.data, ring.read_pos)
+            # Consume the candidate whether or not it validates
+            ring.consume(size)
+
+            if self.validate_packet(unpacked[i_id], unpacked[i_lat], unpacked[i_lon]):
+                return unpacked
+            # Bad packet content (validation failed): keep scanning
+            stats.count_rejected(1, (unpacked[i_id],))
+
+    def _next_unsynced_packet(self):
+        # No sync word: slide one byte at a time until a packet validates
+        ring = self.ring
+        layout = self.layout
+        size = layout.size
+        unpack_from = layout.struct.unpack_from
+        i_id, i_lat, i_lon = layout.tuple_index('id'), layout.tuple_index('lat'), layout.tuple_index('lon')
+
+        while len(ring) >= size:
+            unpacked = unpack_from(ring.data, ring.read_pos)
+            if self.validate_packet(unpacked[i_id], unpacked[i_lat], unpacked[i_lon]):
+                ring.consume(size)
+                return unpacked
+            self.link_stats.count_skipped(1)
+            ring.consume(1)
+        return None
+
+    def read_state(self, stream_source):
+        """
+        Reads data from the source and returns a DroneSelfState object.
+        Blocks until a valid packet is found or EOF is reached.
+        Bytes are read straight into a preallocated ring buffer and
+        unpacked in place, so consumed data is never copied.
+        """
+        while True:
+            unpacked = self.next_packet()
+            if unpacked is not None:
+                # Valid packet!
+                state = self.layout.state_from_tuple(unpacked)
+                self.link_stats.record_states((state,), self.last_rx_time)
+                return state
 
             # 2. If we are here, we don't have enough valid data. Read more.
             try:
                 # Blocking read. Will wait for at least 1 byte.
-                if isinstance(stream_source, int):
-                    chunk = os.read(stream_source, 256)
-                else:
-                    # Assume it's a file-like object (e.g. serial.Serial)
-                    chunk = stream_source.read(256)
-                    
-                if not chunk:
+                # Accepts a raw fd (pipes/files) or a file-like object (e.g. serial.Serial)
+                n = self.ring.fill_from(stream_source, READ_SIZE)
+                self.last_rx_time = time.perf_counter()
+                self.link_stats.count_bytes(n)
+                self._capture_filled(n)
+
+                if n == 0:
+                    if self._detect_on_eof():
+                        # Short stream: decode what was buffered before giving up
+                        continue
                     # EOF (Connection closed)
                     print("DEBUG: Read returned empty bytes (EOF).")
                     return None
-                
-                self.buffer += chunk
             except Exception as e:
                 print(f"Serial Read Error: {e}")
                 return None
+
+    def read_states(self, stream_source, max_bytes=READ_BATCH_SIZE):
+        """
+        Performs one read of up to 'max_bytes' and returns every valid
+        DroneSelfState decoded from it (possibly an empty list).
+        Returns None on EOF or read error.
+        """
+        if self._use_native(stream_source):
+            return self._read_states_native(stream_source, max_bytes)
+
+        try:
+            if hasattr(stream_source, 'in_waiting'):
+                # pyserial blocks until the full size arrives; ask only for what is queued
+                max_bytes = min(max_bytes, max(1, stream_source.in_waiting))
+            n = self.ring.fill_from(stream_source, max_bytes)
+            self.last_rx_time = time.perf_counter()
+            self.link_stats.count_bytes(n)
+            self._capture_filled(n)
+        except BlockingIOError:
+            # Non-blocking source with nothing to read yet
+            return []
+        except Exception as e:
+            print(f"Serial Read Error: {e}")
+            return None
+
+        if n == 0:
+            if self._detect_on_eof():
+                # Short stream: return what was buffered; the next read reports EOF
+                return self._drain()
+            # EOF (Connection closed)
+            print("DEBUG: Read returned empty bytes (EOF).")
+            return None
+
+        return self._drain()
+
+    def _read_states_native(self, stream_source, max_bytes):
+        # Read, sync, validate and decode all happen in C without the GIL
+        fd = stream_source if isinstance(stream_source, int) else stream_source.fileno()
+        native_stats = self.native.stats
+        before = (native_stats.bytes_read, native_stats.rejected, native_stats.skipped_bytes)
+        try:
+            records = self.native.read(fd, max_bytes)
+            # Read and decode are a single native call; decode time shows up as ~0
+            self.last_rx_time = time.perf_counter()
+        except BlockingIOError:
+            # Non-blocking source with nothing to read yet
+            return []
+        except OSError as e:
+            print(f"Serial Read Error: {e}")
+            return None
+        finally:
+            # The C side keeps running totals; forward the increments
+            stats = self.link_stats
+            stats.count_bytes(native_stats.bytes_read - before[0])
+            stats.count_rejected(native_stats.rejected - before[1])
+            stats.count_skipped(native_stats.skipped_bytes - before[2])
+
+        if records is None:
+            # EOF (Connection closed)
+            print("DEBUG: Read returned empty bytes (EOF).")
+            return None
+
+        states = native_reader.states_from_native_records(records, self.layout)
+        self.link_stats.record_states(states, self.last_rx_time)
+        return states
@@ -3,6 +3,9 @@
 #include <errno.h>
 #include <iostream>
 #include <cstring>
+#include <cmath>
+
+static_assert(sizeof(struct gs_frame) == GS_FRAME_SIZE, "gs_frame must match the 64-byte wire frame");
 
 /**
  * Reads a drone_self_state struct from the given serial file descriptor.
@@ -44,6 +47,142 @@ int read_drone_state(int serial_fd, struct drone_self_state* state) {
     return 0;
 }
 
+/**
+ * Finds the next sync word (0xABCD, little endian: CD AB) in buf[pos, end).
+ * @return Offset of the marker, or end if none was found
+ */
+static size_t find_sync(const uint8_t* buf, size_t pos, size_t end) {
+    while (pos + 1 < end) {
+        const void* hit = memchr(buf + pos, 0xCD, end - pos - 1);
+        if (hit == nullptr) {
+            return end;
+        }
+        pos = static_cast<const uint8_t*>(hit) - buf;
+        if (buf[pos + 1] == 0xAB) {
+            return pos;
+        }
+        pos++;
+    }
+    return end;
+}
+
+/**
+ * Same heuristic as SerialBridge.validate_packet().
+ * Written as 'not greater' so NaN passes, like the Python check.
+ */
+static bool validate_frame(const struct gs_frame& frame) {
+    if (frame.id == 0 || frame.id > 255) {
+        return false;
+    }
+    if (std::fabs(frame.pos[0]) > 90.0f || std::fabs(frame.pos[1]) > 180.0f) {
+        return false;
+    }
+    return true;
+}
+
+/**
+ * Decodes every complete frame in buf[*read_pos, write_pos).
+ * Framing matches SerialBridge: a frame starts at the first sync word after
+ * the previous frame and is consumed whether or not it validates. When no
+ * sync word is left, a trailing 0xCD byte is kept in case it starts one.
+ *
+ * @return Number of records written to out
+ */
+long gs_decode_batch(const uint8_t* buf, size_t* read_pos, size_t write_pos,
+                     struct gs_state_record* out, size_t max_out,
+                     struct gs_reader_stats* stats) {
+    size_t pos = *read_pos;
+    size_t count = 0;
+
+    while (count < max_out) {
+        size_t header = find_sync(buf, pos, write_pos);
+        if (header == write_pos) {
+            // No header left. Keep last byte just in case
+            size_t keep = (write_pos > pos && buf[write_pos - 1] == 0xCD) ? 1 : 0;
+            stats->skipped_bytes += write_pos - pos - keep;
+            pos = write_pos - keep;
+            break;
+        }
+
+        stats->skipped_bytes += header - pos;
+        pos = header;
+        if (write_pos - pos < GS_FRAME_SIZE) {
+            // Header found but not enough data
+            break;
+        }
+
+        struct gs_frame frame;
+        std::memcpy(&frame, buf + pos, sizeof(frame));
+        pos += GS_FRAME_SIZE;
+
+        if (!validate_frame(frame)) {
+            stats->rejected++;
+            continue;
+        }
+
+        struct gs_state_record& rec = out[count++];
+        rec.id = frame.id;
+        rec.lat = frame.pos[0];
+        rec.lon = frame.pos[1];
+        rec.alt = frame.pos[2];
+        rec.velocity_north = frame.vel[0];
+        rec.velocity_east = frame.vel[1];
+        rec.velocity_down = frame.vel[2];
+        rec.heading = frame.hdg[0];
+        rec.timestamp = frame.time;
+        rec.sm_current_stat = frame.state;
+    }
+
+    stats->packets += count;
+    *read_pos = pos;
+    return static_cast<long>(count);
+}
+
+/**
+ * One read() into the caller-supplied buffer followed by a batch decode.
+ * Called from Python through ctypes, which releases the GIL for the whole call.
+ *
+ * @return Number of records written, GS_READ_EOF or GS_READ_ERROR
+ */
+long gs_read_batch(int fd, uint8_t* buf, size_t capacity,
+                   size_t* read_pos, size_t* write_pos, size_t read_size,
+                   struct gs_state_record* out, size_t max_out,
+                   struct gs_reader_stats* stats) {
+    // Make room: move the unread tail to the front (consumed bytes are never copied)
+    if (capacity - *write_pos < read_size && *read_pos > 0) {
+        size_t unread = *write_pos - *read_pos;
+        std::memmove(buf, buf + *read_pos, unread);
+        *read_pos = 0;
+        *write_pos = unread;
+    }
+
+    size_t room = capacity - *write_pos;
+    if (room > read_size) {
+        room = read_size;
+    }
+
+    if (room > 0) {
+        ssize_t bytes_read;
+        do {
+            bytes_read = read(fd, buf + *write_pos, room);
+        } while (bytes_read < 0 && errno == EINTR);
+
+        if (bytes_read < 0) {
+            if (errno != EAGAIN && errno != EWOULDBLOCK) {
+                return GS_READ_ERROR;
+            }
+            // Non-blocking fd with nothing new: still decode what is buffered
+        } else if (bytes_read == 0) {
+            return GS_READ_EOF;
+        } else {
+            *write_pos += bytes_read;
+            stats->bytes_read += bytes_read;
+        }
+    }
+
+    return gs_decode_batch(buf, read_pos, *write_pos, out, max_out, stats);
+}
+
 // Example usage / test main
 #ifdef TEST_MAIN
 #include <fcntl.h>
@@ -52,6 +191,7 @@ int main() {
     // Just a mock main to demonstrate compilation. 
     // In a real scenario, you'd open a real serial port device (e.g., /dev/ttyUSB0)
     std::cout << "Compiling successfully. Size of struct: " << sizeof(struct drone_self_state) << std::endl;
+    std::cout << "Size of gs_state_record: " << sizeof(struct gs_state_record) << std::endl;
     return 0;
 }
 #endif
@@ -2,6 +2,7 @@
 #define SERIAL_READER_H
 
 #include <stdint.h>
+#include <stddef.h>
 
 #define NUM_UNITS 4
 
@@ -23,6 +24,49 @@ struct drone_self_state {
 };
 #pragma pack(pop)
 
+/* 64-byte ground station frame (layout 'gcs64' in protocols.py) */
+#define GS_SYNC_WORD 0xABCD
+#define GS_FRAME_SIZE 64
+
+#pragma pack(push, 1)
+struct gs_frame {
+    uint16_t sync;
+    float pos[3];       /* lat, lon, alt */
+    float vel[3];       /* north, east, down */
+    float hdg[3];       /* heading in hdg[0] */
+    int64_t time;
+    uint16_t id;
+    uint16_t state;
+    uint8_t spare[14];
+};
+
+/* Decoded record written by gs_read_batch (mirrors NATIVE_RECORD_DTYPE in native_reader.py) */
+struct gs_state_record {
+    int32_t id;
+    float lat;
+    float lon;
+    float alt;
+    float velocity_north;
+    float velocity_east;
+    float velocity_down;
+    float heading;
+    int64_t timestamp;
+    int32_t sm_current_stat;
+};
+#pragma pack(pop)
+
+/* Running counters, updated by every gs_read_batch / gs_decode_batch call */
+struct gs_reader_stats {
+    uint64_t bytes_read;
+    uint64_t packets;        /* valid packets decoded */
+    uint64_t rejected;       /* framed packets that failed validation */
+    uint64_t skipped_bytes;  /* bytes discarded while searching for a sync word */
+};
+
+/* gs_read_batch return codes (>= 0 is a record count) */
+#define GS_READ_EOF   (-1)
+#define GS_READ_ERROR (-2)
+
 #ifdef __cplusplus
 extern "C" {
 #endif
@@ -31,6 +75,22 @@ extern "C" {
 // Returns 0 on success, -1 on error
 int read_drone_state(int serial_fd, struct drone_self_state* state);
 
+// Decodes every complete frame in buf[*read_pos, *write_pos) into 'out'
+// (at most max_out records) and advances *read_pos past consumed bytes.
+// Returns the number of records written.
+long gs_decode_batch(const uint8_t* buf, size_t* read_pos, size_t write_pos,
+                     struct gs_state_record* out, size_t max_out,
+                     struct gs_reader_stats* stats);
+
+// Performs one read() from fd into the caller's buffer (compacting unread
+// bytes to the front when needed), then decodes like gs_decode_batch.
+// Returns the number of records written, GS_READ_EOF or GS_READ_ERROR.
+// A non-blocking fd with no data just decodes what is already buffered.
+long gs_read_batch(int fd, uint8_t* buf, size_t capacity,
+                   size_t* read_pos, size_t* write_pos, size_t read_size,
+                   struct gs_state_record* out, size_t max_out,
+                   struct gs_reader_stats* stats);
+
 #ifdef __cplusplus
 }
 #endif
@@ -0,0 +1,370 @@
+import multiprocessing as mp
+import os
+import queue
+import time
+from multiprocessing import shared_memory
+import numpy as np
+
+from core.drone_state import DroneSelfState
+from gs_serial import protocols
+
+# Fixed-size decoded record, one per DroneSelfState, plus the host times
+# (time.perf_counter, CLOCK_MONOTONIC, so comparable across processes)
+SHM_RECORD_DTYPE = np.dtype([
+    ('id', '<i4'),
+    ('lat', '<f4'),
+    ('lon', '<f4'),
+    ('alt', '<f4'),
+    ('velocity_north', '<f4'),
+    ('velocity_east', '<f4'),
+    ('velocity_down', '<f4'),
+    ('heading', '<f4'),
+    ('sm_current_stat', '<i4'),
+    ('battery_precentages', '<i4'),
+    ('drones_keep_alive', '<i4'),
+    ('gps_3d_fix', '<i4'),
+    ('timestamp', '<i8'),
+    ('rx_time', '<f8'),
+    ('enq_time', '<f8'),
+])
+
+# Each slot carries the sequence number of the record in it (seq + 1, 0 = never written)
+SLOT_DTYPE = np.dtype([('seq', '<u8'), ('rec', SHM_RECORD_DTYPE)])
+
+SHM_MAGIC = 0x47535231  # 'GSR1'
+HEADER_DTYPE = np.dtype([
+    ('magic', '<u4'),
+    ('record_size', '<u4'),
+    ('capacity', '<u8'),
+    ('claim_seq', '<u8'),      # Records the writer has started to write
+    ('write_seq', '<u8'),      # Records fully written (published)
+    ('bytes_read', '<u8'),     # Decoder stream counters (core.link_stats.LinkStats)
+    ('rejected', '<u8'),
+    ('skipped_bytes', '<u8'),
+    ('writer_pid', '<u8'),
+])
+HEADER_SIZE = 128
+
+DEFAULT_CAPACITY = 65536   # records (~4.7 MB)
+
+
+def _attach(name):
+    # The creator owns (and unlinks) the segment. Before Python 3.13 attaching
+    # registers it with the resource tracker too, which is harmless here because
+    # the decoder process is spawned from the UI and shares its tracker.
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def _views(buf):
+    header = np.ndarray((), dtype=HEADER_DTYPE, buffer=buf)
+    capacity = int(header['capacity'])
+    slots = np.ndarray((capacity,), dtype=SLOT_DTYPE, buffer=buf, offset=HEADER_SIZE)
+    return header, slots
+
+
+class ShmRingWriter:
+    """
+    Single-producer side of the shared-memory telemetry ring.
+
+    Writes are lock-free: the writer bumps 'claim_seq', fills the slots
+    (overwriting the oldest ones once the ring is full), then publishes
+    'write_seq'. The reader uses both to detect records it missed (overrun)
+    or that were overwritten while it was copying them.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, name=None, create=True):
+        """Creates a new ring, or (create=False) attaches to the ring 'name' to write into it."""
+        self.owner = create
+        if create:
+            size = HEADER_SIZE + capacity * SLOT_DTYPE.itemsize
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            self.shm.buf[:size] = bytes(size)
+            header = np.ndarray((), dtype=HEADER_DTYPE, buffer=self.shm.buf)
+            header['capacity'] = capacity
+            header['record_size'] = SHM_RECORD_DTYPE.itemsize
+            header['magic'] = SHM_MAGIC
+        else:
+            self.shm = _attach(name)
+        self.header, self.slots = _views(self.shm.buf)
+        self.header['writer_pid'] = os.getpid()
+        self.capacity = len(self.slots)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def write(self, records):
+        """Appends an array of SHM_RECORD_DTYPE records."""
+        n = len(records)
+        if n == 0:
+            return
+        header = self.header
+        seq0 = int(header['write_seq'])
+        if n > self.capacity:
+            # Only the newest 'capacity' records can survive anyway
+            seq0 += n - self.capacity
+            records = records[-self.capacity:]
+            n = self.capacity
+        seqs = np.arange(seq0, seq0 + n, dtype=np.uint64)
+        idx = seqs % self.capacity
+
+        header['claim_seq'] = seq0 + n
+        self.slots['rec'][idx] = records
+        self.slots['seq'][idx] = seqs + 1
+        header['write_seq'] = seq0 + n
+
+    def write_states(self, states, rx_time, enq_time=None):
+        if not states:
+            return
+        if enq_time is None:
+            enq_time = time.perf_counter()
+        self.write(records_from_states(states, rx_time, enq_time))
+
+    def publish_link_stats(self, link_stats):
+        header = self.header
+        header['bytes_read'] = link_stats.bytes_read
+        header['rejected'] = link_stats.rejected
+        header['skipped_bytes'] = link_stats.skipped_bytes
+
+    def close(self):
+        """Detaches; the creating side also removes the segment."""
+        self.header = self.slots = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class ShmRingReader:
+    """
+    Single-consumer side: attaches to a ring by name and returns whatever
+    was published since the previous read. Never blocks and never takes a lock.
+    """
+
+    def __init__(self, name, link_stats=None):
+        self.shm = _attach(name)
+        header = np.ndarray((), dtype=HEADER_DTYPE, buffer=self.shm.buf)
+        if int(header['magic']) != SHM_MAGIC or int(header['record_size']) != SHM_RECORD_DTYPE.itemsize:
+            self.shm.close()
+            raise ValueError(f"Shared memory '{name}' is not a telemetry ring of this version")
+        self.header, self.slots = _views(self.shm.buf)
+        self.capacity = int(self.header['capacity'])
+        self.read_seq = int(self.header['write_seq'])
+        self.link_stats = link_stats
+        self._stream_counters = (0, 0, 0)
+
+        # Counters
+        self.received = 0
+        self.overruns = 0   # Reads that found the writer had lapped us
+        self.lost = 0       # Records overwritten before they were read
+
+    def read(self):
+        """Returns the new records (a copy) in sequence order."""
+        header = self.header
+        end = int(header['write_seq'])
+        start = self.read_seq
+        if end == start:
+            return np.empty(0, dtype=SHM_RECORD_DTYPE)
+
+        if end - start > self.capacity:
+            self._overrun(end - self.capacity - start)
+            start = end - self.capacity
+
+        seqs = np.arange(start, end, dtype=np.uint64)
+        idx = seqs % self.capacity
+        slot_seq = self.slots['seq'][idx]
+        records = self.slots['rec'][idx]
+
+        # Anything the writer claimed meanwhile may have been overwritten during the copy
+        oldest_safe = int(header['claim_seq']) - self.capacity
+        ok = slot_seq == seqs + 1
+        if oldest_safe > start:
+            ok &= seqs >= oldest_safe
+        if not ok.all():
+            self._overrun(int((~ok).sum()))
+            records = records[ok]
+
+        self.read_seq = end
+        self.received += len(records)
+        return records
+
+    def _overrun(self, lost):
+        if self.overruns == 0:
+            print(f"[WARNING] Telemetry ring overrun: the UI fell {lost} records behind the decoder "
+                  f"(capacity {self.capacity}). Older records are dropped.")
+        self.overruns += 1
+        self.lost += lost
+
+    def drain_timed(self):
+        """
+        Like IngestQueue.drain_timed(): (state, rx_time, enq_time) tuples.
+        Also forwards the decoder's counters to 'link_stats', if given.
+        """
+        records = self.read()
+        entries = []
+        if len(records):
+            states = states_from_records(records)
+            rx_times = records['rx_time'].tolist()
+            entries = list(zip(states, rx_times, records['enq_time'].tolist()))
+            if self.link_stats is not None:
+                self.link_stats.record_timed(states, rx_times)
+        if self.link_stats is not None:
+            self._sync_stream_counters()
+        return entries
+
+    def _sync_stream_counters(self):
+        header = self.header
+        now = (int(header['bytes_read']), int(header['rejected']), int(header['skipped_bytes']))
+        before = self._stream_counters
+        self.link_stats.count_bytes(now[0] - before[0])
+        self.link_stats.count_rejected(now[1] - before[1])
+        self.link_stats.count_skipped(now[2] - before[2])
+        self._stream_counters = now
+
+    def stats(self):
+        return {'received': self.received, 'overruns': self.overruns, 'lost': self.lost,
+                'backlog': int(self.header['write_seq']) - self.read_seq}
+
+    def close(self):
+        self.header = self.slots = None
+        self.shm.close()
+
+
+def records_from_states(states, rx_time, enq_time):
+    records = np.empty(len(states), dtype=SHM_RECORD_DTYPE)
+    for f in protocols.STATE_FIELDS:
+        records[f] = [getattr(s, f) for s in states]
+    records['rx_time'] = rx_time
+    records['enq_time'] = enq_time
+    return records
+
+
+def states_from_records(records):
+    cols = [records[f].tolist() for f in protocols.STATE_FIELDS]
+    return [DroneSelfState(*row) for row in zip(*cols)]
+
+
+# --- Decoder process ---
+
+def _decoder_main(ring_name, sources, ingest, bridge_options, reader_options, commands, stop):
+    """Entry point of the decoder process: reads and decodes, writes into the ring."""
+    # Imported here so the UI process doesn't need them
+    from core.link_stats import LinkStats
+    from gs_serial.serial_bridge import SerialBridge
+    from gs_serial.stream_manager import StreamManager
+    from gs_serial.ingest_service import IngestService
+
+    ring = ShmRingWriter(name=ring_name, create=False)
+    link_stats = LinkStats()
+    # Raw capture (--capture) is written by this process, next to the decoder
+    capture_path = bridge_options.pop('capture_path', None)
+    capture = None
+    if capture_path:
+        from gs_serial.raw_capture import RawCaptureWriter
+        capture = RawCaptureWriter(capture_path, bridge_options.get('layout'))
+
+    def on_states(states, rx_time):
+        ring.write_states(states, rx_time)
+        ring.publish_link_stats(link_stats)
+
+    def make_bridge():
+        return SerialBridge(link_stats=link_stats, capture=capture, **bridge_options)
+
+    if ingest == "asyncio":
+        streams = IngestService(on_states, make_bridge, **reader_options)
+    else:
+        reader_options.pop('reorder_window', None)
+        streams = StreamManager(on_states, make_bridge, **reader_options)
+
+    for source in sources:
+        streams.connect(source)
+    try:
+        while not stop.is_set():
+            try:
+                cmd, source = commands.get(timeout=0.2)
+            except queue.Empty:
+                ring.publish_link_stats(link_stats)
+                continue
+            if cmd == "connect":
+                streams.connect(source)
+            elif cmd == "disconnect":
+                streams.disconnect(source)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        streams.stop_all()
+        if capture is not None:
+            capture.close()
+        ring.publish_link_stats(link_stats)
+        ring.close()
+
+
+class DecoderProcess:
+    """
+    Runs the stream readers and decoders in a separate process (spawned, so
+    none of the Tk state is inherited). Decoded states come back through a
+    shared-memory ring; the UI polls 'reader' once per tick.
+
+    connect()/disconnect()/is_connected()/stop_all() mirror StreamManager.
+    """
+
+    def __init__(self, bridge_options=None, reader_options=None, ingest="thread",
+                 capacity=DEFAULT_CAPACITY, link_stats=None):
+        self.bridge_options = bridge_options or {}
+        self.reader_options = reader_options or {}
+        self.ingest = ingest
+        self.ring = ShmRingWriter(capacity)
+        self.reader = ShmRingReader(self.ring.name, link_stats)
+
+        ctx = mp.get_context("spawn")
+        self._commands = ctx.Queue()
+        self._stop = ctx.Event()
+        self._ctx = ctx
+        self._process = None
+        self._sources = set()
+
+    def start(self, sources=()):
+        if self._process is not None and self._process.is_alive():
+            return
+        self._sources.update(sources)
+        self._process = self._ctx.Process(
+            target=_decoder_main, name="gs-decoder", daemon=True,
+            args=(self.ring.name, list(self._sources), self.ingest,
+                  self.bridge_options, dict(self.reader_options), self._commands, self._stop))
+        self._process.start()
+        print(f"Decoder process started (pid {self._process.pid}, ring '{self.ring.name}', "
+              f"{self.ring.capacity} records)")
+
+    def connect(self, source, on_states=None, **_):
+        if self._process is None or not self._process.is_alive():
+            self.start((source,))
+            return source
+        if source in self._sources:
+            print(f"Already connected to {source}; ignoring second connect.")
+            return source
+        self._sources.add(source)
+        self._commands.put(("connect", source))
+        return source
+
+    def disconnect(self, source, timeout=2.0):
+        if source not in self._sources:
+            return False
+        self._sources.discard(source)
+        self._commands.put(("disconnect", source))
+        return True
+
+    def is_connected(self, source):
+        return source in self._sources
+
+    def stop_all(self, timeout=2.0):
+        if self._process is not None:
+            self._stop.set()
+            self._process.join(timeout)
+            if self._process.is_alive():
+                self._process.terminate()
+            self._process = None
+        self._sources.clear()
+        self.reader.close()
+        self.ring.close()
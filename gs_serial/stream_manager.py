@@ -0,0 +1,267 @@
+import os
+import stat
+import selectors
+import threading
+
+from gs_serial.serial_bridge import SerialBridge, READ_BATCH_SIZE
+
+try:
+    import serial
+except ImportError:  # Only needed for /dev/tty* devices
+    serial = None
+
+# Reader states (StreamReader.status)
+CONNECTING = "connecting"
+CONNECTED = "connected"
+WAITING = "waiting"        # Disconnected, reconnect scheduled
+STOPPED = "stopped"
+
+DEFAULT_BAUDRATE = 115200
+BACKOFF_INITIAL = 0.5      # s before the first reconnect attempt
+BACKOFF_MAX = 10.0         # s, cap for the exponential backoff
+# Max time select() waits before re-checking for stop requests
+POLL_INTERVAL = 0.5
+
+# poll() rather than epoll: epoll refuses regular files, poll reports them always readable
+_Selector = getattr(selectors, 'PollSelector', selectors.SelectSelector)
+
+
+def _is_serial_device(path):
+    return path.startswith("/dev/tty")
+
+
+def device_key(path):
+    """Identity of a device, so '/dev/ttyUSB0' and a symlink to it are the same reader."""
+    return os.path.realpath(path)
+
+
+class StreamReader:
+    """
+    One background reader for one device (serial port, FIFO or file).
+
+    The fd is non-blocking and waited on with a selector (poll/epoll), so
+    stop() takes effect immediately instead of after the next byte. EOF or a
+    read error closes the device and, if 'reconnect' is set, reopens it with
+    exponential backoff. Regular files are read once and never reopened.
+
+    Decoded batches are handed to on_states(states, rx_time) from the reader
+    thread; the callback must be thread-safe (e.g. IngestQueue.put_many).
+    """
+
+    def __init__(self, path, on_states, bridge=None, read_size=READ_BATCH_SIZE,
+                 baudrate=DEFAULT_BAUDRATE, low_latency=False, reconnect=True,
+                 backoff_initial=BACKOFF_INITIAL, backoff_max=BACKOFF_MAX, on_stopped=None):
+        self.path = path
+        self.on_states = on_states
+        self.on_stopped = on_stopped
+        self.bridge = bridge if bridge is not None else SerialBridge(layout="auto")
+        self.bridge.source_name = path
+        self.read_size = read_size
+        self.baudrate = baudrate
+        self.low_latency = low_latency
+        self.reconnect = reconnect
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+
+        self.status = STOPPED
+        self.connects = 0
+        self.disconnects = 0
+
+        self._serial = None
+        self._fd = None
+        self._is_file = False
+        self._stop = threading.Event()
+        self._wake_r = self._wake_w = None
+        self._wake_lock = threading.Lock()
+        self._thread = None
+
+    # --- Control (any thread) ---
+
+    def start(self):
+        if self.is_alive():
+            return
+        self._stop.clear()
+        # Self-pipe: stop() writes to it to wake the reader out of select()
+        self._wake_r, self._wake_w = os.pipe()
+        self._thread = threading.Thread(target=self._run, name=f"stream:{self.path}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        """Closes the device and ends the reader thread. Safe to call more than once."""
+        self._stop.set()
+        with self._wake_lock:
+            if self._wake_w is not None:
+                os.write(self._wake_w, b"x")
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    # --- Reader thread ---
+
+    def _run(self):
+        backoff = self.backoff_initial
+        try:
+            while not self._stop.is_set():
+                self.status = CONNECTING
+                try:
+                    self._open()
+                except Exception as e:
+                    print(f"Failed to open {self.path}: {e}")
+                else:
+                    self.connects += 1
+                    self.status = CONNECTED
+                    print(f"Stream Connected: {self.path}")
+                    try:
+                        if self._pump():
+                            # Data arrived on this connection; start the backoff over
+                            backoff = self.backoff_initial
+                    except Exception as e:
+                        print(f"Stream Error on {self.path}: {e}")
+                    self._close()
+                    if self._stop.is_set():
+                        break
+                    self.disconnects += 1
+                    print(f"Stream Ended or Error: {self.path}")
+
+                if not self.reconnect or self._is_file:
+                    break
+                self.status = WAITING
+                print(f"Reconnecting to {self.path} in {backoff:.1f}s...")
+                if self._sleep(backoff):
+                    break
+                backoff = min(backoff * 2.0, self.backoff_max)
+        finally:
+            self._close()
+            self.status = STOPPED
+            with self._wake_lock:
+                os.close(self._wake_r)
+                os.close(self._wake_w)
+                self._wake_r = self._wake_w = None
+            if self.on_stopped:
+                self.on_stopped(self)
+
+    def _open(self):
+        if _is_serial_device(self.path):
+            if serial is None:
+                raise RuntimeError("pyserial is required for serial devices")
+            print(f"Opening Serial Port {self.path} at {self.baudrate} baud...")
+            # timeout=0: read() returns whatever is buffered; waiting happens in select()
+            # exclusive: refuse to share the port with another process
+            self._serial = serial.Serial(self.path, self.baudrate, timeout=0, exclusive=True)
+            if self.low_latency and hasattr(self._serial, 'set_low_latency_mode'):
+                # Linux ASYNC_LOW_LATENCY (e.g. FTDI adapters): don't hold bytes back
+                self._serial.set_low_latency_mode(True)
+            self._fd = self._serial.fileno()
+            self._is_file = False
+        else:
+            # O_NONBLOCK also keeps open() of a FIFO from blocking until a writer shows up
+            self._fd = os.open(self.path, os.O_RDONLY | os.O_NONBLOCK)
+            self._is_file = stat.S_ISREG(os.fstat(self._fd).st_mode)
+        # Drop a partial packet left over from the previous connection
+        self.bridge.reset()
+
+    def _pump(self):
+        """Reads until EOF, error or stop(). Returns True if any data was decoded."""
+        source = self._serial if self._serial is not None else self._fd
+        got_data = False
+        with _Selector() as sel:
+            sel.register(self._fd, selectors.EVENT_READ)
+            sel.register(self._wake_r, selectors.EVENT_READ)
+            while not self._stop.is_set():
+                ready = sel.select(POLL_INTERVAL)
+                if not ready:
+                    continue
+                if any(key.fd == self._wake_r for key, _ in ready):
+                    return got_data
+
+                states = self.bridge.read_states(source, self.read_size)
+                if states is None:
+                    return got_data
+                if states:
+                    got_data = True
+                    self.on_states(states, self.bridge.last_rx_time)
+        return got_data
+
+    def _close(self):
+        if self._serial is not None:
+            try:
+                self._serial.close()
+            except Exception:
+                pass
+        elif self._fd is not None:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+        self._serial = None
+        self._fd = None
+
+    def _sleep(self, delay):
+        """Waits 'delay' seconds. Returns True if stop() was called meanwhile."""
+        return self._stop.wait(delay)
+
+
+class StreamManager:
+    """
+    Owns the live stream readers, at most one per device.
+    connect() on a device that already has a running reader returns that reader.
+    'on_states', 'bridge_factory' and 'options' (as for StreamReader) are the
+    defaults for every connect().
+    """
+
+    def __init__(self, on_states=None, bridge_factory=None, **options):
+        self.on_states = on_states
+        self.bridge_factory = bridge_factory
+        self.options = options
+        self._readers = {}
+        self._lock = threading.Lock()
+
+    def connect(self, path, on_states=None, **options):
+        """Starts a StreamReader for 'path' (options as for StreamReader) and returns it."""
+        key = device_key(path)
+        options = {**self.options, **options}
+        if 'bridge' not in options and self.bridge_factory is not None:
+            options['bridge'] = self.bridge_factory()
+        with self._lock:
+            reader = self._readers.get(key)
+            if reader is not None and reader.is_alive():
+                print(f"Already connected to {path} ({reader.status}); ignoring second connect.")
+                return reader
+            reader = StreamReader(path, on_states or self.on_states, on_stopped=self._forget, **options)
+            self._readers[key] = reader
+            reader.start()
+            return reader
+
+    def disconnect(self, path, timeout=2.0):
+        """Stops the reader of 'path'. Returns False if there was none."""
+        with self._lock:
+            reader = self._readers.pop(device_key(path), None)
+        if reader is None:
+            return False
+        reader.stop(timeout)
+        return True
+
+    def stop_all(self, timeout=2.0):
+        with self._lock:
+            readers = list(self._readers.values())
+            self._readers.clear()
+        for reader in readers:
+            reader.stop(timeout)
+
+    def is_connected(self, path):
+        """True if 'path' has a reader (connected or waiting to reconnect)."""
+        with self._lock:
+            reader = self._readers.get(device_key(path))
+        return reader is not None and reader.is_alive()
+
+    def readers(self):
+        with self._lock:
+            return dict(self._readers)
+
+    def _forget(self, reader):
+        with self._lock:
+            key = device_key(reader.path)
+            if self._readers.get(key) is reader:
+                del self._readers[key]
@@ -1,118 +1,107 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog
-import json
 import os
-import sys
-import threading
 
 import core.cfg as cfg
-from core.drone_state import DroneSelfState
+from core import recording_file
+from core.history import HistoryPolicy
+from core.json_loader import IncrementalJsonLoader
+from core.recording_query import open_recording
 from ui.app_window import DroneApp
+from ui.catalog_dialog import CatalogDialog
 from gs_serial.serial_bridge import SerialBridge
+from gs_serial.stream_manager import StreamManager
+from gs_serial.ingest_service import IngestService
+from gs_serial.shm_ring import DecoderProcess
+from gs_serial.raw_capture import RawCaptureWriter, CaptureReplay
 
 def load_file_content(file_path, app):
     """
-    Helper to read a JSON file and push data to the app.
+    Helper to read a recording (binary or JSON) and push data to the app.
+    Binary recordings are memory-mapped and archives decompress chunks on
+    demand, so only the header is read here (open_recording);
+    JSON is parsed in the background while the app shows what has arrived.
     """
     if not os.path.exists(file_path):
         print(f"[ERROR] File not found: {file_path}")
         return
 
     print(f"Loading file: {file_path}")
+    app.cancel_loading()
     try:
-        with open(file_path, 'r') as f:
-            raw_data = json.load(f)
-        
-        loaded_trajectories = []
-        
-        # Parse List[List[Dict]] -> List[List[DroneSelfState]]
-        for raw_path in raw_data:
-            parsed_path = []
-            for state_dict in raw_path:
-                state = DroneSelfState(**state_dict)
-                parsed_path.append(state)
-            loaded_trajectories.append(parsed_path)
+        if recording_file.is_json_recording(file_path):
+            app.load_data_incremental(IncrementalJsonLoader(file_path))
+            return
+
+        # The graphs query the file for the fields they show instead of reading whole columns
+        recording = open_recording(file_path)
+        loaded_trajectories = recording.load()
         
-        app.load_data(loaded_trajectories)
+        app.load_data(loaded_trajectories, recording=recording)
         print(f"Successfully loaded {len(loaded_trajectories)} trajectories.")
         
     except Exception as e:
         print(f"Failed to load file: {e}")
         messagebox.showerror("Load Error", f"Could not load file:\n{e}")
 
-import serial  # Ensure pyserial is installed
+# Live stream readers (StreamManager, IngestService, DecoderProcess or CaptureReplay), created in main()
+streams = None
+# Raw byte log of the live sources (--capture), shared by their SerialBridges
+capture = None
 
-def start_stream(path, app):
+def create_streams(app, args):
     """
-    Starts a thread to read from the serial/pipe and update arguments.
+    Builds the reader for live sources. 'thread' mode runs one poll()-based
+    reader thread per device; 'asyncio' mode multiplexes serial ports, pipes,
+    UDP and TCP sources in one event loop and merges them per drone in time order;
+    'process' runs the asyncio readers in a separate process that hands decoded
+    states back through a shared-memory ring. '-s replay' feeds a raw capture
+    back through the same decoders instead.
     """
-    print(f"Connecting to stream at {path}...")
-    
-    def read_loop():
-        # Ensure FIFO exists if it's a pipe?
-        # If it's a real device, it must exist. 
-        # For our test, simulating with FIFO, we assume it's created by sender or we wait.
-        # But open() on FIFO blocks until writer opens it.
-        
-        bridge = SerialBridge()
-        serial_obj = None
-        fd = None
-        
-        try:
-            if path.startswith("/dev/tty"):
-                # Real serial port requires configuration
-                print(f"Opening Serial Port {path} at 115200 baud...")
-                try:
-                    # buffer_size=0 to minimize latency? Or default.
-                    # timeout=None means blocking read (wait forever for data)
-                    # This prevents read() returning b'' (EOF) just because of a timeout
-                    serial_obj = serial.Serial(path, 115200, timeout=None)
-                    fd = serial_obj.fileno()
-                except serial.SerialException as e:
-                    print(f"Failed to open serial port: {e}")
-                    return
-            else:
-                # FIFO or file
-                # Since serial_reader.cpp expects a read loop, we can just pass the FD.
-                # But wait, read_drone_state does ONE read of a struct. It loops internally for partials of THAT struct.
-                # We need to loop endlessly here.
-                fd = os.open(path, os.O_RDONLY) # Blocks here for FIFO
-                
-            print("Stream Connected.")
-            
-            while True:
-                # read_state returns DroneSelfState or None
-                # Pass the serial object if it exists so we use its read() method (blocking)
-                # Otherwise pass the FD (for pipes/files)
-                if serial_obj:
-                    state = bridge.read_state(serial_obj)
-                else:
-                    state = bridge.read_state(fd)
-                    
-                if state:
-                    # Push to UI thread
-                    app.root.after(0, app.process_new_state, state)
-                else:
-                    # read failure or closed?
-                    # The C loop returns -1 on error/EOF.
-                    # If EOF, we might want to exit or wait.
-                    print("Stream Ended or Error.")
-                    break
-            
-            if serial_obj:
-                serial_obj.close()
-            elif fd:
-                os.close(fd)
-            
-        except Exception as e:
-            print(f"Stream Error: {e}")
-            import traceback
-            traceback.print_exc()
+    options = dict(read_size=args.read_size, baudrate=args.baudrate,
+                   low_latency=args.low_latency, reconnect=not args.no_reconnect)
+    if args.ingest == "process" and args.source != "replay":
+        bridge_options = dict(lib_path=args.native_lib, layout=args.protocol)
+        if args.capture:
+            bridge_options['capture_path'] = args.capture
+        streams = DecoderProcess(bridge_options=bridge_options,
+                                 reader_options=dict(options, reorder_window=args.reorder_window),
+                                 ingest="asyncio", capacity=args.shm_capacity, link_stats=app.link_stats)
+        app.shared_ring = streams.reader
+        return streams
+
+    def on_states(states, rx_time):
+        # Reader -> UI thread; animate_loop drains the queue once per render tick
+        app.ingest_queue.put_many(states, rx_time=rx_time)
 
-    t = threading.Thread(target=read_loop, daemon=True)
-    t.start()
+    def make_bridge():
+        # Share the app's LinkStats so the HUD shows the stream's counters
+        return SerialBridge(lib_path=args.native_lib, layout=args.protocol, link_stats=app.link_stats,
+                            capture=capture)
+
+    if args.source == "replay":
+        return CaptureReplay(on_states, make_bridge, speed=args.replay_speed)
+    if args.ingest == "asyncio":
+        return IngestService(on_states, make_bridge, reorder_window=args.reorder_window, **options)
+    return StreamManager(on_states, make_bridge, **options)
+
+def start_stream(path):
+    """
+    Starts (or reuses) the readers for 'path': one source, or several separated by commas
+    (paths or udp://, tcp://, tcp-listen://, serial://, fifo:// specs in asyncio mode).
+    """
+    for source in path.split(","):
+        source = source.strip()
+        if not source:
+            continue
+        if "://" in source and isinstance(streams, StreamManager):
+            print(f"[ERROR] {source}: network sources need --ingest asyncio")
+            continue
+        print(f"Connecting to stream at {source}...")
+        streams.connect(source)
 
 def main():
+    global streams, capture
     args = cfg.parse_args()
     bounds = cfg.calculate_bounds(args)
     
@@ -125,23 +114,56 @@ def main():
     root.title(f"Drone Viz (Res: {args.res})")
 
     # --- UI Callback for "Load" Button ---
-    def handle_ui_load_request():
+    def browse_for_recording():
         file_path = filedialog.askopenfilename(
             title="Select Drone Recording",
-            filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")],
+            filetypes=recording_file.FILETYPES,
             initialdir=os.getcwd()
         )
         if file_path:
             load_file_content(file_path, app)
 
+    catalog_dialog = None
+
+    def handle_ui_load_request():
+        # Search the catalog of --library; the plain file dialog stays one click away
+        nonlocal catalog_dialog
+        if not args.catalog:
+            browse_for_recording()
+            return
+        if catalog_dialog is not None and catalog_dialog.winfo_exists():
+            catalog_dialog.lift()
+            return
+        try:
+            catalog_dialog = CatalogDialog(root, args.catalog, args.library,
+                                           on_open=lambda path: load_file_content(path, app),
+                                           on_browse=browse_for_recording)
+        except Exception as e:
+            print(f"[WARNING] Catalog {args.catalog} unavailable ({e}), using the file dialog")
+            browse_for_recording()
+
     def handle_ui_connect_request():
         path = simpledialog.askstring("Connect to Stream", "Enter Serial Path:", initialvalue="/dev/ttyUSB0")
         if path:
+            if streams.is_connected(path):
+                if messagebox.askyesno("Connect to Stream", f"Already reading {path}.\nDisconnect it?"):
+                    streams.disconnect(path)
+                return
             print(f"User requested connection to: {path}")
-            start_stream(path, app)
+            start_stream(path)
 
     # Init App
-    app = DroneApp(root, bounds, args.width, args.height, args.res, handle_ui_load_request, handle_ui_connect_request)
+    history = None
+    if args.history_minutes > 0:
+        history = HistoryPolicy(args.history_minutes * 60.0, args.history_tiers)
+    app = DroneApp(root, bounds, args.width, args.height, args.res, handle_ui_load_request, handle_ui_connect_request,
+                   queue_size=args.queue_size, queue_policy=args.queue_policy,
+                   latency_log=args.latency_log, record_dir=args.record_dir, history=history,
+                   playback_speed=args.playback_speed)
+    if args.capture and args.ingest != "process" and args.source != "replay":
+        capture = RawCaptureWriter(args.capture, args.protocol)
+        print(f"Capturing raw stream bytes to {args.capture}")
+    streams = create_streams(app, args)
 
     # --- CLI Auto-Load Logic ---
     if args.source == "file":
@@ -149,9 +171,28 @@ def main():
         root.after(100, lambda: load_file_content(args.path, app))
     elif args.source == "stream":
         print(f"Stream mode selected. Connecting to {args.path}")
-        start_stream(args.path, app)
+        start_stream(args.path)
+    elif args.source == "replay":
+        print(f"Replay mode selected. Replaying {args.path}")
+        streams.connect(args.path)
 
     root.mainloop()
 
+    # Window closed while recording: finish the journal so it loads without recovery
+    journal_path = app.stop_recording()
+    if journal_path:
+        print(f"Recording kept at {journal_path}")
+
+    # Close the devices instead of leaving daemon threads blocked on them
+    app.ingest_queue.close()
+    if app.shared_ring is not None:
+        print(f"Shared ring stats: {app.shared_ring.stats()}")
+    streams.stop_all()
+    if capture is not None:
+        capture.close()
+        print(f"Capture stats: {capture.stats()}")
+    print(f"Ingest queue stats: {app.ingest_queue.stats()}")
+    print(f"Link stats: {app.link_stats.snapshot()}")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
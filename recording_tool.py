@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Headless batch processing of recordings, one worker process per core.
+
+    # JSON logs -> binary (.gsrec) or compressed archives (.gsarc)
+    python recording_tool.py convert logs/ --format gsarc --out archive/
+    # Per-drone flight summaries, streamed to CSV or JSON as files finish
+    python recording_tool.py summarize logs/ archive/ --out summary.csv
+    # Index a library once (then only new/changed files), and query it
+    python recording_tool.py index logs/ archive/
+    python recording_tool.py find --drone 3 --event gps_loss --near 32.0871,34.7791 --radius 200
+    # 30 s of one drone's altitude, reading only that part of the file
+    python recording_tool.py query flight.gsarc --drones 3 --fields alt --t0 120 --t1 150 --out alt.csv
+
+Directories are searched recursively for recordings (.json, .gsrec, .gsarc).
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+from core import recording_file
+from core.archive import ARCHIVE_EXTENSION, CODECS, save_archive
+from core.catalog import CATALOG_NAME, EVENT_KINDS, Catalog
+from core.drone_state import STATE_FIELDS
+from core.flight_summary import SUMMARY_FIELDS, summarize_store
+from core.recording_query import TIME_COLUMN, open_recording
+
+FORMATS = {"gsrec": recording_file.BINARY_EXTENSION, "gsarc": ARCHIVE_EXTENSION}
+DEFAULT_CATALOG = os.path.join("recordings", CATALOG_NAME)
+
+
+# --- Workers (run in the pool's processes) ---
+
+def convert_file(path, out_path, fmt, codec, lossless):
+    start = time.perf_counter()
+    store = recording_file.load_recording(path)
+    if fmt == "gsarc":
+        save_archive(store, out_path, codec=codec, lossless=lossless)
+    else:
+        recording_file.save_binary(store, out_path)
+    return {"file": path, "output": out_path, "samples": sum(len(t) for t in store),
+            "input_bytes": os.path.getsize(path), "output_bytes": os.path.getsize(out_path),
+            "seconds": time.perf_counter() - start}
+
+
+def summarize_file(path, sample_period):
+    return summarize_store(recording_file.load_recording(path), source=path, sample_period=sample_period)
+
+
+# --- Output ---
+
+class RowWriter:
+    """Streams rows as CSV or as one JSON array, depending on the file name ('-' = CSV to stdout)."""
+
+    def __init__(self, path, fields):
+        self.file = sys.stdout if path == "-" else open(path, "w", newline="")
+        self.json = path.lower().endswith(".json")
+        self.count = 0
+        if self.json:
+            self.file.write("[")
+        else:
+            self.csv = csv.DictWriter(self.file, fieldnames=fields, extrasaction="ignore")
+            self.csv.writeheader()
+
+    def write(self, row):
+        if self.json:
+            self.file.write(("," if self.count else "") + "\n  " + json.dumps(row))
+        else:
+            self.csv.writerow(row)
+        self.count += 1
+        self.file.flush()
+
+    def close(self):
+        if self.json:
+            self.file.write("\n]\n")
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+def run_pool(jobs, tasks, on_result):
+    """
+    Runs fn(*args) for every (fn, args) in 'tasks' across 'jobs' processes and
+    calls on_result(args[0], result) as each finishes. Returns the number of failures.
+    """
+    failures = 0
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(fn, *args): args[0] for fn, args in tasks}
+        for done, future in enumerate(as_completed(futures), 1):
+            path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"[ERROR] {path}: {e}", file=sys.stderr)
+                continue
+            print(f"[{done}/{len(futures)}] {path}", file=sys.stderr)
+            on_result(path, result)
+    return failures
+
+
+def output_path(path, fmt, out_dir, roots):
+    """Same name with the new extension, under 'out_dir' (mirroring the input tree) or next to the input."""
+    base = os.path.splitext(path)[0] + FORMATS[fmt]
+    if not out_dir:
+        return base
+    for root in roots:
+        if os.path.isdir(root) and os.path.abspath(path).startswith(os.path.abspath(root) + os.sep):
+            return os.path.join(out_dir, os.path.relpath(base, root))
+    return os.path.join(out_dir, os.path.basename(base))
+
+
+def cmd_convert(args):
+    sources = recording_file.find_recordings(
+        args.paths, (recording_file.JSON_EXTENSION,) if not args.all else recording_file.RECORDING_EXTENSIONS)
+    tasks = []
+    for path in sources:
+        out_path = output_path(path, args.format, args.out, args.paths)
+        if os.path.abspath(out_path) == os.path.abspath(path):
+            continue
+        if (not args.overwrite and os.path.exists(out_path)
+                and os.path.getmtime(out_path) >= os.path.getmtime(path)):
+            continue
+        os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+        tasks.append((convert_file, (path, out_path, args.format, args.codec, args.lossless)))
+    print(f"Converting {len(tasks)} of {len(sources)} recordings to .{args.format} "
+          f"({args.jobs or os.cpu_count()} processes)", file=sys.stderr)
+
+    writer = RowWriter(args.report, ["file", "output", "samples", "input_bytes", "output_bytes", "seconds"]) \
+        if args.report else None
+    totals = {"input_bytes": 0, "output_bytes": 0}
+
+    def on_result(path, result):
+        for key in totals:
+            totals[key] += result[key]
+        if writer:
+            writer.write(result)
+
+    start = time.perf_counter()
+    failures = run_pool(args.jobs, tasks, on_result)
+    if writer:
+        writer.close()
+    ratio = totals["input_bytes"] / totals["output_bytes"] if totals["output_bytes"] else 0.0
+    print(f"Done in {time.perf_counter() - start:.1f}s: {totals['input_bytes'] / 1e6:.1f} MB -> "
+          f"{totals['output_bytes'] / 1e6:.1f} MB ({ratio:.1f}x), {failures} failed", file=sys.stderr)
+    return failures
+
+
+def update_catalog(catalog, paths, jobs):
+    start = time.perf_counter()
+
+    def progress(done, total, path):
+        print(f"[{done}/{total}] {path}", file=sys.stderr)
+
+    counts = catalog.update(paths, jobs=jobs, progress=progress)
+    print(f"Catalog {catalog.path} updated in {time.perf_counter() - start:.1f}s: {counts['indexed']} indexed, "
+          f"{counts['unchanged']} unchanged, {counts['removed']} removed, {counts['failed']} failed", file=sys.stderr)
+    return counts
+
+
+def cmd_summarize(args):
+    if args.catalog:
+        # Only new or changed files are parsed; the rows come from the catalog
+        with Catalog(args.catalog) as catalog:
+            counts = update_catalog(catalog, args.paths, args.jobs)
+            writer = RowWriter(args.out, SUMMARY_FIELDS)
+            try:
+                for row in catalog.summaries(recording_file.find_recordings(args.paths)):
+                    writer.write(row)
+            finally:
+                writer.close()
+        return counts["failed"]
+
+    sources = recording_file.find_recordings(args.paths)
+    print(f"Summarizing {len(sources)} recordings ({args.jobs or os.cpu_count()} processes)", file=sys.stderr)
+    writer = RowWriter(args.out, SUMMARY_FIELDS)
+
+    def on_result(path, rows):
+        for row in rows:
+            writer.write(row)
+
+    start = time.perf_counter()
+    try:
+        failures = run_pool(args.jobs, [(summarize_file, (path, args.sample_period)) for path in sources], on_result)
+    finally:
+        writer.close()
+    print(f"Done in {time.perf_counter() - start:.1f}s: {writer.count} drones, {failures} failed", file=sys.stderr)
+    return failures
+
+
+def cmd_index(args):
+    with Catalog(args.catalog) as catalog:
+        return update_catalog(catalog, args.paths, args.jobs)["failed"]
+
+
+def cmd_find(args):
+    with Catalog(args.catalog) as catalog:
+        rows = catalog.find(drone_id=args.drone, event=args.event, near=args.near, radius_m=args.radius,
+                            t0=args.t0, t1=args.t1, under=args.under)
+    writer = RowWriter(args.out, SUMMARY_FIELDS + ["events"])
+    try:
+        for row in rows:
+            writer.write(row)
+    finally:
+        writer.close()
+    print(f"{len(rows)} drones in {len({row['file'] for row in rows})} recordings", file=sys.stderr)
+    return 0
+
+
+def cmd_query(args):
+    fields = args.fields or list(STATE_FIELDS)
+    result = open_recording(args.path).query(drones=args.drones, fields=fields, t0=args.t0, t1=args.t1,
+                                             bbox=args.bbox)
+    samples = sum(len(columns[TIME_COLUMN]) for columns in result.values())
+    if args.out.lower().endswith(".npz"):
+        np.savez(args.out, **{f"{drone_id}/{name}": values for drone_id, columns in result.items()
+                              for name, values in columns.items()})
+    else:
+        names = [TIME_COLUMN] + fields
+        writer = RowWriter(args.out, ["drone_id"] + names)
+        try:
+            for drone_id, columns in result.items():
+                for values in zip(*(columns[name].tolist() for name in names)):
+                    writer.write({"drone_id": drone_id, **dict(zip(names, values))})
+        finally:
+            writer.close()
+    print(f"{samples} samples of {len(result)} drones", file=sys.stderr)
+    return 0
+
+
+def float_list(count):
+    def parse(text):
+        try:
+            values = tuple(float(v) for v in text.split(","))
+        except ValueError:
+            values = ()
+        if len(values) != count:
+            raise argparse.ArgumentTypeError(f"expected {count} comma-separated numbers, got '{text}'")
+        return values
+    return parse
+
+
+def field_list(text):
+    fields = [v.strip() for v in text.split(",") if v.strip()]
+    unknown = [f for f in fields if f not in STATE_FIELDS]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown field(s) {unknown} (expected some of {list(STATE_FIELDS)})")
+    return fields
+
+
+def lat_lon(text):
+    try:
+        lat, lon = (float(v) for v in text.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected LAT,LON, got '{text}'")
+    return lat, lon
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert and summarize drone recordings (headless)")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--jobs", "-j", type=int, default=None, help="Worker processes (default: one per core)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("convert", parents=[common], help="Convert JSON recordings to .gsrec or .gsarc")
+    p.add_argument("paths", nargs="+", help="Recordings and/or directories")
+    p.add_argument("--format", choices=sorted(FORMATS), default="gsrec", help="Output format")
+    p.add_argument("--out", type=str, default=None,
+                   help="Output directory (mirrors the input directories; default: next to each input)")
+    p.add_argument("--codec", choices=sorted(CODECS), default="zlib", help="Compression of .gsarc archives")
+    p.add_argument("--lossless", action="store_true", help="Don't quantize floats in .gsarc archives")
+    p.add_argument("--all", action="store_true", help="Convert every recording format, not just JSON")
+    p.add_argument("--overwrite", action="store_true", help="Redo outputs that are newer than their input")
+    p.add_argument("--report", type=str, default=None, help="Write one row per converted file here (.csv/.json)")
+    p.set_defaults(func=cmd_convert)
+
+    p = sub.add_parser("summarize", parents=[common], help="Per-drone flight summaries")
+    p.add_argument("paths", nargs="+", help="Recordings and/or directories")
+    p.add_argument("--out", type=str, default="-", help="Output file, .csv or .json ('-' = CSV on stdout)")
+    p.add_argument("--sample_period", type=float, default=None,
+                   help="Seconds between samples for recordings without device timestamps "
+                        "(default: times are sample indices)")
+    p.add_argument("--catalog", type=str, nargs="?", const=DEFAULT_CATALOG, default=None,
+                   help=f"Index the recordings into this catalog (default {DEFAULT_CATALOG}) and read the "
+                        f"summaries from it, so unchanged files aren't parsed again")
+    p.set_defaults(func=cmd_summarize)
+
+    p = sub.add_parser("index", parents=[common], help="Add new and changed recordings to the catalog")
+    p.add_argument("paths", nargs="+", help="Recordings and/or directories")
+    p.add_argument("--catalog", type=str, default=DEFAULT_CATALOG, help="Catalog database")
+    p.set_defaults(func=cmd_index)
+
+    p = sub.add_parser("find", help="Query the catalog: one row per matching recording and drone")
+    p.add_argument("--catalog", type=str, default=DEFAULT_CATALOG, help="Catalog database")
+    p.add_argument("--drone", type=int, default=None, help="Drone ID")
+    p.add_argument("--event", choices=EVENT_KINDS, default=None,
+                   help="Only drones with this event (with --near: an event that close)")
+    p.add_argument("--near", type=lat_lon, default=None, metavar="LAT,LON",
+                   help="Flights (or events) within --radius of this point")
+    p.add_argument("--radius", type=float, default=100.0, help="Metres around --near")
+    p.add_argument("--t0", type=float, default=None, help="Overlapping recording time from (s)")
+    p.add_argument("--t1", type=float, default=None, help="Overlapping recording time to (s)")
+    p.add_argument("--under", type=str, default=None, help="Only recordings under this directory")
+    p.add_argument("--out", type=str, default="-", help="Output file, .csv or .json ('-' = CSV on stdout)")
+    p.set_defaults(func=cmd_find)
+
+    p = sub.add_parser("query", help="Samples of some drones/fields in a time window, without loading the file")
+    p.add_argument("path", help="Recording (.gsrec and .gsarc are read lazily)")
+    p.add_argument("--drones", type=lambda s: [int(v) for v in s.split(",")], default=None,
+                   help="Comma-separated drone IDs (default: all)")
+    p.add_argument("--fields", type=field_list, default=None,
+                   help="Comma-separated fields (default: all)")
+    p.add_argument("--t0", type=float, default=None, help="From this recording time (s)")
+    p.add_argument("--t1", type=float, default=None, help="Up to this recording time (s)")
+    p.add_argument("--bbox", type=float_list(4), default=None, metavar="MIN_LAT,MAX_LAT,MIN_LON,MAX_LON",
+                   help="Only samples inside this box")
+    p.add_argument("--out", type=str, default="-",
+                   help="Output file: .csv, .json or .npz (arrays named DRONE/FIELD); '-' = CSV on stdout")
+    p.set_defaults(func=cmd_query)
+
+    args = parser.parse_args()
+    sys.exit(1 if args.func(args) else 0)
+
+
+if __name__ == "__main__":
+    main()
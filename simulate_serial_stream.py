@@ -1,11 +1,12 @@
 import json
-import struct
 import time
 import os
 import sys
 import argparse
 
-# Define the struct format
+from gs_serial import protocols
+
+# Default wire format: packed struct drone_self_state (gs_serial/serial_reader.h)
 # < = little endian
 # h = short (2 bytes)
 # f = float (4 bytes)
@@ -13,43 +14,28 @@ import argparse
 # h = short
 # h = short
 # h = short (bitfields)
-STRUCT_FMT = '<hfffffffhhh'
+DEFAULT_FORMAT = "drone_self_state"
+STRUCT_FMT = protocols.DRONE_SELF_STATE.fmt
 
 def load_recording(path):
     with open(path, 'r') as f:
         return json.load(f)
 
-def pack_state(state):
+def pack_state(state, layout=protocols.DRONE_SELF_STATE):
     # state is a dict
-    id_val = int(state.get('id', 0))
-    lat = float(state.get('lat', 0.0))
-    lon = float(state.get('lon', 0.0))
-    alt = float(state.get('alt', 0.0))
-    vn = float(state.get('velocity_north', 0.0))
-    ve = float(state.get('velocity_east', 0.0))
-    vd = float(state.get('velocity_down', 0.0))
-    hdg = float(state.get('heading', 0.0))
-    sm = int(state.get('sm_current_stat', 0))
-    bat = int(state.get('battery_precentages', 0))
-    
-    keep_alive = int(state.get('drones_keep_alive', 0))
-    gps_fix = int(state.get('gps_3d_fix', 0))
-    
-    # Pack bitfields
-    # Assuming keep_alive (4 bits) at LSB, gps_fix (1 bit) next
-    # Based on verification: keep_alive=10, gps=1 -> 26 (11010)
-    # bits: 4(gps) 3 2 1 0(keep_alive)
-    bitfield = (gps_fix << 4) | (keep_alive & 0x0F)
-    
-    return struct.pack(STRUCT_FMT, 
-                       id_val, lat, lon, alt, vn, ve, vd, hdg, sm, bat, bitfield)
+    # Bitfields (keep_alive 4 bits at LSB, gps_fix 1 bit next) are packed by the layout:
+    # keep_alive=10, gps=1 -> 26 (11010)
+    return layout.encode(state)
 
 def main():
     parser = argparse.ArgumentParser(description="Stream simulated drone data to FIFO")
     parser.add_argument("--file", default="data/recording.json", help="Path to recording JSON")
     parser.add_argument("--output", default="/tmp/drone_serial", help="Path to output FIFO")
     parser.add_argument("--rate", type=float, default=10.0, help="Hz to stream at (approx)")
+    parser.add_argument("--format", default=DEFAULT_FORMAT, choices=protocols.available_layouts(),
+                        help="Wire format to emit")
     args = parser.parse_args()
+    layout = protocols.get_layout(args.format)
 
     if not os.path.exists(args.file):
         print(f"Recording file not found: {args.file}")
@@ -66,7 +52,7 @@ def main():
         
     num_frames = len(data[0])
     
-    print(f"Loaded {num_drones} drones with {num_frames} frames each.")
+    print(f"Loaded {num_drones} drones with {num_frames} frames each. Format: {layout.name} ({layout.size} bytes)")
     
     # Create FIFO if not exists
     if not os.path.exists(args.output):
@@ -93,7 +79,7 @@ def main():
             for i in range(num_drones):
                 if t < len(data[i]):
                     state = data[i][t]
-                    packed = pack_state(state)
+                    packed = pack_state(state, layout)
                     fifo.write(packed)
             
             fifo.flush()
@@ -1,37 +1,75 @@
 import tkinter as tk
 from tkinter import ttk
 import math
-from dataclasses import asdict
-import json
 import os
-from tkinter import filedialog
+import time
+from tkinter import filedialog, messagebox
 from ui.map_canvas import MapCanvas
 from ui.controls import ControlPanel
 from ui.graph_panel import GraphPanel
+from core.ingest_queue import IngestQueue, DROP_OLDEST
+from core.latency import LatencyMonitor
+from core.playback_clock import PlaybackClock
+from core.link_stats import LinkStats
+from core.telemetry_store import TelemetryStore
+from core.frame_sampler import FrameSampler
+from core import recording_file
+from core.recorder import StreamingRecorder, recover_partial_recordings, PARTIAL_SUFFIX
 
 class DroneApp:
     DRONE_COLORS = ["#e6194b", "#3cb44b", "#ffe119", "#4363d8", "#f58231", "#911eb4", "#46f0f0"]
     
     # Playback Settings
-    RENDER_DELAY = 16       # ms (approx 60 FPS)
-    PLAY_SPEED = 0.3        # Data frames to advance per render tick
+    RENDER_DELAY = 16       # ms between frame starts (approx 60 FPS)
     
     # --- OPTIMIZATION: Graph Update Throttle ---
     graph_update_counter = 0
     GRAPH_SKIP_FRAMES = 3   # Update graph every N render ticks (approx 20 FPS)
 
-    def __init__(self, root, map_bounds, width, height, resolution, on_load_request, on_connect_request):
+    LOAD_POLL_DELAY = 50    # ms between checks of a background load
+    HISTORY_COMPACT_DELAY = 1000  # ms between live history compactions
+
+    def __init__(self, root, map_bounds, width, height, resolution, on_load_request, on_connect_request,
+                 queue_size=10000, queue_policy=DROP_OLDEST, latency_log=None, record_dir="recordings",
+                 history=None, playback_speed=1.0):
         self.root = root
         self.is_running = False
+
+        # Live stream hand-off: the reader thread pushes, animate_loop drains once per tick
+        self.ingest_queue = IngestQueue(queue_size, queue_policy)
+        # Per-drone link/decode/render latency (overlay + optional rolling log)
+        self.latency = LatencyMonitor(latency_log)
+        # Link quality counters, filled by the SerialBridge of the live stream
+        self.link_stats = LinkStats()
+        # Set (to a gs_serial.shm_ring.ShmRingReader) when decoding runs in a separate process
+        self.shared_ring = None
         
+        # Playback timeline: frame f shows the drones at time t_start + f * frame_period
+        # (one frame = the typical sample interval; with no device timestamps, one sample)
         self.play_head = 0.0
+        # Wall clock -> recording time while playing (speed, reverse, frame skipping)
+        self.clock = PlaybackClock(playback_speed)
         self.max_frames = 0
-        self.trajectories = [] 
+        self.t_start = 0.0
+        self.t_end = 0.0
+        self.frame_period = 1.0
+        # Columnar per-drone history; trajectories[id - 1] is that drone's DroneTrack
+        self.trajectories = TelemetryStore()
+        # Interpolates every drone at the play head at once; invalidate() after changing the store
+        self.frame_sampler = FrameSampler()
+        # Live retention (core.history.HistoryPolicy, None = keep every sample).
+        # Applied periodically once live data has arrived
+        self.history = history
+        self._history_pending = False
         self.has_centered_on_stream = False 
+        # Background JSON load in progress (core.json_loader.IncrementalJsonLoader)
+        self.loader = None
 
-        # Recording State
+        # Recording State: samples go straight to a journal on disk (core/recorder.py)
         self.is_recording = False
-        self.recording_buffer = [] # List[List[DroneSelfState]] - mimicking trajectories structure
+        self.recorder = None
+        self.record_dir = record_dir
+        recover_partial_recordings(record_dir)
         
         # Smoothing for live stream display (reduces jitter from pixel rounding)
         # Format: {drone_id: {'lat': float, 'lon': float, 'heading': float, 'vn': float, 've': float}}
@@ -66,23 +104,33 @@ class DroneApp:
             'reset': self.reset,
             'drag': self.on_scrub,
             'load': on_load_request,
+            'cancel_load': self.cancel_loading,
             'connect': on_connect_request,
-            'record': self.toggle_recording
+            'record': self.toggle_recording,
+            'speed': self.set_speed,
+            'reverse': self.set_reverse,
         }
-        self.controls = ControlPanel(root, callbacks)
+        self.controls = ControlPanel(root, callbacks, speed=self.clock.speed)
         self.controls.pack(side=tk.BOTTOM, fill=tk.X)
 
         self.animate_loop()
+        if history is not None:
+            self.root.after(self.HISTORY_COMPACT_DELAY, self._compact_history)
 
-    def load_data(self, trajectories):
+    def load_data(self, trajectories, recording=None):
+        """
+        Shows a recording: a TelemetryStore, or List[List[DroneSelfState]] (converted).
+        'recording' (core/recording_query.py) is what the graphs query instead of the store.
+        """
+        if not isinstance(trajectories, TelemetryStore):
+            trajectories = TelemetryStore.from_trajectories(trajectories)
         self.trajectories = trajectories
         if trajectories:
-            self.max_frames = max(len(t) for t in trajectories) - 1
-            self.controls.set_slider_max(self.max_frames)
+            self.update_timeline(recompute_period=True)
             self.controls.update_status("Data Loaded")
             
             # Update Graph Data
-            self.graph_panel.set_data(trajectories, self.DRONE_COLORS)
+            self.graph_panel.set_data(trajectories, self.DRONE_COLORS, recording=recording)
             
             initial_lats = []
             initial_lons = []
@@ -100,17 +148,118 @@ class DroneApp:
 
             self.draw_frame()
 
+    def load_data_incremental(self, loader):
+        """
+        Shows a recording while 'loader' (IncrementalJsonLoader) parses it in the
+        background: blocks are appended as they arrive and playback can start
+        with the first one. The Load button cancels until it is done.
+        """
+        self.cancel_loading()
+        self.trajectories = TelemetryStore()
+        self.loader = loader.start()
+        self._loader_shown = False
+        self._loading_track = None
+        self.controls.set_loading(True)
+        self.controls.update_status("Loading 0%")
+        self.root.after(self.LOAD_POLL_DELAY, self._poll_loader, self.loader)
+
+    def cancel_loading(self):
+        if self.loader is None:
+            return
+        self.loader.cancel()
+        self.loader = None
+        self.controls.set_loading(False)
+        self.trajectories.compact()
+        self.controls.update_status(f"Load Cancelled ({self.trajectories.max_len} frames)")
+
+    def _poll_loader(self, loader):
+        if loader is not self.loader:
+            # Cancelled, or replaced by a newer load
+            return
+        done = loader.done
+        is_new_drone = False
+        blocks = loader.poll()
+        for drone_id, columns in blocks:
+            track = self.trajectories.track(drone_id, create=True)
+            if self._loading_track is not None and self._loading_track is not track:
+                # JSON holds one drone after the other: the previous one is complete
+                self._loading_track.compact()
+            self._loading_track = track
+            is_new_drone = is_new_drone or (len(track) == 0 and len(columns.get('id', ())) > 0)
+            track.extend_columns(columns)
+        if blocks:
+            self.frame_sampler.invalidate()
+
+        if blocks and self.trajectories.max_len:
+            if not self._loader_shown:
+                # First samples: set up the view and let playback start
+                self._loader_shown = True
+                self.load_data(self.trajectories)
+            else:
+                self.update_timeline(recompute_period=is_new_drone)
+                if is_new_drone:
+                    self.graph_panel.set_data(self.trajectories, self.DRONE_COLORS)
+
+        if not done:
+            self.controls.update_status(f"Loading {loader.progress * 100:.0f}%")
+            self.root.after(self.LOAD_POLL_DELAY, self._poll_loader, loader)
+            return
+
+        self.loader = None
+        self.controls.set_loading(False)
+        self.trajectories.compact()
+        if loader.error is not None:
+            print(f"Failed to load file: {loader.error}")
+            self.controls.update_status("Load Failed")
+            messagebox.showerror("Load Error", f"Could not load file:\n{loader.error}")
+        elif loader.cancelled:
+            self.controls.update_status("Load Cancelled")
+        else:
+            print(f"Successfully loaded {len(self.trajectories)} trajectories ({loader.samples} samples).")
+            self.controls.update_status("Data Loaded")
+            if not self._loader_shown:
+                self.load_data(self.trajectories)
+
+    def update_timeline(self, recompute_period=False):
+        """Fits the frame slider to the time span of the trajectories."""
+        span = self.trajectories.time_range()
+        if span is None:
+            return
+        if recompute_period:
+            self.frame_period = self.trajectories.sample_period()
+        self.t_start = span[0]
+        self.t_end = span[1]
+        self.max_frames = max(math.ceil((span[1] - span[0]) / self.frame_period - 1e-9), 0)
+        self.controls.set_slider_max(self.max_frames)
+
+    def extend_timeline(self, t_end):
+        """Moves the end of the timeline to 't_end' if it is later. O(1), for live data."""
+        if t_end <= self.t_end:
+            return
+        self.t_end = t_end
+        max_frames = max(math.ceil((t_end - self.t_start) / self.frame_period - 1e-9), 0)
+        if max_frames != self.max_frames:
+            self.max_frames = max_frames
+            self.controls.set_slider_max(max_frames)
+
+    def frame_time(self, frame):
+        """Recording time (s) shown at 'frame' (float)."""
+        return self.t_start + frame * self.frame_period
+
     def play(self):
         if not self.trajectories: return
         self.is_running = True
-        self.controls.update_status("Playing")
+        self.clock.start(self.frame_time(min(self.play_head, self.max_frames)))
+        self._update_play_status()
 
     def pause(self):
         self.is_running = False
+        self.clock.pause()
         self.controls.update_status("Paused")
 
     def reset(self):
         self.is_running = False
+        self.clock.pause()
         self.play_head = 0.0
         self.controls.set_slider_val(0)
         self.controls.update_status("Reset")
@@ -118,81 +267,73 @@ class DroneApp:
 
     def on_scrub(self, frame_idx):
         self.play_head = float(frame_idx)
+        self.clock.seek(self.frame_time(self.play_head))
         self.draw_frame()
 
-    def lerp(self, a, b, t):
-        return a + (b - a) * t
+    def set_speed(self, speed):
+        self.clock.set_speed(speed)
+        if self.is_running:
+            self._update_play_status()
 
-    def lerp_angle(self, a, b, t):
-        diff = (b - a + 180) % 360 - 180
-        return (a + diff * t) % 360
+    def set_reverse(self, reverse):
+        self.clock.set_reverse(reverse)
+        if self.is_running:
+            self._update_play_status()
+
+    def _update_play_status(self):
+        direction = " reverse" if self.clock.reverse else ""
+        self.controls.update_status(f"Playing {self.clock.speed:g}x{direction}")
+
+    def advance_playback(self):
+        """
+        Moves play_head to the recording time of the playback clock, looping
+        at either end. A frame that took long just moves it further.
+        """
+        t = self.clock.tick(self.RENDER_DELAY / 1000.0)
+        t_last = self.frame_time(self.max_frames)
+        if t > t_last or t < self.t_start:
+            # Past the end (or the start in reverse): loop to the other end
+            t = self.t_start if t > t_last else t_last
+            self.clock.seek(t)
+        self.play_head = (t - self.t_start) / self.frame_period
 
     def draw_frame(self):
         # Even if hidden, we update the map so it's ready when tab is switched
         self.map_view.clear_drones()
         
-        idx_current = int(self.play_head)
-        idx_next = idx_current + 1
-        
-        if idx_next > self.max_frames:
-            idx_next = self.max_frames
-            idx_current = self.max_frames 
-        
-        alpha = self.play_head - idx_current
+        idx_current = min(int(self.play_head), self.max_frames)
+        # Every drone is drawn at the same moment, whatever its sample rate
+        t = self.frame_time(min(self.play_head, self.max_frames))
         
         self.controls.update_frame_label(idx_current)
         if int(self.controls.slider.get()) != idx_current and self.is_running:
              self.controls.slider.set(idx_current)
 
-        active_states = {} 
-        
-        for i, path in enumerate(self.trajectories):
-            if not path:
-                continue
+        # Every drone interpolated between its samples before and after 't' in one
+        # NumPy pass (core/frame_sampler.py). Before its first / after its last
+        # sample a drone stays at that sample.
+        frame = self.frame_sampler.sample(self.trajectories, t)
+        ids = frame.ids.tolist()
+        lat, lon, heading, vn, ve = frame.lat, frame.lon, frame.heading, frame.vn, frame.ve
 
-            # Clamp index to available data for this drone
-            # This prevents flickering if one drone lags behind the global max_frames
-            curr_idx_clamped = min(idx_current, len(path) - 1)
-            state_curr = path[curr_idx_clamped]
-            
-            # For interpolation, we also need to respect the path bounds
-            next_idx_clamped = min(idx_next, len(path) - 1)
-            
-            if curr_idx_clamped != next_idx_clamped:
-                state_next = path[next_idx_clamped]
-                
-                lat = self.lerp(state_curr.lat, state_next.lat, alpha)
-                lon = self.lerp(state_curr.lon, state_next.lon, alpha)
-                heading = self.lerp_angle(state_curr.heading, state_next.heading, alpha)
-                
-                vn = self.lerp(state_curr.velocity_north, state_next.velocity_north, alpha)
-                ve = self.lerp(state_curr.velocity_east, state_next.velocity_east, alpha)
-            else:
-                lat = state_curr.lat
-                lon = state_curr.lon
-                heading = state_curr.heading
-                vn = state_curr.velocity_north
-                ve = state_curr.velocity_east
-
-            # Use smoothed positions if available (for live streaming)
-            if state_curr.id in self.smoothed_positions:
-                sp = self.smoothed_positions[state_curr.id]
-                lat = sp['lat']
-                lon = sp['lon']
-                heading = sp['heading']
-                vn = sp['vn']
-                ve = sp['ve']
-
-            # Store state for HUD
-            active_states[state_curr.id] = state_curr
-            
-            color_idx = (state_curr.id - 1) % len(self.DRONE_COLORS)
-            color = self.DRONE_COLORS[color_idx]
-            
-            self.map_view.draw_drone(state_curr.id, lat, lon, heading, color, vn, ve)
+        # Use smoothed positions if available (for live streaming)
+        if self.smoothed_positions:
+            for k, drone_id in enumerate(ids):
+                sp = self.smoothed_positions.get(drone_id)
+                if sp is not None:
+                    lat[k], lon[k], heading[k] = sp['lat'], sp['lon'], sp['heading']
+                    vn[k], ve[k] = sp['vn'], sp['ve']
+
+        # Store states for HUD
+        active_states = {drone_id: self.trajectories[drone_id - 1][i]
+                         for drone_id, i in zip(ids, frame.index.tolist())}
+
+        colors = [self.DRONE_COLORS[(drone_id - 1) % len(self.DRONE_COLORS)] for drone_id in ids]
+        self.map_view.draw_drones(ids, lat, lon, heading, colors, vn, ve)
 
         self.map_view.finish_frame()
-        self.map_view.draw_hud(active_states, self.DRONE_COLORS)
+        self.map_view.draw_hud(active_states, self.DRONE_COLORS,
+                               self.latency.overlay_lines(), self.link_stats.overlay_lines())
 
         # --- Update Graphs (with throttling and visibility check) ---
         # Only update if the Graph tab is actually selected
@@ -203,58 +344,106 @@ class DroneApp:
             if self.graph_update_counter >= self.GRAPH_SKIP_FRAMES:
                 # Refresh data cache before drawing
                 self.graph_panel.refresh_active_plots()
-                self.graph_panel.update_graph(idx_current)
+                self.graph_panel.update_graph(t)
                 self.graph_update_counter = 0
 
     def animate_loop(self):
-        if self.is_running:
-            self.play_head += self.PLAY_SPEED
-            if self.play_head >= self.max_frames:
-                self.play_head = 0.0
+        tick_start = time.perf_counter()
+        pending = self.ingest_queue.drain_timed()
+        if self.shared_ring is not None:
+            # Out-of-process decoder: lock-free read of everything published since the last tick
+            pending.extend(self.shared_ring.drain_timed())
+        if pending:
+            # Live data: ingest everything that arrived since the last tick, render once
+            self.process_new_states([entry[0] for entry in pending], [entry[1] for entry in pending])
+            self.latency.record_batch(pending, time.perf_counter())
+        elif self.is_running:
+            self.advance_playback()
             self.draw_frame()
-        self.root.after(self.RENDER_DELAY, self.animate_loop)
+        # Frames start every RENDER_DELAY ms whatever drawing took (at least 1 ms apart)
+        elapsed_ms = (time.perf_counter() - tick_start) * 1000.0
+        self.root.after(max(int(self.RENDER_DELAY - elapsed_ms), 1), self.animate_loop)
 
     def process_new_state(self, state):
         """
         Ingests a new drone state from the live stream.
         """
-        # Ensure we have a list for this drone
-        # Assuming struct ID is 1-based, we map to index ID-1
-        if state.id < 1:
-            print(f"[WARNING] Received invalid drone ID: {state.id}. Ignoring.")
-            return
+        self.process_new_states([state])
 
-        idx = state.id - 1
-        
-        # Check if this is a new drone to trigger UI rebuild
+    def process_new_states(self, states, rx_times=None):
+        """
+        Ingests a batch of drone states from the live stream and renders once.
+        'rx_times' (host receive time of each state, time.perf_counter) time
+        the states that carry no device timestamp.
+        """
         is_new_drone = False
-        while len(self.trajectories) <= idx:
-            self.trajectories.append([])
-            is_new_drone = True
+        ingested = set()
+        if rx_times is None:
+            rx_times = [time.perf_counter()] * len(states)
+        for state, rx_time in zip(states, rx_times):
+            result = self._ingest_state(state, rx_time)
+            if result is None:
+                continue
+            ingested.add(state.id)
+            is_new_drone = is_new_drone or result
 
-        self.trajectories[idx].append(state)
-        
-        # In live mode, we treat the current frame count of this drone as the max
-        # If we have multiple drones, they should be roughly synced, 
-        # so max_frames is the length of the longest history.
-        self.max_frames = max(len(t) for t in self.trajectories) - 1
-        self.controls.set_slider_max(self.max_frames)
+        if not ingested:
+            return
+        self._history_pending = self.history is not None
+        self.frame_sampler.invalidate()
+
+        # In live mode the timeline ends at the newest sample of any drone.
+        # The sample interval is re-estimated while the history is short;
+        # after that only the drones in this batch are looked at.
+        if is_new_drone or self.max_frames < 64:
+            self.update_timeline(recompute_period=True)
+        else:
+            self.extend_timeline(max(self.trajectories[i - 1].end_time for i in ingested))
 
         # Auto-scroll to latest
         # In a real app we might want a "Live" toggle. 
         # For now, if we are receiving data, we jump to the latest.
         self.play_head = float(self.max_frames)
+        self.clock.seek(self.frame_time(self.play_head))
         self.draw_frame()
         
         if is_new_drone:
             self.graph_panel.set_data(self.trajectories, self.DRONE_COLORS)
 
+    def _compact_history(self):
+        """
+        Timer job: moves live samples older than the retention window into
+        the decimated tiers (core/history.py), keeping the time on screen.
+        """
+        if self._history_pending:
+            self._history_pending = False
+            if self.history.apply(self.trajectories):
+                self.frame_sampler.invalidate()
+                t = self.frame_time(self.play_head)
+                self.update_timeline()
+                self.play_head = min(max((t - self.t_start) / self.frame_period, 0.0), float(self.max_frames))
+        self.root.after(self.HISTORY_COMPACT_DELAY, self._compact_history)
+
+    def _ingest_state(self, state, rx_time=None):
+        """
+        Appends one live state to the history without rendering. Without a
+        device timestamp it is timed by 'rx_time' (host clock, seconds), so
+        the timeline and the history retention still run in seconds.
+        Returns True if it was the first sample of a new drone, False otherwise,
+        and None if the state was rejected.
+        """
+        # Ensure we have a list for this drone
+        # Assuming struct ID is 1-based, we map to index ID-1
+        if state.id < 1:
+            print(f"[WARNING] Received invalid drone ID: {state.id}. Ignoring.")
+            return None
+
+        # Check if this is a new drone to trigger UI rebuild
+        is_new_drone = self.trajectories.append(state, rx_time=rx_time)
+
         # -- RECORDING LOGIC --
         if self.is_recording:
-            # Ensure buffer has space
-            while len(self.recording_buffer) <= idx:
-                self.recording_buffer.append([])
-            self.recording_buffer[idx].append(state)
+            self.recorder.append(state, rx_time)
 
         # Center map on Drone 1 if first time seeing it
         if not self.has_centered_on_stream and state.id == 1:
@@ -285,45 +474,64 @@ class DroneApp:
                 'vn': state.velocity_north, 've': state.velocity_east
             }
 
+        return is_new_drone
+
     def toggle_recording(self):
         if self.is_recording:
             # Stop Recording
-            self.is_recording = False
             self.controls.update_record_btn_state(False)
             self.controls.update_status("Recording Stopped")
+            recorder = self.recorder
+            journal_path = self.stop_recording()
             
             # Save Dialog
-            if any(self.recording_buffer):
+            if recorder.samples:
                 file_path = filedialog.asksaveasfilename(
                     title="Save Recording",
-                    defaultextension=".json",
-                    filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")],
-                    initialdir=os.getcwd()
+                    defaultextension=recording_file.BINARY_EXTENSION,
+                    filetypes=recording_file.FILETYPES[1:],
+                    initialdir=self.record_dir,
+                    initialfile=os.path.basename(journal_path)
                 )
                 if file_path:
                     try:
-                        # Convert buffer to list of list of dicts
-                        output_data = []
-                        for path in self.recording_buffer:
-                            path_dicts = [asdict(s) for s in path]
-                            output_data.append(path_dicts)
-                        
-                        with open(file_path, 'w') as f:
-                            json.dump(output_data, f, indent=4)
+                        # The journal is only crash-safe: convert it to the format of the chosen
+                        # extension (memory-mapped .gsrec, compressed .gsarc or JSON)
+                        recording_file.save_recording(recording_file.load_journal(journal_path), file_path)
+                        if os.path.abspath(file_path) != os.path.abspath(journal_path):
+                            os.remove(journal_path)
                         print(f"Recording saved to {file_path}")
                         self.controls.update_status("Recording Saved")
                     except Exception as e:
-                        print(f"Failed to save recording: {e}")
+                        print(f"Failed to save recording: {e} (kept at {journal_path})")
                         self.controls.update_status("Save Failed")
+                else:
+                    print(f"Recording kept at {journal_path}")
+                    self.controls.update_status("Recording Kept")
             else:
+                os.remove(journal_path)
                 self.controls.update_status("Buffer Empty")
             
-            # Clear buffer
-            self.recording_buffer = []
-            
         else:
             # Start Recording
+            os.makedirs(self.record_dir, exist_ok=True)
+            name = time.strftime("session-%Y%m%d-%H%M%S") + recording_file.BINARY_EXTENSION
+            self.recorder = StreamingRecorder(os.path.join(self.record_dir, name + PARTIAL_SUFFIX))
             self.is_recording = True
-            self.recording_buffer = [] # Reset buffer
             self.controls.update_record_btn_state(True)
-            self.controls.update_status("Recording...")
\ No newline at end of file
+            self.controls.update_status("Recording...")
+
+    def stop_recording(self):
+        """
+        Closes the journal (footer index, fsync) and drops PARTIAL_SUFFIX from
+        its name. Returns the path, or None if nothing was being recorded.
+        """
+        if self.recorder is None:
+            return None
+        self.is_recording = False
+        recorder, self.recorder = self.recorder, None
+        partial_path = recorder.close()
+        print(f"Recorder stats: {recorder.stats()}")
+        journal_path = partial_path[:-len(PARTIAL_SUFFIX)]
+        os.replace(partial_path, journal_path)
+        return journal_path
@@ -0,0 +1,181 @@
+import os
+import threading
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from core.catalog import Catalog, EVENT_KINDS
+
+
+class CatalogDialog(tk.Toplevel):
+    """
+    Load dialog over the recording catalog: filter by drone, event and place,
+    pick a flight from the results. The library is rescanned in the background
+    when the dialog opens (only new or changed files are read).
+    """
+    POLL_DELAY = 200  # ms
+    ANY = "any"
+    COLUMNS = [("file", "Recording", 260), ("drone_id", "Drone", 50), ("start_s", "Start (s)", 70),
+               ("duration_s", "Duration (s)", 80), ("distance_m", "Distance (m)", 85),
+               ("gps_losses", "GPS losses", 75), ("link_gaps", "Link gaps", 70), ("events", "Matches", 60)]
+
+    def __init__(self, parent, catalog_path, library, on_open, on_browse):
+        super().__init__(parent)
+        self.title("Load Recording")
+        self.geometry("900x450")
+        self.catalog_path = catalog_path
+        self.library = library
+        self.on_open = on_open
+        self.on_browse = on_browse
+        self.catalog = Catalog(catalog_path)
+        self.rows = {}
+        self._scan = None        # Background rescan: {'thread', 'done', 'total', 'result'}
+
+        # --- Filters ---
+        filters = tk.Frame(self)
+        filters.pack(side=tk.TOP, fill=tk.X, padx=10, pady=5)
+        self.var_drone = tk.StringVar()
+        self.var_event = tk.StringVar(value=self.ANY)
+        self.var_near = tk.StringVar()
+        self.var_radius = tk.StringVar(value="100")
+        for label, widget in (
+                ("Drone", tk.Entry(filters, textvariable=self.var_drone, width=6)),
+                ("Event", ttk.Combobox(filters, textvariable=self.var_event, values=[self.ANY, *EVENT_KINDS],
+                                       state="readonly", width=10)),
+                ("Near (lat,lon)", tk.Entry(filters, textvariable=self.var_near, width=22)),
+                ("Radius (m)", tk.Entry(filters, textvariable=self.var_radius, width=7))):
+            tk.Label(filters, text=label).pack(side=tk.LEFT, padx=(8, 2))
+            widget.pack(side=tk.LEFT)
+            if isinstance(widget, tk.Entry):
+                widget.bind("<Return>", lambda e: self.search())
+        tk.Button(filters, text="Search", command=self.search).pack(side=tk.LEFT, padx=8)
+
+        # --- Results ---
+        table = tk.Frame(self)
+        table.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=10)
+        self.tree = ttk.Treeview(table, columns=[c for c, _, _ in self.COLUMNS], show="headings",
+                                 selectmode="browse")
+        for col, heading, width in self.COLUMNS:
+            self.tree.heading(col, text=heading)
+            self.tree.column(col, width=width, anchor=tk.W if col == "file" else tk.E)
+        scroll = ttk.Scrollbar(table, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scroll.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.bind("<Double-1>", lambda e: self.open_selected())
+
+        # --- Buttons ---
+        buttons = tk.Frame(self)
+        buttons.pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=5)
+        self.lbl_status = tk.Label(buttons, text="", anchor=tk.W)
+        self.lbl_status.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        tk.Button(buttons, text="Close", command=self.close).pack(side=tk.RIGHT, padx=5)
+        tk.Button(buttons, text="Open", command=self.open_selected, bg="#ddffdd").pack(side=tk.RIGHT, padx=5)
+        tk.Button(buttons, text="Browse...", command=self.browse).pack(side=tk.RIGHT, padx=5)
+        self.btn_rescan = tk.Button(buttons, text="Rescan", command=self.rescan)
+        self.btn_rescan.pack(side=tk.RIGHT, padx=5)
+
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.search()
+        self.rescan()
+
+    # --- Actions ---
+
+    def search(self):
+        try:
+            drone = int(self.var_drone.get()) if self.var_drone.get().strip() else None
+            near = None
+            if self.var_near.get().strip():
+                near = tuple(float(v) for v in self.var_near.get().split(","))
+                if len(near) != 2:
+                    raise ValueError("Near expects LAT,LON")
+            radius = float(self.var_radius.get())
+        except ValueError as e:
+            messagebox.showerror("Search", f"Invalid filter: {e}", parent=self)
+            return
+        event = self.var_event.get()
+        rows = self.catalog.find(drone_id=drone, event=None if event == self.ANY else event, near=near,
+                                 radius_m=radius if near else None)
+
+        self.tree.delete(*self.tree.get_children())
+        self.rows = {}
+        for row in rows:
+            values = [self._cell(row, col) for col, _, _ in self.COLUMNS]
+            self.rows[self.tree.insert("", tk.END, values=values)] = row
+        files = len({row["file"] for row in rows})
+        self._set_status(f"{len(rows)} drones in {files} recordings")
+
+    def open_selected(self):
+        selection = self.tree.selection()
+        if not selection:
+            return
+        path = self.rows[selection[0]]["file"]
+        self.close()
+        self.on_open(path)
+
+    def browse(self):
+        self.close()
+        self.on_browse()
+
+    def rescan(self):
+        if self._scan is not None:
+            return
+        scan = {'done': 0, 'total': 0, 'result': None}
+
+        def progress(done, total, path):
+            scan['done'], scan['total'] = done, total
+
+        def run():
+            # sqlite connections belong to their thread: the scan writes through its own
+            try:
+                with Catalog(self.catalog_path) as catalog:
+                    scan['result'] = catalog.update(self.library, jobs=1, progress=progress)
+            except Exception as e:
+                scan['result'] = e
+
+        scan['thread'] = threading.Thread(target=run, daemon=True)
+        self._scan = scan
+        self.btn_rescan.config(state=tk.DISABLED)
+        scan['thread'].start()
+        self.after(self.POLL_DELAY, self._poll_scan)
+
+    def _poll_scan(self):
+        if not self.winfo_exists():
+            return
+        scan = self._scan
+        if scan['thread'].is_alive():
+            if scan['total']:
+                self._set_status(f"Indexing {scan['done']}/{scan['total']}...")
+            self.after(self.POLL_DELAY, self._poll_scan)
+            return
+        self._scan = None
+        self.btn_rescan.config(state=tk.NORMAL)
+        result = scan['result']
+        if isinstance(result, Exception):
+            print(f"[ERROR] Catalog rescan failed: {result}")
+            self._set_status(f"Rescan failed: {result}")
+            return
+        if result['indexed'] or result['removed']:
+            self.search()
+        summary = f"{result['indexed']} indexed, {result['removed']} removed"
+        if result['failed']:
+            summary += f", {result['failed']} unreadable"
+        self._set_status(f"{self.lbl_status.cget('text')} ({summary})")
+
+    def close(self):
+        # A running rescan finishes on its own connection; it is safe to drop mid-way
+        self.catalog.close()
+        self.destroy()
+
+    # --- Helpers ---
+
+    def _set_status(self, text):
+        self.lbl_status.config(text=text)
+
+    @staticmethod
+    def _cell(row, col):
+        value = row.get(col)
+        if col == "file":
+            return os.path.join(os.path.basename(os.path.dirname(value)), os.path.basename(value))
+        if isinstance(value, float):
+            return f"{value:.1f}"
+        return value
@@ -1,9 +1,12 @@
 import tkinter as tk
+from tkinter import ttk
+from core.playback_clock import SPEEDS
 
 class ControlPanel(tk.Frame):
-    def __init__(self, parent, callbacks):
+    def __init__(self, parent, callbacks, speed=1.0):
         """
-        callbacks: dict containing 'play', 'pause', 'reset', 'drag', 'load', 'connect', 'record'
+        callbacks: dict containing 'play', 'pause', 'reset', 'drag', 'load', 'connect', 'record',
+                   and optionally 'cancel_load', 'speed' (float) and 'reverse' (bool)
         """
         super().__init__(parent, height=100, bg="#f0f0f0")
         self.callbacks = callbacks
@@ -21,6 +24,18 @@ class ControlPanel(tk.Frame):
         self._add_btn(btn_box, "Play", callbacks['play'], "#ddffdd")
         self._add_btn(btn_box, "Pause", callbacks['pause'], "#ffffdd")
         self._add_btn(btn_box, "Reset", callbacks['reset'], "#ffdddd")
+
+        # Playback speed (x real time) and direction
+        if 'speed' in callbacks:
+            labels = [f"{s:g}x" for s in SPEEDS]
+            self.speed_var = tk.StringVar(value=f"{speed:g}x")
+            cb = ttk.Combobox(btn_box, textvariable=self.speed_var, values=labels, state="readonly", width=6)
+            cb.bind("<<ComboboxSelected>>", lambda e: callbacks['speed'](float(self.speed_var.get()[:-1])))
+            cb.pack(side=tk.LEFT, padx=5)
+        if 'reverse' in callbacks:
+            self.reverse_var = tk.BooleanVar(value=False)
+            tk.Checkbutton(btn_box, text="Reverse", variable=self.reverse_var, bg="#f0f0f0",
+                           command=lambda: callbacks['reverse'](self.reverse_var.get())).pack(side=tk.LEFT, padx=5)
         
         # Status
         self.lbl_status = tk.Label(btn_box, text="Status: Ready", font=("Arial", 10), bg="#f0f0f0")
@@ -57,6 +72,13 @@ class ControlPanel(tk.Frame):
     def set_slider_val(self, val):
         self.slider.set(val)
 
+    def set_loading(self, is_loading):
+        """While a recording loads in the background the Load button cancels it."""
+        if is_loading and 'cancel_load' in self.callbacks:
+            self.btn_load.config(text="Cancel Load", command=self.callbacks['cancel_load'], bg="#ffdddd")
+        else:
+            self.btn_load.config(text="Load Data", command=self.callbacks['load'], bg="#ddddff")
+
     def update_record_btn_state(self, is_recording):
         if is_recording:
             self.btn_record.config(text="Stop Rec", bg="#ff5555", fg="white")
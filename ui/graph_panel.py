@@ -1,7 +1,9 @@
 import tkinter as tk
 from tkinter import ttk
+import numpy as np
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from core import history
 from ui.hud import darken_color
 
 class CircularToggle(tk.Canvas):
@@ -101,17 +103,26 @@ class GraphPanel(tk.Frame):
         self.canvas = FigureCanvasTkAgg(self.fig, master=self.graph_frame)
         self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
         
-        # Data State
+        # Data State (a core.telemetry_store.TelemetryStore)
         self.trajectories = []
+        # File playback: the core.recording_query.Recording the plots read from
+        self.recording = None
         self.colors = []
+        # Time (s) of the first sample; the x axis is relative to it
+        self.t0 = 0.0
         
         # Rendering State
         # List of lists: self.active_plots[i] = list of (Line2D, DataArray) for subplot i
         self.active_plots = [] 
 
-    def set_data(self, trajectories, colors):
+    def set_data(self, trajectories, colors, recording=None):
+        """
+        'recording' (file playback) is queried for just the plotted fields and
+        drones; without it (live data) the plots follow the store's columns.
+        """
         self.trajectories = trajectories
         self.colors = colors
+        self.recording = recording
         
         # Clear Toggles in all slots
         for cfg in self.graph_configs:
@@ -119,8 +130,10 @@ class GraphPanel(tk.Frame):
             cfg['toggles'].clear()
         
         if not trajectories: return
+        span = trajectories.time_range(include_history=True)
+        self.t0 = span[0] if span else 0.0
         
-        drone_ids = sorted([traj[0].id for traj in trajectories if traj])
+        drone_ids = sorted(trajectories.drone_ids())
         
         # Helper to create toggles
         def create_toggles_for_slot(cfg):
@@ -158,29 +171,39 @@ class GraphPanel(tk.Frame):
         
         plot_items = []
         is_keep_alive = (attr == "drones_keep_alive")
+        if self.recording is not None:
+            # Only this field of the shown drones is read (chunks/pages of the file)
+            queried = self.recording.query(drones=active_ids, fields=[attr])
 
         for path in self.trajectories:
             if not path: continue
-            d_id = path[0].id
+            d_id = path.drone_id
             
             if d_id not in active_ids: continue
             
             base_color = self.colors[(d_id - 1) % len(self.colors)]
             
+            if self.recording is not None:
+                if d_id not in queried:
+                    continue
+                times, raw_vals = queried[d_id]["t"], queried[d_id][attr]
+            elif is_keep_alive:
+                # Bit masks don't average: full-resolution samples only
+                times, raw_vals = path.time, path.column(attr)
+            else:
+                # Zero-copy views of the store columns, preceded by the bucket
+                # means of older live data (core/history.py) if there is any
+                times, raw_vals = history.series(path, attr)
+
             if is_keep_alive:
-                raw_vals = [s.drones_keep_alive for s in path]
                 for target_id in range(1, 5): 
                     target_color = self.colors[(target_id - 1) % len(self.colors)]
-                    y_data = []
                     bit_mask = 1 << (target_id - 1)
-                    for val in raw_vals:
-                        is_active = (val & bit_mask) != 0
-                        y_data.append(target_id if is_active else 0)
+                    y_data = np.where((raw_vals & bit_mask) != 0, target_id, 0)
                     label = f"Obs {d_id}->T{target_id}"
-                    plot_items.append((label, target_color, y_data))
+                    plot_items.append((label, target_color, y_data, times))
             else:
-                data = [getattr(s, attr) for s in path]
-                plot_items.append((f"ID {d_id}", base_color, data))
+                plot_items.append((f"ID {d_id}", base_color, raw_vals, times))
         
         return plot_items
 
@@ -230,10 +253,10 @@ class GraphPanel(tk.Frame):
             # Plot Data
             current_ax_lines = []
             min_y, max_y = float('inf'), float('-inf')
-            max_len = 0
+            max_x = 0.0
             has_data = False
             
-            for label, color, data in items:
+            for label, color, data, times in items:
                 line, = ax.plot([], [], color=color, label=label, linewidth=1.5)
                 # Store (line, label, color, d_id_ref?) 
                 # We need to know which data maps to which line for refresh.
@@ -241,10 +264,10 @@ class GraphPanel(tk.Frame):
                 # We assume the ORDER is deterministic (based on trajectory/ID order).
                 current_ax_lines.append(line)
                 
-                if data:
-                    min_y = min(min_y, min(data))
-                    max_y = max(max_y, max(data))
-                    max_len = max(max_len, len(data))
+                if len(data):
+                    min_y = min(min_y, data.min())
+                    max_y = max(max_y, data.max())
+                    max_x = max(max_x, times[-1] - self.t0)
                     has_data = True
             
             # Store lines in the info dict so we can reuse them
@@ -256,16 +279,16 @@ class GraphPanel(tk.Frame):
             ax.set_ylabel(field_name)
             ax.grid(True)
             if idx == 0: 
-                ax.set_title(f"{field_name} vs Frame")
+                ax.set_title(f"{field_name} vs Time")
             if idx == num_plots - 1:
-                ax.set_xlabel("Frame Index")
+                ax.set_xlabel("Time (s)")
                 
             if has_data:
                 # Legend limit
                 if len(items) <= 8: ax.legend(loc='upper right', fontsize='x-small')
                 
                 # Limits
-                ax.set_xlim(0, max_len)
+                ax.set_xlim(0, max_x or 1.0)
                 buf = (max_y - min_y) * 0.1 if max_y != min_y else 1.0
                 ax.set_ylim(min_y - buf, max_y + buf)
 
@@ -280,6 +303,11 @@ class GraphPanel(tk.Frame):
         for info in getattr(self, 'active_slots_info', []):
             field_name = info['field']
             active_ids = info['ids']
+            if self.recording is not None:
+                # A recording doesn't change: draw what rebuild_plots read (limits are set)
+                info['cached_data'] = [item[2] for item in info['items']]
+                info['cached_time'] = [item[3] for item in info['items']]
+                continue
             
             # Re-fetch data
             # new_items is list of (label, color, data_array)
@@ -294,31 +322,32 @@ class GraphPanel(tk.Frame):
             
             # Update cache
             info['cached_data'] = [item[2] for item in new_items] # item[2] is data
+            info['cached_time'] = [item[3] for item in new_items] # item[3] is its sample times
             
             # Update limits based on full data
             # We can optimise to only do this occasionally
             min_y, max_y = float('inf'), float('-inf')
-            max_len = 0
+            max_x = 0.0
             has_data = False
-            for data in info['cached_data']:
-                if data:
-                    min_y = min(min_y, min(data))
-                    max_y = max(max_y, max(data))
-                    max_len = max(max_len, len(data))
+            for data, times in zip(info['cached_data'], info['cached_time']):
+                if len(data):
+                    min_y = min(min_y, data.min())
+                    max_y = max(max_y, data.max())
+                    max_x = max(max_x, times[-1] - self.t0)
                     has_data = True
             
             if has_data:
-                info['full_limits'] = (min_y, max_y, max_len)
+                info['full_limits'] = (min_y, max_y, max_x)
                 # We don't necessarily update axis limits here if we are zooming/panning,
                 # but for auto-scale we might.
                 # For now, let's update scalar limits.
                 ax = info['ax']
-                ax.set_xlim(0, max_len)
+                ax.set_xlim(0, max_x or 1.0)
                 buf = (max_y - min_y) * 0.1 if max_y != min_y else 1.0
                 ax.set_ylim(min_y - buf, max_y + buf)
 
-    def update_graph(self, frame_idx):
-        frame_idx = int(frame_idx)
+    def update_graph(self, t):
+        """Draws every line up to time 't' (s, same clock as the trajectories)."""
         any_draw = False
         
         for info in getattr(self, 'active_slots_info', []):
@@ -328,10 +357,10 @@ class GraphPanel(tk.Frame):
             if not cached_data or len(cached_data) != len(lines):
                 continue
                 
-            for line, data in zip(lines, cached_data):
-                limit = min(frame_idx + 1, len(data))
-                # Slice logic
-                line.set_data(range(limit), data[:limit])
+            for line, data, times in zip(lines, cached_data, info['cached_time']):
+                # Samples up to 't': binary search on the sorted time column
+                limit = int(np.searchsorted(times, t, side='right'))
+                line.set_data(times[:limit] - self.t0, data[:limit])
                 any_draw = True
                 
         if any_draw:
@@ -241,4 +241,17 @@ class HUD:
                 self.canvas.create_text(bx, y2 + 8, text=f"{bat}%", 
                                         fill="black", font=("Arial", 7), tags="hud")
             else:
-                self.canvas.create_text(bx, bat_data_y, text="--", fill="black", tags="hud")
\ No newline at end of file
+                self.canvas.create_text(bx, bat_data_y, text="--", fill="black", tags="hud")
+
+    def draw_overlay_text(self, lines, dims, padding, corner="ne"):
+        """Small monospace text panel in the top-right ("ne") or top-left ("nw") corner of the map area."""
+        pad_l, pad_t, pad_r, _ = padding
+        w, h = dims
+        x = w - pad_r - 6 if corner == "ne" else pad_l + 6
+        y = pad_t + 6
+        text_id = self.canvas.create_text(x, y, text="\n".join(lines), anchor=corner,
+                                          font=("Courier", 8), fill="black", tags="hud")
+        x1, y1, x2, y2 = self.canvas.bbox(text_id)
+        bg_id = self.canvas.create_rectangle(x1 - 4, y1 - 2, x2 + 4, y2 + 2, fill="white",
+                                             outline="#888", stipple="gray50", tags="hud")
+        self.canvas.tag_lower(bg_id, text_id)
@@ -6,7 +6,7 @@ import core.tile_utils as tile_utils
 from ui.hud import HUD
 from ui.input_handler import InputHandler
 from ui.tile_loader import TileLoader 
-import math
+import numpy as np
 
 class MapCanvas(tk.Canvas):
     def __init__(self, parent, bounds, width, height, resolution, on_redraw=None):
@@ -160,12 +160,16 @@ class MapCanvas(tk.Canvas):
         
         self.update_view_settings((min_lat, max_lat, min_lon, max_lon), self.resolution)
 
-    def draw_hud(self, active_states, colors):
+    def draw_hud(self, active_states, colors, latency_lines=None, link_lines=None):
         self.hud.clear()
         self.hud.draw_keep_alive(active_states, colors, self.dims, self.padding)
         self.hud.draw_gps_fix(active_states, colors, self.dims, self.padding)
         # Call Telemetry Draw
         self.hud.draw_telemetry(active_states, colors, self.dims, self.padding)
+        if latency_lines:
+            self.hud.draw_overlay_text(latency_lines, self.dims, self.padding, corner="ne")
+        if link_lines:
+            self.hud.draw_overlay_text(link_lines, self.dims, self.padding, corner="nw")
 
     def draw_axes(self):
         w, h = self.dims
@@ -204,18 +208,36 @@ class MapCanvas(tk.Canvas):
             lon = min_lon + pct * (max_lon - min_lon)
             self.itemconfigure(f"label_lon_{i}", text=f"{lon:.5f}")
 
-    def draw_drone(self, drone_id, lat, lon, heading, color, v_north, v_east):
-        cx, cy = geo_math.lat_lon_to_screen(lat, lon, self.bounds, self.dims, self.padding)
-        
+    def draw_drones(self, drone_ids, lat, lon, heading, colors, v_north, v_east):
+        """
+        Draws a whole frame of drones: 'drone_ids' and 'colors' are lists, the
+        rest NumPy arrays (core.frame_sampler.Frame). Projection and shape
+        geometry are computed for all drones at once; only the canvas item
+        updates go drone by drone.
+        """
+        cx, cy = geo_math.lat_lon_array_to_screen(lat, lon, self.bounds, self.dims, self.padding)
+
         # Drone visual radius (0.26m = 2x original 0.13m for better visibility)
         real_r_px = 0.26 * self.px_per_meter
         draw_r = max(real_r_px, 3.0)  # Minimum 3px (2x original 1.5px)
-         
-        line_len = max(real_r_px * 2.0, 10.0)  # Heading line (2x original minimum) 
-        rad = math.radians(heading)
-        head_x = cx + line_len * math.sin(rad)
-        head_y = cy - line_len * math.cos(rad)
-        
+
+        line_len = max(real_r_px * 2.0, 10.0)  # Heading line (2x original minimum)
+        rad = np.radians(heading)
+        head_x = cx + line_len * np.sin(rad)
+        head_y = cy - line_len * np.cos(rad)
+
+        # Velocity vector scaled 2x to match drone size
+        moving = (np.abs(v_north) > 0.1) | (np.abs(v_east) > 0.1)
+        tip_x = cx + v_east * self.px_per_meter * 2
+        tip_y = cy - v_north * self.px_per_meter * 2
+
+        for drone_id, color, x, y, hx, hy, arrow, tx, ty in zip(
+                drone_ids, colors, cx.tolist(), cy.tolist(), head_x.tolist(), head_y.tolist(),
+                moving.tolist(), tip_x.tolist(), tip_y.tolist()):
+            self._place_drone(drone_id, color, draw_r, x, y, hx, hy, (tx, ty) if arrow else None)
+
+    def _place_drone(self, drone_id, color, draw_r, cx, cy, head_x, head_y, arrow_tip):
+        """Moves (or creates) the canvas items of one drone. 'arrow_tip' is None when it isn't moving."""
         self.drawn_ids_this_frame.add(drone_id)
         
         if drone_id in self.drone_graphics:
@@ -231,13 +253,8 @@ class MapCanvas(tk.Canvas):
             self.coords(gfx['label'], cx + draw_r + 5, cy - draw_r - 5)
             self.itemconfigure(gfx['label'], state="normal")
 
-            if abs(v_north) > 0.1 or abs(v_east) > 0.1:
-                # Velocity vector scaled 2x to match drone size
-                px_n = v_north * self.px_per_meter * 2
-                px_e = v_east * self.px_per_meter * 2
-                tx = cx + px_e
-                ty = cy - px_n
-                
+            if arrow_tip is not None:
+                tx, ty = arrow_tip
                 if gfx.get('arrow'):
                     self.coords(gfx['arrow'], cx, cy, tx, ty)
                     self.itemconfigure(gfx['arrow'], fill=color, state="normal")
@@ -258,12 +275,8 @@ class MapCanvas(tk.Canvas):
             
             gfx = {'body': body_id, 'head': head_id, 'label': label_id, 'arrow': None}
             
-            if abs(v_north) > 0.1 or abs(v_east) > 0.1:
-                # Velocity vector scaled 2x to match drone size
-                px_n = v_north * self.px_per_meter * 2
-                px_e = v_east * self.px_per_meter * 2
-                tx = cx + px_e
-                ty = cy - px_n
+            if arrow_tip is not None:
+                tx, ty = arrow_tip
                 arrow_id = self.create_line(cx, cy, tx, ty, fill=color, width=2, arrow=tk.LAST, arrowshape=(8,10,3), tags="drone")
                 gfx['arrow'] = arrow_id
             